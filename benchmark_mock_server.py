@@ -0,0 +1,387 @@
+"""
+Latency and throughput benchmark for the mock server's /Interface API.
+
+Drives every /Interface route with a fixed mix of requests at one or more
+concurrency levels and reports requests/s and p50/p95/p99 latency per
+scenario, for each dataset size:
+
+    python benchmark_mock_server.py [--events 50,100000,1000000] [--concurrency 1,8]
+                                    [--duration 2] [--output bench.json] [--baseline old.json]
+
+By default each dataset is built in a child process (app.py generates its
+data at import) and driven in-process through the Flask test client. With
+--url the requests go over HTTP to a server that is already running, and
+the dataset is whatever that server was started with:
+
+    MOCK_EVENTS=1000000 python mock_server/serve.py --port 8089
+    python benchmark_mock_server.py --url http://localhost:8089
+
+Either way nothing outside this machine is contacted. Generating millions
+of events takes a while; build a snapshot once and pass it instead:
+
+    python mock_server/snapshot.py data/10m --events 10000000
+    python benchmark_mock_server.py --snapshot data/10m
+
+--output writes the results as JSON. --baseline compares them with an
+earlier results file and exits with status 1 if any scenario's p95
+latency or throughput got worse by more than --tolerance. The SSE stream
+(/Interface/Analytics/Stream) never ends, so it is not benchmarked.
+"""
+import argparse
+from datetime import datetime, timedelta
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RESULTS_VERSION = 1
+
+
+def get(path):
+    return lambda n: ("GET", path, None)
+
+
+def post(path, body):
+    return lambda n: ("POST", path, body(n))
+
+
+def add_bookmarks(client, count):
+    """Ids of `count` new bookmarks, added outside the timed runs"""
+    ids = []
+    while len(ids) < count:
+        batch = [{"title": f"bench delete {i}"} for i in range(min(count - len(ids), 50000))]
+        added = client.fetch("POST", "/Interface/Cameras/Bookmarks/AddBatch", {"bookmarks": batch})
+        ids += [result["bookmark"]["id"] for result in added["results"]]
+    return ids
+
+
+def scenarios(info):
+    """(name, request factory, setup) triples.
+
+    factory(n) gives the n-th request of a run; setup(client, count), if
+    given, prepares state for a run of up to `count` requests.
+    """
+    cameras, counters = info["cameras"], info["counters"]
+    hour_ago = (datetime.now() - timedelta(hours=1)).isoformat(timespec="seconds")
+    camera = cameras[0] if cameras else ""
+    deletable = []
+
+    def seed_deletable(client, count):
+        deletable[:] = add_bookmarks(client, count)
+
+    mix = [
+        ("Index", get("/")),
+        ("GetCameras", get("/Interface/Cameras/GetCameras")),
+        ("GetCameras paged", get("/Interface/Cameras/GetCameras?Limit=100&Offset=100")),
+        ("GetGroups", get("/Interface/Cameras/GetGroups")),
+        ("GetStatus", get("/Interface/Cameras/GetStatus")),
+        ("GetStatus 10 cameras", get("/Interface/Cameras/GetStatus?Cameras=" + ",".join(cameras[:10]))),
+        ("Activation", post("/Interface/Cameras/Activation", lambda n: {
+            "camera": cameras[n % len(cameras)], "action": "deactivate" if n // len(cameras) % 2 == 0 else "activate"})),
+        ("ActivationBatch 100", post("/Interface/Cameras/ActivationBatch", lambda n: {
+            "cameras": cameras[:100], "action": "deactivate" if n % 2 == 0 else "activate"})),
+        ("GetAnalyticsConfigurations", get("/Interface/Analytics/GetAnalyticsConfigurations")),
+        ("GetCounters", get("/Interface/Analytics/GetCounters")),
+        ("ResetCounter", post("/Interface/Analytics/ResetCounter", lambda n: {"counterId": counters[n % len(counters)]})),
+        ("ResetCounterBatch", post("/Interface/Analytics/ResetCounterBatch", lambda n: {"counterIds": counters})),
+        ("Analytics GetStatus", get("/Interface/Analytics/GetStatus")),
+        ("Search newest 100", get("/Interface/Analytics/Search?Limit=100")),
+        ("Search 10000", get("/Interface/Analytics/Search?Limit=10000")),
+        ("Search last hour", get(f"/Interface/Analytics/Search?StartDate={hour_ago}&Limit=1000")),
+        ("Search camera+type", get(f"/Interface/Analytics/Search?Cameras={camera}&EventTypes=MOTION&Limit=100")),
+        ("Chart", get("/Interface/Analytics/Chart")),
+        ("Chart 1440 minutes", get("/Interface/Analytics/Chart?Interval=1&Buckets=1440")),
+        ("Audit Search", get("/Interface/Audit/Search?Limit=100")),
+        ("Audit Keyword", get("/Interface/Audit/Search?Keyword=login&Limit=100")),
+        ("Bookmarks Search", get("/Interface/Cameras/Bookmarks/Search?Limit=100")),
+        ("Bookmarks Keyword", get("/Interface/Cameras/Bookmarks/Search?Keyword=bench&Limit=100")),
+        ("Bookmarks Add", post("/Interface/Cameras/Bookmarks/Add", lambda n: {
+            "title": f"bench {n}", "color": "blue", "remarks": "benchmark", "cameras": [camera]})),
+        ("Bookmarks AddBatch 100", post("/Interface/Cameras/Bookmarks/AddBatch", lambda n: {
+            "bookmarks": [{"title": f"bench batch {n}-{i}", "color": "green"} for i in range(100)]})),
+        ("Dashboard Stats", get("/Interface/Dashboard/Stats")),
+        ("System Status", get("/Interface/System/Status")),
+    ]
+    mix = [(name, factory, None) for name, factory in mix]
+    mix.append(("Bookmarks Delete", post("/Interface/Cameras/Bookmarks/Delete", lambda n: {"id": deletable.pop()}), seed_deletable))
+    return mix
+
+
+class InProcessClient:
+    """Flask test client; one per thread"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+    def fetch(self, method, path, body=None):
+        return json.loads(self.request(method, path, body)[1])
+
+
+class HttpClient:
+    """Keep-alive HTTP connection to --url; one per thread"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.prefix = parts.path.rstrip("/")
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+
+    def request(self, method, path, body):
+        data = None if body is None else json.dumps(body).encode()
+        headers = {} if data is None else {"Content-Type": "application/json"}
+        try:
+            self.connection.request(method, self.prefix + path, data, headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # reconnects on the next request
+            raise
+
+    def fetch(self, method, path, body=None):
+        return json.loads(self.request(method, path, body)[1])
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def run_scenario(make_client, factory, concurrency, duration, max_requests):
+    """Drive one scenario from `concurrency` threads; returns its result dict"""
+    clients = [make_client() for _ in range(concurrency)]
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    sizes = [0] * concurrency
+    issued = iter(range(max_requests))
+    lock = threading.Lock()
+    gate = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+    first = []  # (method, path) of the first request, for the report
+
+    def worker(t):
+        client, own = clients[t], latencies[t]
+        gate.wait()
+        while time.perf_counter() < deadline[0]:
+            with lock:
+                n = next(issued, None)
+            if n is None:
+                break
+            method, path, body = factory(n)
+            if n == 0:
+                first.append((method, path.split("?")[0]))
+            started = time.perf_counter()
+            try:
+                status, data = client.request(method, path, body)
+            except Exception:
+                status, data = None, b""
+            own.append(time.perf_counter() - started)
+            sizes[t] += len(data)
+            if status is None or status >= 400:
+                errors[t] += 1
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    gate.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latency for own in latencies for latency in own)
+    requests = len(ordered)
+    ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    method, path = first[0] if first else (None, None)
+    return {
+        "method": method,
+        "path": path,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(errors),
+        "seconds": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1) if elapsed else None,
+        "bytesPerRequest": sum(sizes) // requests if requests else 0,
+        "latencyMs": {
+            "mean": ms(sum(ordered) / requests if requests else None),
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1] if ordered else None),
+        },
+    }
+
+
+def dataset_info(client):
+    """Cameras, counters and dataset size, read through the API itself"""
+    return {
+        "events": client.fetch("GET", "/Interface/Dashboard/Stats")["totalEvents"],
+        "cameras": [c["name"] for c in client.fetch("GET", "/Interface/Cameras/GetCameras")["Cameras"]],
+        "counters": [c["id"] for c in client.fetch("GET", "/Interface/Analytics/GetCounters")["Counters"]],
+    }
+
+
+def run_dataset(args, make_client, label, startup=None):
+    """Every scenario at every concurrency against the current dataset"""
+    setup_client = make_client()
+    info = dataset_info(setup_client)
+    print(f"Dataset {label}: {info['events']} events, {len(info['cameras'])} cameras")
+    print(f"  {'scenario':28} {'conc':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+    results = []
+    for name, factory, setup in scenarios(info):
+        if args.only and not any(word.lower() in name.lower() for word in args.only):
+            continue
+        for concurrency in args.concurrency:
+            if setup is not None:
+                setup(setup_client, args.requests + 1)
+            # One untimed request first, so lazy indexes and caches are built
+            run_scenario(make_client, factory, 1, 60, 1)
+            result = run_scenario(make_client, factory, concurrency, args.duration, args.requests)
+            result = {"scenario": name, **result}
+            latency = result["latencyMs"]
+            print(f"  {name:28} {concurrency:>4} {result['rps'] or 0:>9.1f} {latency['p50'] or 0:>9.2f} "
+                  f"{latency['p95'] or 0:>9.2f} {latency['p99'] or 0:>9.2f} {result['errors']:>6}")
+            results.append(result)
+    return {"label": label, "events": info["events"], "cameras": len(info["cameras"]),
+            "startupSeconds": startup, "results": results}
+
+
+def child(args):
+    """Run in a fresh process: build one dataset and benchmark it in-process"""
+    sys.path.insert(0, os.path.join(ROOT, "mock_server"))
+    os.environ.setdefault("MOCK_LIVE_RATE", "0")
+    started = time.perf_counter()
+    import app as mock
+    startup = round(time.perf_counter() - started, 3)
+    dataset = run_dataset(args, lambda: InProcessClient(mock.app), args.child_label, startup)
+    with open(args.child_output, "w") as f:
+        json.dump(dataset, f)
+
+
+def run_children(args):
+    datasets = [(f"{n} events", {"MOCK_EVENTS": str(n)}) for n in args.events]
+    datasets += [(f"snapshot {path}", {"MOCK_SNAPSHOT": os.path.abspath(path)}) for path in args.snapshot]
+    results = []
+    for label, env in datasets:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "dataset.json")
+            command = [sys.executable, os.path.abspath(__file__), "--child-output", output, "--child-label", label,
+                       "--concurrency", ",".join(map(str, args.concurrency)),
+                       "--duration", str(args.duration), "--requests", str(args.requests)]
+            if args.only:
+                command += ["--only", ",".join(args.only)]
+            env = {**os.environ, "MOCK_SNAPSHOT": "", "MOCK_DB": "", **env}
+            # The app's own startup chatter would drown the table
+            process = subprocess.run(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            print("\n".join(line for line in process.stdout.splitlines() if not line.startswith("[MOCK SERVER]")))
+            if process.returncode != 0 or not os.path.exists(output):
+                print(f"✗ Dataset {label} failed (exit status {process.returncode})")
+                continue
+            with open(output) as f:
+                results.append(json.load(f))
+    return results
+
+
+def compare(report, baseline, tolerance):
+    """Scenarios slower than the baseline beyond tolerance, as printable lines"""
+    previous = {(d["label"], r["scenario"], r["concurrency"]): r
+                for d in baseline.get("datasets", []) for r in d["results"]}
+    regressions = []
+    for dataset in report["datasets"]:
+        for result in dataset["results"]:
+            old = previous.get((dataset["label"], result["scenario"], result["concurrency"]))
+            if old is None:
+                continue
+            p95, old_p95 = result["latencyMs"]["p95"], old["latencyMs"]["p95"]
+            key = f"{dataset['label']} / {result['scenario']} x{result['concurrency']}"
+            if p95 and old_p95 and p95 > old_p95 * (1 + tolerance):
+                regressions.append(f"{key}: p95 {old_p95:.2f} -> {p95:.2f} ms")
+            if result["rps"] and old["rps"] and result["rps"] < old["rps"] / (1 + tolerance):
+                regressions.append(f"{key}: {old['rps']:.1f} -> {result['rps']:.1f} req/s")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="benchmark a running server over HTTP instead of in-process")
+    parser.add_argument("--events", type=int_list, default=[50, 100000, 1000000],
+                        help="comma-separated dataset sizes for in-process runs (default: 50,100000,1000000)")
+    parser.add_argument("--snapshot", action="append", default=[], help="also benchmark a snapshot directory (repeatable)")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8], help="comma-separated thread counts (default: 1,8)")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per scenario and concurrency (default: 2)")
+    parser.add_argument("--requests", type=int, default=20000, help="request cap per scenario and concurrency")
+    parser.add_argument("--only", type=lambda v: v.split(","), help="comma-separated words; run scenarios whose name contains one")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with an earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against --baseline (default: 0.2)")
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    parser.add_argument("--child-label", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_output:
+        child(args)
+        return 0
+
+    print("Benchmarking mock server...")
+    print("=" * 60)
+    report = {
+        "version": RESULTS_VERSION,
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mode": "http" if args.url else "in-process",
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+    }
+    if args.url:
+        report["datasets"] = [run_dataset(args, lambda: HttpClient(args.url), args.url)]
+    else:
+        report["datasets"] = run_children(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"✗ {len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            status = 1
+        else:
+            print(f"✓ No regressions against {args.baseline}")
+    print("=" * 60)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
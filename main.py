@@ -1,5 +1,11 @@
-def main():
-    print("Hello from repl-nix-workspace!")
+"""Start the Digifort mock server (see mock_server/serve.py for options)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server"))
+
+from serve import main
 
 
 if __name__ == "__main__":
@@ -7,297 +7,76 @@ IMPORTANT: This mock server now includes 3D positioning data (x, y, z, angle, lo
 for use with Three.js 3D visualization in the frontend.
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from datetime import datetime, timedelta
+import argparse
 import random
 import uuid
 import math
 import os
 
+from camera_index import CameraIndex
+from compression import Compressor
+from event_generator import EVENT_FIELDS, EVENT_TYPES, generate_event_chunks
+from event_histogram import EventHistogram
+from event_store import EventStore
+from fleet import generate_fleet, groups_from_cameras, parse_fleet_spec
+from live_events import EventHub, LiveProducer, iter_sse, parse_subscription
+from metrics import Metrics, process_stats
+from persistence import StateDB
+from profiling import SAMPLE_INTERVAL, RequestProfiler
+from projection import ANALYTICS_FIELDS, AUDIT_FIELDS, CAMERA_FIELDS, COUNTER_FIELDS, GROUP_FIELDS, parse_fields
+from pagination import STREAM_BATCH_SIZE, batched, joined, page_list, page_rows, parse_page, stream_records
+from response_cache import CatalogCache, list_document
+from serialization import FastJSONProvider
+from snapshot import load_snapshot
+from state import Lazy, SnapshotList
+from text_index import TextIndex
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
+# gzip/deflate/br for responses of MIN_SIZE bytes or more (see compression.py)
+Compressor(app)
+# Per-route latency, size and serialization histograms (see metrics.py)
+metrics = Metrics(app)
 
-# Helper function to generate random but realistic 3D camera positions
-def generate_high_school_position(camera_name):
-    """Generate 3D position for high school cameras based on their location"""
-    random.seed(camera_name)  # Consistent positioning based on name
-    
-    # Parse camera type from name
-    if "ENTRANCE" in camera_name:
-        x = random.uniform(-5, 5)
-        y = 3
-        z = random.uniform(-40, -38)
-        angle = math.pi
-        location = "Main Entrance"
-    elif "HALLWAY-CENTRAL" in camera_name:
-        x = 0
-        y = 3
-        z = random.uniform(-20, 20)
-        angle = random.choice([0, math.pi])
-        location = f"Central Hallway {camera_name[-2:]}"
-    elif "WEST-HALLWAY" in camera_name:
-        x = -20
-        y = 3
-        z = random.uniform(-20, 20)
-        angle = math.pi / 2
-        location = f"West Hallway {camera_name[-2:]}"
-    elif "EAST-HALLWAY" in camera_name:
-        x = 20
-        y = 3
-        z = random.uniform(-20, 20)
-        angle = -math.pi / 2
-        location = f"East Hallway {camera_name[-2:]}"
-    elif "CLASSROOM" in camera_name:
-        if "-A" in camera_name:
-            x = random.uniform(-20, -10)
-            z = random.uniform(-30, -10)
-        else:  # -B classrooms
-            x = random.uniform(10, 20)
-            z = random.uniform(-30, -10)
-        y = 3
-        angle = random.uniform(0, 2 * math.pi)
-        location = camera_name.split("-")[-1]
-    elif "CAFETERIA" in camera_name:
-        x = random.uniform(-15, 15)
-        y = 3
-        z = random.uniform(25, 35)
-        angle = random.choice([0, math.pi/2, -math.pi/2])
-        location = "Cafeteria"
-    elif "LIBRARY" in camera_name:
-        x = random.uniform(-30, -20)
-        y = 3
-        z = random.uniform(-10, 0)
-        angle = math.pi / 2
-        location = "Library"
-    elif "GYM" in camera_name:
-        x = random.uniform(20, 30)
-        y = 3
-        z = random.uniform(5, 20)
-        angle = -math.pi / 2
-        location = "Gymnasium"
-    elif "STAIR" in camera_name:
-        if "WEST" in camera_name:
-            x = -25
-            angle = math.pi / 4
-        else:
-            x = 25
-            angle = -math.pi / 4
-        y = 3
-        z = -30
-        location = "Stairwell"
-    elif "EXIT" in camera_name:
-        if "WEST" in camera_name:
-            x = -35
-            angle = math.pi / 2
-        elif "EAST" in camera_name:
-            x = 35
-            angle = -math.pi / 2
-        else:  # REAR
-            x = 0
-            angle = 0
-            z = 40
-        y = 3
-        z = 0 if "WEST" in camera_name or "EAST" in camera_name else 40
-        location = "Emergency Exit"
-    elif "PARKING" in camera_name:
-        x = -40
-        y = 5
-        z = random.uniform(-30, 30)
-        angle = math.pi / 4
-        location = "Parking Lot"
-    elif "PLAYGROUND" in camera_name:
-        x = 40
-        y = 5
-        z = 30
-        angle = -math.pi / 4
-        location = "Playground"
-    elif "OFFICE" in camera_name:
-        x = random.uniform(-10, -5)
-        y = 3
-        z = -35
-        angle = math.pi / 4
-        location = "Office"
-    else:
-        # Default random position
-        x = random.uniform(-30, 30)
-        y = 3
-        z = random.uniform(-30, 30)
-        angle = random.uniform(0, 2 * math.pi)
-        location = "Other"
-    
-    return {"x": x, "y": y, "z": z, "angle": angle, "location": location}
-
-def generate_moscow_university_position(camera_name):
-    """Generate 3D position for Moscow State University cameras"""
-    random.seed(camera_name)  # Consistent positioning
-    
-    if "MAIN-ENTRANCE" in camera_name:
-        if "-01" in camera_name:
-            x, z = 0, -45
-        elif "-02" in camera_name:
-            x, z = -15, -45
-        else:
-            x, z = 15, -45
-        y = 2
-        angle = math.pi
-        location = "Main Entrance"
-    elif "TOWER-BASE" in camera_name:
-        x = 0
-        y = 5
-        z = 0 if "-01" in camera_name else 10
-        angle = 0 if "-01" in camera_name else math.pi
-        location = "Tower Base"
-    elif "TOWER-MID" in camera_name:
-        x = -3 if "-01" in camera_name else 3
-        y = 30
-        z = 0
-        angle = math.pi/2 if "-01" in camera_name else -math.pi/2
-        location = "Tower Mid-Level"
-    elif "TOWER-TOP" in camera_name:
-        x = 0
-        y = 60
-        z = -2 if "-01" in camera_name else 2
-        angle = math.pi if "-01" in camera_name else 0
-        location = "Tower Top"
-    elif "WEST-WING" in camera_name:
-        if "ENTRANCE" in camera_name:
-            x, y, z = -30, 2, -30
-        elif "CORRIDOR-01" in camera_name:
-            x, y, z = -40, 2, -20
-        elif "CORRIDOR-02" in camera_name:
-            x, y, z = -40, 2, 0
-        elif "CORRIDOR-03" in camera_name:
-            x, y, z = -40, 2, 20
-        elif "ROOF" in camera_name:
-            x, y, z = -35, 15, 0
-        else:
-            x, y, z = -35, 2, 0
-        angle = math.pi / 2
-        location = "West Wing"
-    elif "EAST-WING" in camera_name:
-        if "ENTRANCE" in camera_name:
-            x, y, z = 30, 2, -30
-        elif "CORRIDOR-01" in camera_name:
-            x, y, z = 40, 2, -20
-        elif "CORRIDOR-02" in camera_name:
-            x, y, z = 40, 2, 0
-        elif "CORRIDOR-03" in camera_name:
-            x, y, z = 40, 2, 20
-        elif "ROOF" in camera_name:
-            x, y, z = 35, 15, 0
-        else:
-            x, y, z = 35, 2, 0
-        angle = -math.pi / 2
-        location = "East Wing"
-    elif "LIBRARY" in camera_name:
-        x = random.uniform(-30, -25)
-        y = 2 if "ENTRANCE" in camera_name else 2
-        z = random.uniform(-40, -35)
-        angle = math.pi / 4
-        location = "Library"
-    elif "AUDITORIUM" in camera_name:
-        x = random.uniform(20, 30)
-        y = 2 if "MAIN" in camera_name else 8
-        z = -35
-        angle = -math.pi / 4
-        location = "Auditorium"
-    elif "CAFETERIA" in camera_name:
-        x = random.uniform(-25, -15)
-        y = 2
-        z = random.uniform(35, 40)
-        angle = math.pi / 2
-        location = "Cafeteria"
-    elif "STUDENT-CENTER" in camera_name:
-        x = 20
-        y = 2
-        z = 35
-        angle = -math.pi / 2
-        location = "Student Center"
-    elif "RECREATION" in camera_name:
-        x = 25
-        y = 2
-        z = 40
-        angle = -math.pi / 4
-        location = "Recreation Area"
-    elif "LAB" in camera_name:
-        if "-A" in camera_name:
-            x, y, z = -50, 2, -10
-        elif "-B" in camera_name:
-            x, y, z = -50, 2, 10
-        else:  # CORRIDOR
-            x, y, z = -45, 2, 0
-        angle = math.pi / 2
-        location = "Laboratory"
-    elif "ADMIN" in camera_name:
-        x = random.uniform(-15, -5)
-        y = 2
-        z = random.uniform(-42, -38)
-        angle = math.pi / 4
-        location = "Administration"
-    elif "RECTOR" in camera_name:
-        x, y, z = 0, 50, 0
-        angle = 0
-        location = "Rector's Office"
-    elif "NORTH-GATE" in camera_name:
-        x, y, z = 0, 2, -55
-        angle = math.pi
-        location = "North Gate"
-    elif "SOUTH-GATE" in camera_name:
-        x, y, z = 0, 2, 55
-        angle = 0
-        location = "South Gate"
-    elif "WEST-GATE" in camera_name:
-        x, y, z = -55, 2, 0
-        angle = math.pi / 2
-        location = "West Gate"
-    elif "EAST-GATE" in camera_name:
-        x, y, z = 55, 2, 0
-        angle = -math.pi / 2
-        location = "East Gate"
-    elif "PARKING-NORTH" in camera_name:
-        x = -35 if "-01" in camera_name else 35
-        y = 5
-        z = -60
-        angle = math.pi / 4 if "-01" in camera_name else -math.pi / 4
-        location = "North Parking"
-    elif "PARKING-SOUTH" in camera_name:
-        x = -35 if "-01" in camera_name else 35
-        y = 5
-        z = 60
-        angle = math.pi * 0.75 if "-01" in camera_name else -math.pi * 0.75
-        location = "South Parking"
-    elif "PLAZA" in camera_name:
-        x, y, z = 0, 2, -50
-        angle = math.pi
-        location = "Central Plaza"
-    elif "GARDEN" in camera_name:
-        x = -30 if "WEST" in camera_name else 30
-        y = 2
-        z = -20
-        angle = math.pi/2 if "WEST" in camera_name else -math.pi/2
-        location = "Garden"
-    elif "EMERGENCY-WEST" in camera_name:
-        x = -48
-        y = 2
-        z = -30 if "-01" in camera_name else 30
-        angle = math.pi / 2
-        location = "West Emergency Exit"
-    elif "EMERGENCY-EAST" in camera_name:
-        x = 48
-        y = 2
-        z = -30 if "-01" in camera_name else 30
-        angle = -math.pi / 2
-        location = "East Emergency Exit"
-    else:
-        # Default random position
-        x = random.uniform(-50, 50)
-        y = 2
-        z = random.uniform(-50, 50)
-        angle = random.uniform(0, 2 * math.pi)
-        location = "Other"
-    
-    return {"x": x, "y": y, "z": z, "angle": angle, "location": location}
+# Startup options: command-line flags when run directly, otherwise environment
+if __name__ == "__main__":
+    _parser = argparse.ArgumentParser(description="Digifort Mock API Server")
+    _parser.add_argument("--fleet", help="generate SITESxBUILDINGSxCAMERAS cameras instead of the demo catalog")
+    _parser.add_argument("--snapshot", help="load cameras and events from a snapshot directory (see snapshot.py)")
+    _parser.add_argument("--db", help="keep bookmarks, counters and camera activation in this SQLite file")
+    _parser.add_argument("--live-rate", help="append this many live events per second (default: off)")
+    _parser.add_argument("--profile-dir", help="allow per-request profiling, writing profiles here (see profiling.py)")
+    _parser.add_argument("--profile-slowest", help="also profile the slowest PERCENT of requests per path")
+    _args = _parser.parse_args()
+    if _args.fleet:
+        os.environ["MOCK_FLEET"] = _args.fleet
+    if _args.snapshot:
+        os.environ["MOCK_SNAPSHOT"] = _args.snapshot
+    if _args.db:
+        os.environ["MOCK_DB"] = _args.db
+    if _args.live_rate:
+        os.environ["MOCK_LIVE_RATE"] = _args.live_rate
+    if _args.profile_dir:
+        os.environ["MOCK_PROFILE_DIR"] = _args.profile_dir
+    if _args.profile_slowest:
+        os.environ["MOCK_PROFILE_SLOWEST"] = _args.profile_slowest
+
+FLEET_SPEC = os.environ.get("MOCK_FLEET")
+SNAPSHOT_PATH = os.environ.get("MOCK_SNAPSHOT")
+DB_PATH = os.environ.get("MOCK_DB")
+PROFILE_DIR = os.environ.get("MOCK_PROFILE_DIR")
+
+# Request profiling is only wired in when a profile directory is configured
+if PROFILE_DIR:
+    RequestProfiler(
+        app, PROFILE_DIR,
+        slowest=float(os.environ.get("MOCK_PROFILE_SLOWEST") or 0),
+        interval=float(os.environ.get("MOCK_PROFILE_INTERVAL") or SAMPLE_INTERVAL * 1000) / 1000,
+    )
 
 # Mock Data Storage - Shopping Mall CCTV System
 mock_cameras = []
@@ -509,68 +288,38 @@ high_school_cameras = [
 for cam in high_school_cameras:
     mock_cameras.append(cam)
 
+# A snapshot (MOCK_SNAPSHOT, see snapshot.py) replaces the catalog and the
+# generated events; a generated fleet (--fleet / MOCK_FLEET) the catalog
+if SNAPSHOT_PATH:
+    mock_cameras, mock_groups, mock_events = load_snapshot(SNAPSHOT_PATH)
+elif FLEET_SPEC:
+    mock_cameras, mock_groups = generate_fleet(*parse_fleet_spec(FLEET_SPEC))
+else:
+    mock_groups = groups_from_cameras(mock_cameras)
+# Indexed on first use
+camera_index = Lazy(lambda: CameraIndex(mock_cameras))
+
+def catalog_summary(cameras):
+    """Camera counts per demo site, in one pass over the catalog"""
+    counts = {"MSU": 0, "High School": 0, "Mall": 0}
+    for camera in cameras:
+        name = camera["name"]
+        counts["MSU" if name.startswith("CAM-MSU-") else "High School" if name.startswith("CAM-HS-") else "Mall"] += 1
+    return counts
+
 print(f"[MOCK SERVER] Loaded {len(mock_cameras)} cameras total")
-print(f"[MOCK SERVER] - MSU cameras: {len([c for c in mock_cameras if c['name'].startswith('CAM-MSU-')])}")
-print(f"[MOCK SERVER] - High School cameras: {len([c for c in mock_cameras if c['name'].startswith('CAM-HS-')])}")
-print(f"[MOCK SERVER] - Mall cameras: {len([c for c in mock_cameras if not c['name'].startswith('CAM-MSU-') and not c['name'].startswith('CAM-HS-')])}")
-
-mock_groups = [
-    {"name": "Entrance", "cameras": ["CAM-ENTRANCE-LEFT", "CAM-ENTRANCE-RIGHT"], "active": True},
-    {"name": "GroundFloor", "cameras": ["CAM-GF-LOBBY", "CAM-GF-CORRIDOR-WEST", "CAM-GF-CORRIDOR-EAST", "CAM-GF-WEST-WING", "CAM-GF-EAST-WING", "CAM-GF-STAIRWELL-WEST", "CAM-GF-STAIRWELL-EAST", "CAM-GF-STORE-1", "CAM-GF-STORE-2", "CAM-GF-STORE-3", "CAM-GF-STORE-4", "CAM-GF-COURT-NORTH", "CAM-GF-FOODCOURT-WEST", "CAM-GF-FOODCOURT-EAST", "CAM-GF-COURT-SOUTH"], "active": True},
-    {"name": "SecondFloor", "cameras": ["CAM-2F-LOBBY", "CAM-2F-CORRIDOR-WEST", "CAM-2F-CORRIDOR-EAST", "CAM-2F-WEST-WING", "CAM-2F-EAST-WING", "CAM-2F-STAIRWELL-WEST", "CAM-2F-STAIRWELL-EAST", "CAM-2F-STORE-5", "CAM-2F-STORE-6", "CAM-2F-STORE-7", "CAM-2F-STORE-8", "CAM-2F-BALCONY-SOUTH"], "active": True},
-    {"name": "Service", "cameras": ["CAM-LOADING-DOCK-LEFT", "CAM-LOADING-DOCK-RIGHT", "CAM-SERVICE-CORRIDOR"], "active": True},
-    {"name": "Parking", "cameras": ["CAM-PARKING-WEST-FRONT", "CAM-PARKING-WEST-MID", "CAM-PARKING-WEST-BACK", "CAM-PARKING-EAST-FRONT", "CAM-PARKING-EAST-MID", "CAM-PARKING-EAST-BACK"], "active": True},
-    {"name": "Perimeter", "cameras": ["CAM-ROOF-NW-CORNER", "CAM-ROOF-NE-CORNER", "CAM-ROOF-SW-CORNER", "CAM-ROOF-SE-CORNER", "CAM-SIDE-DOOR-WEST", "CAM-SIDE-DOOR-EAST", "CAM-EMERGENCY-EXIT-WEST", "CAM-EMERGENCY-EXIT-EAST"], "active": True},
-    
-    # High School Groups
-    {"name": "HighSchool-Entrance", "cameras": ["CAM-HS-MAIN-ENTRANCE-01", "CAM-HS-MAIN-ENTRANCE-02"], "active": True},
-    {"name": "HighSchool-Hallways", "cameras": ["CAM-HS-HALLWAY-CENTRAL-01", "CAM-HS-HALLWAY-CENTRAL-02", "CAM-HS-HALLWAY-CENTRAL-03"], "active": True},
-    {"name": "HighSchool-WestWing", "cameras": ["CAM-HS-WEST-HALLWAY-01", "CAM-HS-WEST-HALLWAY-02", "CAM-HS-WEST-HALLWAY-03"], "active": True},
-    {"name": "HighSchool-EastWing", "cameras": ["CAM-HS-EAST-HALLWAY-01", "CAM-HS-EAST-HALLWAY-02", "CAM-HS-EAST-HALLWAY-03"], "active": True},
-    {"name": "HighSchool-Classrooms", "cameras": ["CAM-HS-CLASSROOM-A101", "CAM-HS-CLASSROOM-A102", "CAM-HS-CLASSROOM-B201", "CAM-HS-CLASSROOM-B202"], "active": True},
-    {"name": "HighSchool-CommonAreas", "cameras": ["CAM-HS-CAFETERIA-01", "CAM-HS-CAFETERIA-02", "CAM-HS-CAFETERIA-03"], "active": True},
-    {"name": "HighSchool-Library", "cameras": ["CAM-HS-LIBRARY-01", "CAM-HS-LIBRARY-02"], "active": True},
-    {"name": "HighSchool-Gymnasium", "cameras": ["CAM-HS-GYM-01", "CAM-HS-GYM-02"], "active": True},
-    {"name": "HighSchool-Stairwells", "cameras": ["CAM-HS-STAIR-WEST-01", "CAM-HS-STAIR-EAST-01"], "active": True},
-    {"name": "HighSchool-Exits", "cameras": ["CAM-HS-EXIT-WEST-01", "CAM-HS-EXIT-EAST-01", "CAM-HS-EXIT-REAR-01"], "active": True},
-    {"name": "HighSchool-Exterior", "cameras": ["CAM-HS-PARKING-01", "CAM-HS-PARKING-02", "CAM-HS-PARKING-03", "CAM-HS-PLAYGROUND-01"], "active": True},
-    {"name": "HighSchool-Administration", "cameras": ["CAM-HS-OFFICE-MAIN-01", "CAM-HS-OFFICE-PRINCIPAL-01"], "active": True},
-    
-    # Moscow State University Groups
-    {"name": "MSU-MainEntrance", "cameras": ["CAM-MSU-MAIN-ENTRANCE-01", "CAM-MSU-MAIN-ENTRANCE-02", "CAM-MSU-MAIN-ENTRANCE-03"], "active": True},
-    {"name": "MSU-Tower", "cameras": ["CAM-MSU-TOWER-BASE-01", "CAM-MSU-TOWER-BASE-02", "CAM-MSU-TOWER-MID-01", "CAM-MSU-TOWER-MID-02", "CAM-MSU-TOWER-TOP-01", "CAM-MSU-TOWER-TOP-02"], "active": True},
-    {"name": "MSU-WestWing", "cameras": ["CAM-MSU-WEST-WING-ENTRANCE", "CAM-MSU-WEST-WING-CORRIDOR-01", "CAM-MSU-WEST-WING-CORRIDOR-02", "CAM-MSU-WEST-WING-CORRIDOR-03", "CAM-MSU-WEST-WING-ROOF"], "active": True},
-    {"name": "MSU-EastWing", "cameras": ["CAM-MSU-EAST-WING-ENTRANCE", "CAM-MSU-EAST-WING-CORRIDOR-01", "CAM-MSU-EAST-WING-CORRIDOR-02", "CAM-MSU-EAST-WING-CORRIDOR-03", "CAM-MSU-EAST-WING-ROOF"], "active": True},
-    {"name": "MSU-Academic", "cameras": ["CAM-MSU-LIBRARY-ENTRANCE", "CAM-MSU-LIBRARY-READING-HALL", "CAM-MSU-AUDITORIUM-MAIN", "CAM-MSU-AUDITORIUM-BALCONY"], "active": True},
-    {"name": "MSU-StudentAreas", "cameras": ["CAM-MSU-CAFETERIA-MAIN", "CAM-MSU-CAFETERIA-SEATING", "CAM-MSU-STUDENT-CENTER", "CAM-MSU-RECREATION-AREA"], "active": True},
-    {"name": "MSU-Laboratories", "cameras": ["CAM-MSU-LAB-BUILDING-A", "CAM-MSU-LAB-BUILDING-B", "CAM-MSU-LAB-CORRIDOR"], "active": True},
-    {"name": "MSU-Administration", "cameras": ["CAM-MSU-ADMIN-ENTRANCE", "CAM-MSU-ADMIN-OFFICE", "CAM-MSU-RECTOR-OFFICE"], "active": True},
-    {"name": "MSU-Perimeter", "cameras": ["CAM-MSU-NORTH-GATE", "CAM-MSU-SOUTH-GATE", "CAM-MSU-WEST-GATE", "CAM-MSU-EAST-GATE"], "active": True},
-    {"name": "MSU-Parking", "cameras": ["CAM-MSU-PARKING-NORTH-01", "CAM-MSU-PARKING-NORTH-02", "CAM-MSU-PARKING-SOUTH-01", "CAM-MSU-PARKING-SOUTH-02"], "active": True},
-    {"name": "MSU-Plaza", "cameras": ["CAM-MSU-PLAZA-CENTER", "CAM-MSU-GARDEN-WEST", "CAM-MSU-GARDEN-EAST"], "active": True},
-    {"name": "MSU-Emergency", "cameras": ["CAM-MSU-EMERGENCY-WEST-01", "CAM-MSU-EMERGENCY-WEST-02", "CAM-MSU-EMERGENCY-EAST-01", "CAM-MSU-EMERGENCY-EAST-02"], "active": True},
-]
+for _site, _count in catalog_summary(mock_cameras).items():
+    print(f"[MOCK SERVER] - {_site} cameras: {_count}")
 
-event_types = ["MOTION", "INTRUSION", "FACE_DETECTION", "VEHICLE_DETECTION", "TAMPERING", "LOITERING", "LINE_CROSSING", "ENTER", "EXIT"]
+event_types = EVENT_TYPES
 
 def generate_events(count=50):
-    events = []
-    now = datetime.now()
-    for i in range(count):
-        camera = random.choice(mock_cameras)
-        event_time = now - timedelta(minutes=random.randint(1, 1440))
-        events.append({
-            "id": str(uuid.uuid4()),
-            "recordCode": f"REC{random.randint(10000, 99999)}",
-            "camera": camera["name"],
-            "zone": random.choice(["Zone A", "Zone B", "Zone C", "Perimeter", None]),
-            "eventType": random.choice(event_types),
-            "objectClass": random.choice(["person", "vehicle", "unknown"]),
-            "ruleName": random.choice(["Motion Rule 1", "Intrusion Alert", "Perimeter Watch", None]),
-            "timestamp": event_time.isoformat(),
-            "confidence": round(random.uniform(0.7, 0.99), 2),
-        })
-    return sorted(events, key=lambda x: x["timestamp"], reverse=True)
+    """Stream `count` events from the last 24 hours as column chunks.
+
+    Backed by the vectorized generator in event_generator.py; EventStore
+    ingests the chunks directly, so no per-event dicts are built up front.
+    """
+    return generate_event_chunks(count, [c["name"] for c in mock_cameras])
 
 def generate_audit_logs(count=30):
     logs = []
@@ -606,16 +355,44 @@ def generate_audit_logs(count=30):
         })
     return sorted(logs, key=lambda x: x["timestamp"], reverse=True)
 
-mock_events = generate_events(50)
-mock_audit_logs = generate_audit_logs(30)
-
-mock_bookmarks = [
+if not SNAPSHOT_PATH:
+    mock_events = EventStore(generate_events(int(os.environ.get("MOCK_EVENTS", 50))))
+print(f"[MOCK SERVER] Loaded {len(mock_events)} events")
+
+# Per-minute counts behind Analytics Chart, built on first use and then kept
+# current as events arrive
+event_histogram = Lazy(lambda: EventHistogram(
+    mock_events, lambda camera: (camera_index().get(camera) or {}).get("group"),
+    retention_minutes=int(float(os.environ.get("MOCK_CHART_RETENTION_HOURS", 168)) * 60),
+))
+
+# Live feed (see live_events.py): MOCK_LIVE_RATE new events per second
+event_hub = EventHub()
+live_producer = LiveProducer(
+    mock_events, [c["name"] for c in mock_cameras], event_hub,
+    rate=float(os.environ.get("MOCK_LIVE_RATE", 0)),
+    max_events=int(os.environ.get("MOCK_LIVE_MAX_EVENTS", 10_000_000)),
+)
+
+@app.before_request
+def start_live_feed():
+    live_producer.ensure_running()
+
+# Bookmarks and counters are copy-on-write (see state.py)
+mock_bookmarks = SnapshotList([
     {"id": str(uuid.uuid4()), "title": "Suspicious Activity - Main Entrance", "color": "red", "startDate": "2024-12-08", "startTime": "14:30", "endDate": "2024-12-08", "endTime": "14:45", "cameras": ["Camera 1 - Main Entrance"], "remarks": "Person loitering near entrance for extended period", "createdAt": datetime.now().isoformat()},
     {"id": str(uuid.uuid4()), "title": "Vehicle Incident - Parking", "color": "orange", "startDate": "2024-12-07", "startTime": "09:15", "endDate": "2024-12-07", "endTime": "09:25", "cameras": ["Camera 2 - Parking Lot A", "Camera 9 - Parking Lot B"], "remarks": "Minor collision in parking area", "createdAt": datetime.now().isoformat()},
     {"id": str(uuid.uuid4()), "title": "Delivery Verification", "color": "blue", "startDate": "2024-12-06", "startTime": "11:00", "endDate": "2024-12-06", "endTime": "11:30", "cameras": ["Camera 3 - Loading Dock"], "remarks": "Large shipment arrival for verification", "createdAt": datetime.now().isoformat()},
     {"id": str(uuid.uuid4()), "title": "After Hours Access", "color": "yellow", "startDate": "2024-12-05", "startTime": "23:45", "endDate": "2024-12-06", "endTime": "00:15", "cameras": ["Camera 5 - Server Room"], "remarks": "Authorized maintenance access to server room", "createdAt": datetime.now().isoformat()},
     {"id": str(uuid.uuid4()), "title": "Perimeter Check", "color": "green", "startDate": "2024-12-04", "startTime": "06:00", "endDate": "2024-12-04", "endTime": "06:30", "cameras": ["Camera 14 - Perimeter East", "Camera 15 - Perimeter West"], "remarks": "Morning security patrol verification", "createdAt": datetime.now().isoformat()},
-]
+])
+
+def build_audit_log():
+    logs = generate_audit_logs(int(os.environ.get("MOCK_AUDIT_LOGS", 30)))
+    return logs, TextIndex(("action", "details", "user"), enumerate(logs))
+
+# The audit log and its keyword index are generated on first use
+audit_log = Lazy(build_audit_log)
 
 mock_analytics_configs = [
     {"name": "Motion Detection - All Cameras", "active": True, "camera": "All", "events": ["MOTION"], "working": True, "status": "OK", "statusMessage": "Processing normally"},
@@ -626,14 +403,56 @@ mock_analytics_configs = [
     {"name": "Tampering Alert - All", "active": True, "camera": "All", "events": ["TAMPERING"], "working": True, "status": "OK", "statusMessage": "Monitoring"},
 ]
 
-mock_counters = [
+mock_counters = SnapshotList([
     {"id": str(uuid.uuid4()), "name": "People Counter - Main Entrance", "configuration": "Motion Detection - All Cameras", "value": 1247, "lastReset": "2024-12-01T00:00:00"},
     {"id": str(uuid.uuid4()), "name": "Vehicle Counter - Parking", "configuration": "Vehicle Detection - Parking", "value": 892, "lastReset": "2024-12-01T00:00:00"},
     {"id": str(uuid.uuid4()), "name": "Deliveries - Loading Dock", "configuration": "Motion Detection - All Cameras", "value": 156, "lastReset": "2024-12-01T00:00:00"},
     {"id": str(uuid.uuid4()), "name": "Security Events", "configuration": "Intrusion Detection - Perimeter", "value": 23, "lastReset": "2024-12-01T00:00:00"},
     {"id": str(uuid.uuid4()), "name": "Face Matches", "configuration": "Face Recognition - Entrance", "value": 487, "lastReset": "2024-12-01T00:00:00"},
     {"id": str(uuid.uuid4()), "name": "After Hours Access", "configuration": "Motion Detection - All Cameras", "value": 12, "lastReset": "2024-12-01T00:00:00"},
-]
+])
+
+def camera_activations(names):
+    """Persisted camera state (see persistence.py): the activation flag by name"""
+    found = {}
+    for name in names:
+        camera = camera_index().get(name)
+        if camera is not None:
+            found[name] = {"active": camera["active"]}
+    return found
+
+# Optional persistence (--db / MOCK_DB): the first boot seeds the database
+# with the records above, later boots restore bookmarks, counters and camera
+# activation from it
+state_db = StateDB(DB_PATH) if DB_PATH else None
+if state_db is not None:
+    saved = state_db.load()
+    if saved is None:
+        # Bookmarks are stored oldest first, as if each had been added in turn
+        state_db.seed({
+            "bookmarks": [(b["id"], b) for b in reversed(mock_bookmarks.snapshot())],
+            "counters": [(c["id"], c) for c in mock_counters.snapshot()],
+        })
+    else:
+        mock_bookmarks = SnapshotList(record for _, record in reversed(saved.get("bookmarks", [])))
+        mock_counters = SnapshotList(record for _, record in saved.get("counters", []))
+        for name, record in saved.get("cameras", []):
+            camera_index().set_activation(name, record["active"])
+        print(f"[MOCK SERVER] Restored {len(mock_bookmarks)} bookmarks, {len(mock_counters)} counters "
+              f"and {len(saved.get('cameras', []))} camera states from {DB_PATH}")
+    state_db.track("bookmarks", lambda ids: dict(reversed(mock_bookmarks.get_many(ids).items())))
+    state_db.track("counters", mock_counters.get_many)
+    state_db.track("cameras", camera_activations)
+
+# Keyword search indexes (see text_index.py): audit logs by list position,
+# bookmarks by id; Bookmarks Add/Delete keep the bookmark index current
+bookmark_text = TextIndex(("title", "remarks"), ((b["id"], b) for b in mock_bookmarks.snapshot()))
+
+# Serialized catalog responses, invalidated by the mutating endpoints
+catalog_cache = CatalogCache()
+
+# Startup work is done; System Status reports CPU load from here on
+metrics.cpu.reset()
 
 # Routes
 
@@ -654,122 +473,323 @@ def home():
             "/Interface/Audit/Search",
             "/Interface/Cameras/Bookmarks/Search",
             "/Interface/Cameras/Bookmarks/Add",
+            "/Interface/System/Status",
+            "/Interface/System/Metrics",
         ]
     })
 
 # Camera Endpoints
 @app.route("/Interface/Cameras/GetCameras", methods=["GET"])
 def get_cameras():
-    return jsonify({"Cameras": mock_cameras})
+    try:
+        page = parse_page(request.args)
+        fields = parse_fields(request.args, CAMERA_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if not page.paged:
+        return catalog_cache.respond_list("GetCameras", "Cameras", "cameras", lambda: mock_cameras, fields)
+    fragments = catalog_cache.fragments("GetCameras", "cameras", lambda: mock_cameras, fields)
+    cameras, extra = page_list(fragments, page)
+    return stream_records("Cameras", joined(cameras), extra)
 
 @app.route("/Interface/Cameras/GetGroups", methods=["GET"])
 def get_groups():
-    return jsonify({"Groups": mock_groups})
+    try:
+        fields = parse_fields(request.args, GROUP_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return catalog_cache.respond_list("GetGroups", "Groups", "groups", lambda: mock_groups, fields)
 
 @app.route("/Interface/Cameras/GetStatus", methods=["GET"])
 def get_camera_status():
+    try:
+        fields = parse_fields(request.args, CAMERA_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     cameras = request.args.get("Cameras", "").split(",") if request.args.get("Cameras") else None
+    if fields is None:
+        if cameras and cameras[0]:
+            return jsonify({"Cameras": camera_index().lookup(cameras)})
+        return jsonify({"Cameras": mock_cameras})
+    # Projected records are joined from the GetCameras fragments, by catalog position
+    fragments = catalog_cache.fragments("GetCameras", "cameras", lambda: mock_cameras, fields)
     if cameras and cameras[0]:
-        filtered = [c for c in mock_cameras if c["name"] in cameras]
-        return jsonify({"Cameras": filtered})
-    return jsonify({"Cameras": mock_cameras})
+        fragments = [fragments[p] for p in camera_index().positions(cameras) if p < len(fragments)]
+    return Response(list_document("Cameras", fragments) + b"\n", mimetype=app.json.mimetype)
 
 @app.route("/Interface/Cameras/Activation", methods=["GET", "POST"])
 def camera_activation():
     camera_name = request.args.get("Camera") or request.json.get("camera")
     action = request.args.get("Action") or request.json.get("action")
-    
-    for cam in mock_cameras:
-        if cam["name"] == camera_name:
-            cam["active"] = action == "activate"
-            cam["status"] = "online" if action == "activate" else "offline"
-            cam["working"] = action == "activate"
-            return jsonify({"success": True, "camera": cam})
-    
-    return jsonify({"success": False, "error": "Camera not found"}), 404
+    if camera_name is not None and not isinstance(camera_name, str):
+        return jsonify({"success": False, "error": "Camera name must be a string"}), 400
+    
+    cam = camera_index().set_activation(camera_name, action == "activate")
+    if cam is None:
+        return jsonify({"success": False, "error": "Camera not found"}), 404
+    if state_db is not None:
+        state_db.mark("cameras", camera_name)
+    
+    catalog_cache.bump("cameras")
+    return jsonify({"success": True, "camera": cam})
+
+@app.route("/Interface/Cameras/ActivationBatch", methods=["POST"])
+def camera_activation_batch():
+    """Activate or deactivate {"cameras": [...]} and/or every camera of {"group": ...} at once"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or data.get("action") not in ("activate", "deactivate"):
+        return jsonify({"success": False, "error": "Body must give an action of activate or deactivate"}), 400
+    try:
+        names = batch_items({"cameras": data.get("cameras", [])}, "cameras")
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if data.get("group") is not None:
+        if not isinstance(data["group"], str):
+            return jsonify({"success": False, "error": "Group must be a string"}), 400
+        in_group = camera_index().in_group(data["group"])
+        if not in_group:
+            return jsonify({"success": False, "error": "Group not found"}), 404
+        names = names + [c["name"] for c in in_group]
+    
+    valid = [name for name in names if isinstance(name, str)]
+    updated = iter(camera_index().set_activation_many(valid, data["action"] == "activate"))
+    results = []
+    for name in names:
+        cam = next(updated) if isinstance(name, str) else None
+        if cam is not None:
+            results.append({"success": True, "camera": cam})
+        elif isinstance(name, str):
+            results.append({"success": False, "camera": {"name": name}, "error": "Camera not found"})
+        else:
+            results.append({"success": False, "error": "Camera name must be a string"})
+    changed = [r["camera"]["name"] for r in results if r["success"]]
+    if changed:
+        catalog_cache.bump("cameras")
+        if state_db is not None:
+            state_db.mark_many("cameras", changed)
+    return jsonify(batch_response(results))
 
 # Analytics Endpoints
 @app.route("/Interface/Analytics/GetAnalyticsConfigurations", methods=["GET"])
 def get_analytics_configurations():
-    return jsonify({"AnalyticsConfigurations": mock_analytics_configs})
+    try:
+        fields = parse_fields(request.args, ANALYTICS_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return catalog_cache.respond_list("GetAnalyticsConfigurations", "AnalyticsConfigurations", "analytics",
+                                      lambda: mock_analytics_configs, fields)
 
 @app.route("/Interface/Analytics/GetCounters", methods=["GET"])
 def get_counters():
-    return jsonify({"Counters": mock_counters})
+    try:
+        fields = parse_fields(request.args, COUNTER_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return catalog_cache.respond_list("GetCounters", "Counters", "counters", mock_counters.snapshot, fields)
 
 @app.route("/Interface/Analytics/ResetCounter", methods=["GET", "POST"])
 def reset_counter():
     counter_id = request.args.get("CounterID") or request.json.get("counterId")
     
-    for counter in mock_counters:
-        if counter["id"] == counter_id:
-            counter["value"] = 0
-            counter["lastReset"] = datetime.now().isoformat()
-            return jsonify({"success": True, "counter": counter})
-    
-    return jsonify({"success": False, "error": "Counter not found"}), 404
+    counter = mock_counters.update(counter_id, {"value": 0, "lastReset": datetime.now().isoformat()})
+    if counter is None:
+        return jsonify({"success": False, "error": "Counter not found"}), 404
+    if state_db is not None:
+        state_db.mark("counters", counter_id)
+    
+    catalog_cache.bump("counters")
+    return jsonify({"success": True, "counter": counter})
+
+@app.route("/Interface/Analytics/ResetCounterBatch", methods=["POST"])
+def reset_counter_batch():
+    """Reset {"counterIds": [...]} in one step; results in the same order"""
+    try:
+        counter_ids = batch_items(request.get_json(silent=True), "counterIds")
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    valid = [counter_id for counter_id in counter_ids if isinstance(counter_id, str)]
+    updated = iter(mock_counters.update_many(valid, {"value": 0, "lastReset": datetime.now().isoformat()}))
+    results = []
+    for counter_id in counter_ids:
+        counter = next(updated) if isinstance(counter_id, str) else None
+        if counter is not None:
+            results.append({"success": True, "counter": counter})
+        elif isinstance(counter_id, str):
+            results.append({"success": False, "counterId": counter_id, "error": "Counter not found"})
+        else:
+            results.append({"success": False, "error": "Counter id must be a string"})
+    changed = [r["counter"]["id"] for r in results if r["success"]]
+    if changed:
+        catalog_cache.bump("counters")
+        if state_db is not None:
+            state_db.mark_many("counters", changed)
+    return jsonify(batch_response(results))
 
 @app.route("/Interface/Analytics/GetStatus", methods=["GET"])
 def get_analytics_status():
-    return jsonify({"AnalyticsConfigurations": mock_analytics_configs})
+    try:
+        fields = parse_fields(request.args, ANALYTICS_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return catalog_cache.respond_list("GetAnalyticsStatus", "AnalyticsConfigurations", "analytics",
+                                      lambda: mock_analytics_configs, fields)
+
+def parse_api_datetime(date_value, time_value=None, end=False):
+    """Convert Digifort StartDate/StartTime style arguments to an epoch.
+
+    Dates are accepted as APIDate (YYYY.MM.DD) or ISO (YYYY-MM-DD, optionally
+    with a time part); times as APITime (HH.MM.SS[.mmm]) or HH:MM:SS. A missing
+    time means the start of the day, or the end of it when end=True.
+    """
+    if not date_value:
+        return None
+    date_value = date_value.strip()
+    day = datetime.fromisoformat(date_value.replace(".", "-")[:10])
+    if len(date_value) > 10:
+        moment = datetime.fromisoformat(date_value)
+    elif time_value:
+        parts = time_value.strip().replace(":", ".").split(".")
+        hour, minute, second = (int(p) for p in (parts + ["0", "0"])[:3])
+        millis = int(parts[3].ljust(3, "0")[:3]) if len(parts) > 3 else 0
+        moment = day.replace(hour=hour, minute=minute, second=second, microsecond=millis * 1000)
+    elif end:
+        moment = day.replace(hour=23, minute=59, second=59, microsecond=999999)
+    else:
+        moment = day
+    return moment.timestamp()
+
+def parse_since(value):
+    """Since watermark: a sequence number, or a date/time as for StartDate.
+
+    Returns (sequence, epoch) with the unused one None.
+    """
+    if not value:
+        return None, None
+    value = value.strip()
+    if value.isdigit():
+        return int(value), None
+    return None, parse_api_datetime(value)
 
 @app.route("/Interface/Analytics/Search", methods=["GET"])
 def search_analytics():
     # Parse filters from query params
-    start_date = request.args.get("StartDate")
-    end_date = request.args.get("EndDate")
+    try:
+        start = parse_api_datetime(request.args.get("StartDate"), request.args.get("StartTime"))
+        end = parse_api_datetime(request.args.get("EndDate"), request.args.get("EndTime"), end=True)
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid StartDate/EndDate"}), 400
+    try:
+        since, since_time = parse_since(request.args.get("Since"))
+    except ValueError:
+        return jsonify({"success": False, "error": "Since must be a sequence number or a date/time"}), 400
+    try:
+        page = parse_page(request.args, cursor_key="r")
+        fields = parse_fields(request.args, EVENT_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     cameras = request.args.get("Cameras", "").split(",") if request.args.get("Cameras") else None
     event_types_filter = request.args.get("EventTypes", "").split(",") if request.args.get("EventTypes") else None
     
-    filtered_events = mock_events.copy()
-    
-    if cameras and cameras[0]:
-        filtered_events = [e for e in filtered_events if e["camera"] in cameras]
-    
-    if event_types_filter and event_types_filter[0]:
-        filtered_events = [e for e in filtered_events if e["eventType"] in event_types_filter]
-    
-    return jsonify({"Events": filtered_events})
+    # Delta polling: only events logged at or after the Since watermark and
+    # before this response's Watermark (the next sequence number), which the
+    # client passes as Since on its next poll. Cursor pages keep the first
+    # page's Watermark so a paged delta covers one fixed range.
+    watermark = None
+    if since is not None or since_time is not None:
+        watermark = page.position.get("w", len(mock_events)) if page.position else len(mock_events)
+        if since_time is not None:
+            start = since_time + 1e-6 if start is None else max(start, since_time + 1e-6)
+    
+    rows = mock_events.search_rows(
+        start=start,
+        end=end,
+        cameras=[c for c in cameras if c] if cameras else None,
+        event_types=[t for t in event_types_filter if t] if event_types_filter else None,
+        before=page.position["r"] if page.position else watermark,
+        since=since,
+        limit=page.rows_needed(),
+    )
+    rows, extra = page_rows(rows, page, carry={"w": watermark} if watermark is not None else None)
+    if watermark is not None:
+        extra["Watermark"] = watermark
+    batches = (mock_events.materialize(rows[i:i + STREAM_BATCH_SIZE], fields) for i in range(0, len(rows), STREAM_BATCH_SIZE))
+    
+    return stream_records("Events", batches, extra)
+
+@app.route("/Interface/Analytics/Stream", methods=["GET"])
+def stream_analytics():
+    """Live events as Server-Sent Events (Cameras, EventTypes, QueueSize, Policy)"""
+    try:
+        subscription_args = parse_subscription(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    dumps = app.json.dumps
+    stream = iter_sse(event_hub, subscription_args, lambda o: dumps(o, separators=(",", ":")))
+    return Response(stream, mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def parse_sort(args):
+    """True for Sort=Relevance (best keyword matches first); default keeps the usual order"""
+    sort = (args.get("Sort") or "").lower()
+    if sort not in ("", "relevance"):
+        raise ValueError("Sort must be Relevance")
+    return sort == "relevance"
 
 # Audit Endpoints
 @app.route("/Interface/Audit/Search", methods=["GET"])
 def search_audit():
     category = request.args.get("Category")
     keyword = request.args.get("Keyword")
-    
-    filtered_logs = mock_audit_logs.copy()
+    try:
+        page = parse_page(request.args)
+        by_relevance = parse_sort(request.args)
+        fields = parse_fields(request.args, AUDIT_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    logs, audit_text = audit_log()
+    scores = audit_text.search(keyword) if keyword else None
+    if scores is None:
+        positions = range(len(logs))
+    else:
+        # Documents are list positions, so sorting them keeps the log's order
+        positions = sorted(scores, key=lambda p: (-scores[p], p)) if by_relevance else sorted(scores)
     
     if category:
-        filtered_logs = [l for l in filtered_logs if l["category"] == category]
+        positions = [p for p in positions if logs[p]["category"] == category]
     
-    if keyword:
-        keyword_lower = keyword.lower()
-        filtered_logs = [l for l in filtered_logs if 
-                        keyword_lower in l["action"].lower() or 
-                        (l["details"] and keyword_lower in l["details"].lower()) or
-                        (l["user"] and keyword_lower in l["user"].lower())]
-    
-    return jsonify({"AuditLogs": filtered_logs})
+    positions, extra = page_list(positions, page)
+    if fields is None:
+        return stream_records("AuditLogs", batched([logs[p] for p in positions]), extra)
+    # The log does not change once generated, so its fragments are built once per field set
+    fragments = catalog_cache.fragments("AuditLogs", "audit", lambda: logs, fields)
+    return stream_records("AuditLogs", joined([fragments[p] for p in positions]), extra)
 
 # Bookmark Endpoints
 @app.route("/Interface/Cameras/Bookmarks/Search", methods=["GET"])
 def search_bookmarks():
     keyword = request.args.get("Keyword")
     color = request.args.get("Colors")
+    try:
+        page = parse_page(request.args)
+        by_relevance = parse_sort(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     
-    filtered_bookmarks = mock_bookmarks.copy()
+    filtered_bookmarks = list(mock_bookmarks.snapshot())
     
-    if keyword:
-        keyword_lower = keyword.lower()
-        filtered_bookmarks = [b for b in filtered_bookmarks if 
-                             keyword_lower in b["title"].lower() or 
-                             (b["remarks"] and keyword_lower in b["remarks"].lower())]
+    scores = bookmark_text.search(keyword) if keyword else None
+    if scores is not None:
+        filtered_bookmarks = [b for b in filtered_bookmarks if b["id"] in scores]
+        if by_relevance:
+            filtered_bookmarks.sort(key=lambda b: -scores[b["id"]])
     
     if color:
         colors = color.split(",")
         filtered_bookmarks = [b for b in filtered_bookmarks if b["color"] in colors]
     
-    return jsonify({"Bookmarks": filtered_bookmarks})
+    filtered_bookmarks, extra = page_list(filtered_bookmarks, page)
+    return stream_records("Bookmarks", batched(filtered_bookmarks), extra)
 
 @app.route("/Interface/Cameras/Bookmarks/Add", methods=["GET", "POST"])
 def add_bookmark():
@@ -787,7 +807,17 @@ def add_bookmark():
             "remarks": request.args.get("Remarks"),
         }
     
-    new_bookmark = {
+    new_bookmark = bookmark_record(data)
+    # Index before publishing, so a bookmark in the list is always searchable;
+    # mark after, since the writer persists what the list holds when it flushes
+    bookmark_text.add(new_bookmark["id"], new_bookmark)
+    mock_bookmarks.prepend(new_bookmark)
+    if state_db is not None:
+        state_db.mark("bookmarks", new_bookmark["id"])
+    return jsonify({"success": True, "bookmark": new_bookmark})
+
+def bookmark_record(data):
+    return {
         "id": str(uuid.uuid4()),
         "title": data.get("title"),
         "color": data.get("color", "blue"),
@@ -799,66 +829,149 @@ def add_bookmark():
         "remarks": data.get("remarks"),
         "createdAt": datetime.now().isoformat(),
     }
-    
-    mock_bookmarks.insert(0, new_bookmark)
-    return jsonify({"success": True, "bookmark": new_bookmark})
+
+@app.route("/Interface/Cameras/Bookmarks/AddBatch", methods=["POST"])
+def add_bookmarks_batch():
+    """Add {"bookmarks": [...]} in one step; results in the same order"""
+    try:
+        items = batch_items(request.get_json(silent=True), "bookmarks")
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    results = []
+    new_bookmarks = []
+    for data in items:
+        if isinstance(data, dict):
+            new_bookmarks.append(bookmark_record(data))
+            results.append({"success": True, "bookmark": new_bookmarks[-1]})
+        else:
+            results.append({"success": False, "error": "Bookmark must be an object"})
+    # Newest first afterwards, as if added one by one in the given order;
+    # indexed before publishing, as in add_bookmark()
+    bookmark_text.add_many((b["id"], b) for b in new_bookmarks)
+    mock_bookmarks.prepend_many(new_bookmarks)
+    if state_db is not None:
+        state_db.mark_many("bookmarks", [b["id"] for b in new_bookmarks])
+    return jsonify(batch_response(results))
 
 @app.route("/Interface/Cameras/Bookmarks/Delete", methods=["DELETE", "POST"])
 def delete_bookmark():
     bookmark_id = request.args.get("id") or (request.json.get("id") if request.json else None)
     
-    global mock_bookmarks
-    original_len = len(mock_bookmarks)
-    mock_bookmarks = [b for b in mock_bookmarks if b["id"] != bookmark_id]
-    
-    if len(mock_bookmarks) < original_len:
+    if mock_bookmarks.remove(bookmark_id) is not None:
+        bookmark_text.remove(bookmark_id)
+        if state_db is not None:
+            state_db.mark("bookmarks", bookmark_id)
         return jsonify({"success": True})
     return jsonify({"success": False, "error": "Bookmark not found"}), 404
 
+# Batch request helpers (the AddBatch, ActivationBatch and ResetCounterBatch endpoints)
+MAX_BATCH_ITEMS = 50000
+
+def batch_items(data, key):
+    """The list under `key` in a batch request body; raises ValueError"""
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError(f"Body must be a JSON object with a '{key}' array")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise ValueError(f"At most {MAX_BATCH_ITEMS} {key} per batch")
+    return items
+
+def batch_response(results):
+    """Per-item results plus totals; items that failed leave the others applied"""
+    succeeded = sum(1 for r in results if r["success"])
+    return {"success": succeeded == len(results), "succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
 # Dashboard Stats
-@app.route("/Interface/Dashboard/Stats", methods=["GET"])
-def get_dashboard_stats():
-    active_cameras = sum(1 for c in mock_cameras if c["active"])
-    recording_cameras = sum(1 for c in mock_cameras if c.get("status") == "recording")
-    offline_cameras = sum(1 for c in mock_cameras if not c["active"])
-    critical_events = sum(1 for e in mock_events if e["eventType"] in ["INTRUSION", "TAMPERING", "FIRE", "SMOKE"])
-    
-    return jsonify({
+CRITICAL_EVENT_TYPES = ["INTRUSION", "TAMPERING", "FIRE", "SMOKE"]
+
+def dashboard_counts():
+    """Camera and event counts from the running aggregates, O(1)"""
+    active, statuses = camera_index().counts()
+    return {
+        "totalCameras": len(camera_index()),
+        "activeCameras": active,
+        "recordingCameras": statuses.get("recording", 0),
+        "offlineCameras": len(camera_index()) - active,
+        "totalEvents": len(mock_events),
+        "criticalEvents": mock_events.count(event_types=CRITICAL_EVENT_TYPES),
+    }
+
+def recount_dashboard_counts():
+    """The same counts from full scans of the camera list and event history"""
+    active, statuses = camera_index().recount()
+    return {
         "totalCameras": len(mock_cameras),
-        "activeCameras": active_cameras,
-        "recordingCameras": recording_cameras,
-        "offlineCameras": offline_cameras,
+        "activeCameras": active,
+        "recordingCameras": statuses.get("recording", 0),
+        "offlineCameras": len(mock_cameras) - active,
         "totalEvents": len(mock_events),
-        "criticalEvents": min(critical_events, 5),
+        "criticalEvents": mock_events.recount(CRITICAL_EVENT_TYPES),
+    }
+
+@app.route("/Interface/Dashboard/Stats", methods=["GET"])
+def get_dashboard_stats():
+    counts = dashboard_counts()
+    stats = {
+        **counts,
+        "criticalEvents": min(counts["criticalEvents"], 5),
         "totalStorage": "4 TB",
         "usedStorage": "2.8 TB",
-    })
+    }
+    
+    # SelfCheck=TRUE verifies the running counters against a full recount
+    if request.args.get("SelfCheck", "").upper() == "TRUE":
+        expected = recount_dashboard_counts()
+        mismatches = {k: {"counter": counts[k], "recount": v} for k, v in expected.items() if counts[k] != v}
+        stats["selfCheck"] = {"consistent": not mismatches, "mismatches": mismatches}
+    
+    return jsonify(stats)
 
 # System Status
 @app.route("/Interface/System/Status", methods=["GET"])
 def get_system_status():
+    """CPU and memory use of this server process; disk and sync are still mock values"""
+    process = process_stats(metrics.cpu)
+    uptime = int(process["uptimeSeconds"])
     return jsonify({
         "serverStatus": "online",
-        "cpuUsage": random.randint(30, 60),
-        "memoryUsage": random.randint(50, 75),
+        "cpuUsage": min(round(process["cpuPercent"]), 100),
+        "memoryUsage": round(process["memoryPercent"] or 0),
         "diskUsage": 70,
-        "uptime": "14d 6h 32m",
+        "uptime": f"{uptime // 86400}d {uptime // 3600 % 24}h {uptime // 60 % 60}m",
         "lastSync": f"{random.randint(1, 5)} min ago",
     })
 
+@app.route("/Interface/System/Metrics", methods=["GET"])
+def get_system_metrics():
+    """Per-route request metrics and process load as JSON or, with Format=Prometheus, Prometheus text"""
+    output_format = (request.args.get("Format") or "").lower()
+    if output_format not in ("", "json", "prometheus"):
+        return jsonify({"success": False, "error": "Format must be JSON or Prometheus"}), 400
+    if not output_format:
+        # Prometheus scrapers ask for OpenMetrics or text/plain; browsers and curl get JSON
+        accept = request.headers.get("Accept", "")
+        scraper = ("text/plain" in accept or "openmetrics" in accept) and "application/json" not in accept
+        output_format = "prometheus" if scraper else "json"
+    if output_format == "prometheus":
+        return Response(metrics.to_prometheus(), mimetype="text/plain", content_type="text/plain; version=0.0.4; charset=utf-8")
+    return jsonify(metrics.to_json())
+
 # Chart Data
+MAX_CHART_INTERVAL = 7 * 24 * 60
+MAX_CHART_BUCKETS = 10000
+
 @app.route("/Interface/Analytics/Chart", methods=["GET"])
 def get_chart_data():
-    hours = []
-    now = datetime.now()
-    for i in range(24):
-        hour_time = now - timedelta(hours=23-i)
-        hours.append({
-            "time": hour_time.strftime("%H:00"),
-            "events": random.randint(20, 100),
-            "motion": random.randint(10, 60),
-        })
-    return jsonify(hours)
+    """Event counts per Interval minutes (default 60) for the last Buckets intervals (default 24)"""
+    try:
+        interval = int(request.args.get("Interval") or 60)
+        buckets = int(request.args.get("Buckets") or 24)
+    except ValueError:
+        return jsonify({"success": False, "error": "Interval and Buckets must be integers"}), 400
+    if not 1 <= interval <= MAX_CHART_INTERVAL or not 1 <= buckets <= MAX_CHART_BUCKETS:
+        return jsonify({"success": False, "error": f"Interval must be 1-{MAX_CHART_INTERVAL} minutes and Buckets 1-{MAX_CHART_BUCKETS}"}), 400
+    return jsonify(event_histogram().chart(interval, buckets))
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8089))
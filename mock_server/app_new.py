@@ -14,138 +14,19 @@ import random
 import uuid
 import math
 
+from camera_positions import generate_high_school_position, generate_moscow_university_position
+
 app = Flask(__name__)
 CORS(app)
 
-# Helper function to generate random but realistic 3D camera positions
+# Attach cached, name-derived 3D positions (see camera_positions.py)
 def add_3d_position(camera):
     """Add 3D position fields to camera based on its name and group"""
     name = camera["name"]
-    
-    # High School cameras
     if name.startswith("CAM-HS-"):
-        if "ENTRANCE" in name:
-            camera.update({"x": random.uniform(-5, 5), "y": 3, "z": random.uniform(-40, -38), "angle": math.pi, "location": "Main Entrance"})
-        elif "HALLWAY-CENTRAL" in name:
-            camera.update({"x": 0, "y": 3, "z": random.uniform(-20, 20), "angle": random.choice([0, math.pi]), "location": f"Central Hallway"})
-        elif "WEST-HALLWAY" in name:
-            camera.update({"x": -20, "y": 3, "z": random.uniform(-20, 20), "angle": math.pi / 2, "location": "West Hallway"})
-        elif "EAST-HALLWAY" in name:
-            camera.update({"x": 20, "y": 3, "z": random.uniform(-20, 20), "angle": -math.pi / 2, "location": "East Hallway"})
-        elif "CLASSROOM" in name:
-            if "-A" in name:
-                camera.update({"x": random.uniform(-20, -10), "y": 3, "z": random.uniform(-30, -10), "angle": random.uniform(0, 2*math.pi), "location": name.split("-")[-1]})
-            else:
-                camera.update({"x": random.uniform(10, 20), "y": 3, "z": random.uniform(-30, -10), "angle": random.uniform(0, 2*math.pi), "location": name.split("-")[-1]})
-        elif "CAFETERIA" in name:
-            camera.update({"x": random.uniform(-15, 15), "y": 3, "z": random.uniform(25, 35), "angle": random.choice([0, math.pi/2, -math.pi/2]), "location": "Cafeteria"})
-        elif "LIBRARY" in name:
-            camera.update({"x": random.uniform(-30, -20), "y": 3, "z": random.uniform(-10, 0), "angle": math.pi/2, "location": "Library"})
-        elif "GYM" in name:
-            camera.update({"x": random.uniform(20, 30), "y": 3, "z": random.uniform(5, 20), "angle": -math.pi/2, "location": "Gymnasium"})
-        elif "STAIR" in name:
-            camera.update({"x": -25 if "WEST" in name else 25, "y": 3, "z": -30, "angle": math.pi/4 if "WEST" in name else -math.pi/4, "location": "Stairwell"})
-        elif "EXIT" in name:
-            if "WEST" in name:
-                camera.update({"x": -35, "y": 3, "z": 0, "angle": math.pi/2, "location": "West Exit"})
-            elif "EAST" in name:
-                camera.update({"x": 35, "y": 3, "z": 0, "angle": -math.pi/2, "location": "East Exit"})
-            else:
-                camera.update({"x": 0, "y": 3, "z": 40, "angle": 0, "location": "Rear Exit"})
-        elif "PARKING" in name:
-            camera.update({"x": -40, "y": 5, "z": random.uniform(-30, 30), "angle": math.pi/4, "location": "Parking Lot"})
-        elif "PLAYGROUND" in name:
-            camera.update({"x": 40, "y": 5, "z": 30, "angle": -math.pi/4, "location": "Playground"})
-        elif "OFFICE" in name:
-            camera.update({"x": random.uniform(-10, -5), "y": 3, "z": -35, "angle": math.pi/4, "location": "Office"})
-        else:
-            camera.update({"x": random.uniform(-30, 30), "y": 3, "z": random.uniform(-30, 30), "angle": random.uniform(0, 2*math.pi), "location": "Other"})
-    
-    # Moscow State University cameras
-    elif name.startsWith("CAM-MSU-"):
-        if "MAIN-ENTRANCE" in name:
-            if "-01" in name:
-                camera.update({"x": 0, "y": 2, "z": -45, "angle": math.pi, "location": "Main Entrance Center"})
-            elif "-02" in name:
-                camera.update({"x": -15, "y": 2, "z": -45, "angle": math.pi, "location": "Main Entrance Left"})
-            else:
-                camera.update({"x": 15, "y": 2, "z": -45, "angle": math.pi, "location": "Main Entrance Right"})
-        elif "TOWER-BASE" in name:
-            camera.update({"x": 0, "y": 5, "z": 0 if "-01" in name else 10, "angle": 0 if "-01" in name else math.pi, "location": "Tower Base"})
-        elif "TOWER-MID" in name:
-            camera.update({"x": -3 if "-01" in name else 3, "y": 30, "z": 0, "angle": math.pi/2 if "-01" in name else -math.pi/2, "location": "Tower Mid-Level"})
-        elif "TOWER-TOP" in name:
-            camera.update({"x": 0, "y": 60, "z": -2 if "-01" in name else 2, "angle": math.pi if "-01" in name else 0, "location": "Tower Top"})
-        elif "WEST-WING" in name:
-            if "ENTRANCE" in name:
-                camera.update({"x": -30, "y": 2, "z": -30, "angle": math.pi/2, "location": "West Wing Entrance"})
-            elif "CORRIDOR-01" in name:
-                camera.update({"x": -40, "y": 2, "z": -20, "angle": math.pi/2, "location": "West Corridor 1"})
-            elif "CORRIDOR-02" in name:
-                camera.update({"x": -40, "y": 2, "z": 0, "angle": math.pi/2, "location": "West Corridor 2"})
-            elif "CORRIDOR-03" in name:
-                camera.update({"x": -40, "y": 2, "z": 20, "angle": math.pi/2, "location": "West Corridor 3"})
-            elif "ROOF" in name:
-                camera.update({"x": -35, "y": 15, "z": 0, "angle": math.pi/2, "location": "West Wing Roof"})
-            else:
-                camera.update({"x": -35, "y": 2, "z": 0, "angle": math.pi/2, "location": "West Wing"})
-        elif "EAST-WING" in name:
-            if "ENTRANCE" in name:
-                camera.update({"x": 30, "y": 2, "z": -30, "angle": -math.pi/2, "location": "East Wing Entrance"})
-            elif "CORRIDOR-01" in name:
-                camera.update({"x": 40, "y": 2, "z": -20, "angle": -math.pi/2, "location": "East Corridor 1"})
-            elif "CORRIDOR-02" in name:
-                camera.update({"x": 40, "y": 2, "z": 0, "angle": -math.pi/2, "location": "East Corridor 2"})
-            elif "CORRIDOR-03" in name:
-                camera.update({"x": 40, "y": 2, "z": 20, "angle": -math.pi/2, "location": "East Corridor 3"})
-            elif "ROOF" in name:
-                camera.update({"x": 35, "y": 15, "z": 0, "angle": -math.pi/2, "location": "East Wing Roof"})
-            else:
-                camera.update({"x": 35, "y": 2, "z": 0, "angle": -math.pi/2, "location": "East Wing"})
-        elif "LIBRARY" in name:
-            camera.update({"x": random.uniform(-30, -25), "y": 2, "z": random.uniform(-40, -35), "angle": math.pi/4, "location": "Library"})
-        elif "AUDITORIUM" in name:
-            camera.update({"x": random.uniform(20, 30), "y": 2 if "MAIN" in name else 8, "z": -35, "angle": -math.pi/4, "location": "Auditorium"})
-        elif "CAFETERIA" in name:
-            camera.update({"x": random.uniform(-25, -15), "y": 2, "z": random.uniform(35, 40), "angle": math.pi/2, "location": "Cafeteria"})
-        elif "STUDENT-CENTER" in name:
-            camera.update({"x": 20, "y": 2, "z": 35, "angle": -math.pi/2, "location": "Student Center"})
-        elif "RECREATION" in name:
-            camera.update({"x": 25, "y": 2, "z": 40, "angle": -math.pi/4, "location": "Recreation Area"})
-        elif "LAB" in name:
-            if "-A" in name:
-                camera.update({"x": -50, "y": 2, "z": -10, "angle": math.pi/2, "location": "Laboratory A"})
-            elif "-B" in name:
-                camera.update({"x": -50, "y": 2, "z": 10, "angle": math.pi/2, "location": "Laboratory B"})
-            else:
-                camera.update({"x": -45, "y": 2, "z": 0, "angle": math.pi/2, "location": "Lab Corridor"})
-        elif "ADMIN" in name:
-            camera.update({"x": random.uniform(-15, -5), "y": 2, "z": random.uniform(-42, -38), "angle": math.pi/4, "location": "Administration"})
-        elif "RECTOR" in name:
-            camera.update({"x": 0, "y": 50, "z": 0, "angle": 0, "location": "Rector's Office"})
-        elif "NORTH-GATE" in name:
-            camera.update({"x": 0, "y": 2, "z": -55, "angle": math.pi, "location": "North Gate"})
-        elif "SOUTH-GATE" in name:
-            camera.update({"x": 0, "y": 2, "z": 55, "angle": 0, "location": "South Gate"})
-        elif "WEST-GATE" in name:
-            camera.update({"x": -55, "y": 2, "z": 0, "angle": math.pi/2, "location": "West Gate"})
-        elif "EAST-GATE" in name:
-            camera.update({"x": 55, "y": 2, "z": 0, "angle": -math.pi/2, "location": "East Gate"})
-        elif "PARKING-NORTH" in name:
-            camera.update({"x": -35 if "-01" in name else 35, "y": 5, "z": -60, "angle": math.pi/4 if "-01" in name else -math.pi/4, "location": "North Parking"})
-        elif "PARKING-SOUTH" in name:
-            camera.update({"x": -35 if "-01" in name else 35, "y": 5, "z": 60, "angle": math.pi*0.75 if "-01" in name else -math.pi*0.75, "location": "South Parking"})
-        elif "PLAZA" in name:
-            camera.update({"x": 0, "y": 2, "z": -50, "angle": math.pi, "location": "Central Plaza"})
-        elif "GARDEN" in name:
-            camera.update({"x": -30 if "WEST" in name else 30, "y": 2, "z": -20, "angle": math.pi/2 if "WEST" in name else -math.pi/2, "location": "Garden"})
-        elif "EMERGENCY-WEST" in name:
-            camera.update({"x": -48, "y": 2, "z": -30 if "-01" in name else 30, "angle": math.pi/2, "location": "West Emergency Exit"})
-        elif "EMERGENCY-EAST" in name:
-            camera.update({"x": 48, "y": 2, "z": -30 if "-01" in name else 30, "angle": -math.pi/2, "location": "East Emergency Exit"})
-        else:
-            camera.update({"x": random.uniform(-50, 50), "y": 2, "z": random.uniform(-50, 50), "angle": random.uniform(0, 2*math.pi), "location": "Other"})
-    
+        camera.update(generate_high_school_position(name))
+    elif name.startswith("CAM-MSU-"):
+        camera.update(generate_moscow_university_position(name))
     return camera
 
 # Set random seed for reproducibility
@@ -0,0 +1,453 @@
+"""
+Asyncio front end for the mock server.
+
+Connections are handled by a single event loop instead of a thread each,
+so tens of thousands of idle keep-alive or long-polling clients cost a
+coroutine and a socket apiece. Every /Interface/* route is the Flask view
+from app.py, run on a small thread pool only while a request is actually
+being processed, so both front ends share one data layer and return the
+same bytes. Routes that wait for something are native coroutines in
+ASYNC_ROUTES and hold no thread while they wait.
+
+Usage:
+    python async_server.py --port 8089 --threads 16 --keep-alive 75
+    python serve.py --server asyncio
+
+Native routes:
+    /Interface/Catalog/WaitForChange?Catalog=cameras&Version=N&Timeout=30
+        Long-poll. Answers as soon as the catalog (cameras, groups,
+        counters or analytics) moves past Version, or after Timeout
+        seconds, with {"Catalog", "Version", "Changed"}. Without Version
+        it waits for the next change.
+    /Interface/Analytics/Stream
+        The live event feed as Server-Sent Events (see live_events.py),
+        without tying up a thread per subscriber.
+
+Each open connection needs a file descriptor; raise `ulimit -n` before
+testing with very many clients. Request bodies are limited to
+MOCK_MAX_BODY_BYTES (default 32 MiB, enough for the largest batch
+request); larger ones get a 413 and are not read.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote_to_bytes
+
+from app import app, catalog_cache, event_hub, live_producer
+from live_events import KEEPALIVE_SECONDS, Subscription, parse_subscription, sse_frames
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = int(os.environ.get("MOCK_MAX_BODY_BYTES", 32 * 1024 * 1024))
+STREAM_CHUNK_BYTES = 64 * 1024
+CATALOGS = ("cameras", "groups", "counters", "analytics")
+MAX_WAIT_SECONDS = 300
+
+
+class BadRequest(Exception):
+    """A request that gets an error response and closes its connection"""
+    status = 400
+
+
+class PayloadTooLarge(BadRequest):
+    status = 413
+
+
+class ExpectationFailed(BadRequest):
+    status = 417
+
+
+class HttpRequest:
+    """One parsed HTTP/1.x request"""
+
+    __slots__ = ("method", "path", "query", "version", "headers", "body")
+
+    def __init__(self, method, path, query, version, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.version = version
+        self.headers = headers  # lower-cased name -> value
+        self.body = body
+
+    @property
+    def args(self):
+        """Query arguments, first value of each"""
+        return {name: values[0] for name, values in parse_qs(self.query, keep_blank_values=True).items()}
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+async def read_request(reader, writer):
+    """Read the next request from a connection, or None once the client hangs up"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise BadRequest("incomplete request")
+        return None
+    except asyncio.LimitOverrunError:
+        raise BadRequest("request headers too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise BadRequest("malformed request line")
+    if version not in ("HTTP/1.0", "HTTP/1.1"):
+        raise BadRequest("unsupported HTTP version")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, colon, value = line.partition(":")
+            name = name.strip().lower()
+            if not colon or not name:
+                raise BadRequest("malformed header line")
+            headers[name] = f"{headers[name]}, {value.strip()}" if name in headers else value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise BadRequest("chunked request bodies are not supported")
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise BadRequest("invalid Content-Length")
+    if length < 0:
+        raise BadRequest("invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise PayloadTooLarge(f"request body over {MAX_BODY_BYTES} bytes")
+    expect = headers.get("expect", "").lower()
+    if expect and expect != "100-continue":
+        raise ExpectationFailed("only Expect: 100-continue is supported")
+    if length > 0 and expect and version == "HTTP/1.1":
+        writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        await writer.drain()
+    try:
+        body = await reader.readexactly(length) if length > 0 else b""
+    except asyncio.IncompleteReadError:
+        raise BadRequest("incomplete request body")
+    path, _, query = target.partition("?")
+    return HttpRequest(method, path, query, version, headers, body)
+
+
+def response_head(version, status, headers):
+    lines = [f"{version} {status}"]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def json_body(payload):
+    """Bytes jsonify would produce for `payload`"""
+    return app.json.encode(payload) + b"\n"
+
+
+def json_response(payload, status=200):
+    return status, [("Content-Type", app.json.mimetype)], json_body(payload)
+
+
+# WSGI bridge -----------------------------------------------------------------
+
+def wsgi_environ(request, server_address, peer):
+    environ = {
+        "REQUEST_METHOD": request.method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": unquote_to_bytes(request.path).decode("latin-1"),
+        "QUERY_STRING": request.query,
+        "SERVER_NAME": str(server_address[0]),
+        "SERVER_PORT": str(server_address[1]),
+        "SERVER_PROTOCOL": request.version,
+        "REMOTE_ADDR": peer[0] if peer else "",
+        "CONTENT_TYPE": request.headers.get("content-type", ""),
+        "CONTENT_LENGTH": str(len(request.body)) if request.body else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(request.body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in request.headers.items():
+        if name not in ("content-type", "content-length"):
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+    return environ
+
+
+def gather(iterator):
+    """Pull up to STREAM_CHUNK_BYTES from a WSGI body; returns (bytes, exhausted)"""
+    parts = []
+    size = 0
+    for part in iterator:
+        if isinstance(part, str):
+            part = part.encode()
+        parts.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_BYTES:
+            return b"".join(parts), False
+    return b"".join(parts), True
+
+
+def call_wsgi(environ):
+    """Run the Flask app up to its first body chunk (on a worker thread)"""
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [status, headers]
+        return lambda data: None
+
+    result = app(environ, start_response)
+    iterator = iter(result)
+    first, exhausted = gather(iterator)
+    return started[0], started[1], result, iterator, first, exhausted
+
+
+def close_result(result):
+    if hasattr(result, "close"):
+        result.close()
+
+
+# Native routes ---------------------------------------------------------------
+
+class ChangeFeed:
+    """Wakes long-polling coroutines when a catalog version is bumped"""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._events = {}  # catalog -> asyncio.Event for the next bump
+        catalog_cache.add_listener(self._bumped)
+
+    def _bumped(self, catalog, version):
+        # Called on whichever thread handled the mutating request
+        self._loop.call_soon_threadsafe(self._wake, catalog)
+
+    def _wake(self, catalog):
+        event = self._events.pop(catalog, None)
+        if event is not None:
+            event.set()
+
+    async def wait(self, catalog, version, timeout):
+        """Wait until `catalog` is past `version`; returns the current version"""
+        deadline = self._loop.time() + timeout
+        while catalog_cache.version(catalog) <= version:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            event = self._events.setdefault(catalog, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return catalog_cache.version(catalog)
+
+
+async def wait_for_change(server, request):
+    args = request.args
+    catalog = args.get("Catalog", "cameras")
+    if catalog not in CATALOGS:
+        return json_response({"success": False, "error": f"Catalog must be one of {', '.join(CATALOGS)}"}, 400)
+    try:
+        version = int(args["Version"]) if args.get("Version") else catalog_cache.version(catalog)
+        timeout = min(float(args.get("Timeout") or 30), MAX_WAIT_SECONDS)
+    except ValueError:
+        return json_response({"success": False, "error": "Version and Timeout must be numbers"}, 400)
+    current = await server.changes.wait(catalog, version, max(timeout, 0))
+    return json_response({"Catalog": catalog, "Version": current, "Changed": current > version})
+
+
+async def stream_analytics(server, request):
+    try:
+        subscription_args = parse_subscription(request.args)
+    except ValueError as e:
+        return json_response({"success": False, "error": str(e)}, 400)
+    headers = [("Content-Type", "text/event-stream"), ("Cache-Control", "no-cache"), ("X-Accel-Buffering", "no")]
+    return 200, headers, iter_sse(server, subscription_args)
+
+
+async def iter_sse(server, subscription_args):
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    subscription = event_hub.subscribe(Subscription(notify=lambda: loop.call_soon_threadsafe(wakeup.set), **subscription_args))
+    dumps = app.json.dumps
+
+    def compact(payload):
+        return dumps(payload, separators=(",", ":"))
+
+    reported = 0
+    try:
+        yield b": connected\n\n"
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            wakeup.clear()
+            # Formatting a burst of events is CPU work; keep it off the event loop
+            text, reported = await loop.run_in_executor(
+                server.executor, sse_frames, subscription, subscription.drain(), compact, reported,
+            )
+            if text:
+                yield text.encode()
+            if subscription.closed:
+                return
+    finally:
+        event_hub.unsubscribe(subscription)
+
+
+ASYNC_ROUTES = {
+    "/Interface/Catalog/WaitForChange": wait_for_change,
+    "/Interface/Analytics/Stream": stream_analytics,
+}
+
+
+# Server ----------------------------------------------------------------------
+
+class AsyncServer:
+    def __init__(self, host="0.0.0.0", port=8089, threads=16, keep_alive=75):
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="mock-wsgi")
+        self.changes = None
+        self.server = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.changes = ChangeFeed(loop)
+        live_producer.ensure_running()
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES, backlog=4096, reuse_address=True,
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader, writer), self.keep_alive)
+                except asyncio.TimeoutError:
+                    break
+                except BadRequest as e:
+                    await self.send(writer, "HTTP/1.1", False, *json_response({"success": False, "error": str(e)}, e.status))
+                    break
+                if request is None:
+                    break
+                handler = ASYNC_ROUTES.get(request.path)
+                if handler is not None and request.method in ("GET", "POST"):
+                    status, headers, body = await handler(self, request)
+                    await self.send(writer, request.version, request.keep_alive, status, headers, body)
+                    keep_alive = request.keep_alive
+                else:
+                    keep_alive = await self.send_wsgi(writer, request, peer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # Don't leave the error to the event loop's "Task exception was never retrieved"
+            print(f"[MOCK SERVER] Connection from {peer} failed: {e!r}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def send(self, writer, version, keep_alive, status, headers, body):
+        """Write a native response; `body` is bytes or an async iterator of bytes"""
+        headers = list(headers) + [("Access-Control-Allow-Origin", "*")]
+        headers.append(("Connection", "keep-alive" if keep_alive else "close"))
+        status_line = f"{status} {HTTPStatus(status).phrase}"
+        if isinstance(body, bytes):
+            writer.write(response_head(version, status_line, headers + [("Content-Length", str(len(body)))]) + body)
+            await writer.drain()
+            return
+        writer.write(response_head(version, status_line, headers + [("Transfer-Encoding", "chunked")]))
+        try:
+            async for chunk in body:
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            await body.aclose()
+
+    async def send_wsgi(self, writer, request, peer):
+        """Serve a request with the Flask app; returns whether the connection stays open"""
+        loop = asyncio.get_running_loop()
+        environ = wsgi_environ(request, (self.host, self.port), peer)
+        status, headers, result, iterator, first, exhausted = await loop.run_in_executor(self.executor, call_wsgi, environ)
+        try:
+            code = int(status.split(" ", 1)[0])
+            names = {name.lower() for name, _ in headers}
+            headers = list(headers)
+            bodiless = request.method == "HEAD" or code in (204, 304) or code < 200
+            chunked = False
+            if not bodiless and "content-length" not in names:
+                if exhausted:
+                    headers.append(("Content-Length", str(len(first))))
+                else:
+                    chunked = request.version != "HTTP/1.0"
+                    if chunked:
+                        headers.append(("Transfer-Encoding", "chunked"))
+            keep_alive = request.keep_alive and (bodiless or chunked or "content-length" in names or exhausted)
+            headers.append(("Connection", "keep-alive" if keep_alive else "close"))
+            writer.write(response_head(request.version, status, headers))
+            if bodiless:
+                await writer.drain()
+                return keep_alive
+            while True:
+                if first:
+                    writer.write(b"%x\r\n%s\r\n" % (len(first), first) if chunked else first)
+                    await writer.drain()
+                if exhausted:
+                    break
+                first, exhausted = await loop.run_in_executor(self.executor, gather, iterator)
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            return keep_alive
+        finally:
+            await loop.run_in_executor(self.executor, close_result, result)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Digifort mock API from an asyncio event loop")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8089)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("MOCK_THREADS", 16)),
+                        help="threads running the Flask views")
+    parser.add_argument("--keep-alive", type=int, default=int(os.environ.get("MOCK_KEEP_ALIVE", 75)),
+                        help="seconds to hold idle keep-alive connections open")
+    return parser.parse_args(argv)
+
+
+async def run(host, port, threads, keep_alive):
+    server = await AsyncServer(host, port, threads, keep_alive).start()
+    print(f"[MOCK SERVER] asyncio server listening on {host}:{server.port}")
+    await server.serve_forever()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(run(args.host, args.port, args.threads, args.keep_alive))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Camera lookup indexes for the mock server.
+
+Keeps a name -> camera index plus group -> cameras and status -> cameras
+secondary indexes over the camera catalog, so GetStatus and Activation are
+O(1) per camera instead of scanning the whole list. It also keeps running
+active/status counts for Dashboard Stats. All status changes go through
+set_activation() so the indexes and counters never drift from the camera
+dicts; recount() rebuilds the counters from scratch for self-checks.
+
+Writers serialize on a lock. Readers take no lock: a status change swaps
+in an updated copy of the camera dict (never a half-updated one), and the
+counters are published as one immutable (active, statuses) pair.
+"""
+
+import threading
+
+
+class CameraIndex:
+    """Indexes over a list of camera dicts (the list itself stays authoritative)"""
+
+    def __init__(self, cameras):
+        self.cameras = cameras
+        self._lock = threading.Lock()
+        self._by_name = {}    # name -> [position, ...] (names can repeat in the catalog)
+        self._by_group = {}   # group -> [position, ...]
+        self._by_status = {}  # status -> {position: None}, an insertion-ordered set
+        self._counts = (0, {})  # (active cameras, {status: cameras}), replaced on every change
+        for position, camera in enumerate(cameras):
+            self._index(position, camera)
+        self._count([(None, camera) for camera in cameras])
+
+    def __len__(self):
+        return len(self.cameras)
+
+    def _index(self, position, camera):
+        self._by_name.setdefault(camera["name"], []).append(position)
+        self._by_group.setdefault(camera.get("group"), []).append(position)
+        self._by_status.setdefault(camera.get("status"), {})[position] = None
+
+    def _count(self, changes):
+        """Publish counters updated for each (old, new) camera replacement (old None: added)"""
+        active, statuses = self._counts
+        statuses = dict(statuses)
+        for old, new in changes:
+            if old is not None:
+                active -= bool(old.get("active"))
+                statuses[old.get("status")] -= 1
+            active += bool(new.get("active"))
+            statuses[new.get("status")] = statuses.get(new.get("status"), 0) + 1
+        self._counts = (active, statuses)
+
+    def add(self, camera):
+        """Append a camera to the catalog and index it"""
+        with self._lock:
+            self.cameras.append(camera)
+            self._index(len(self.cameras) - 1, camera)
+            self._count([(None, camera)])
+
+    def get(self, name):
+        """First camera with this name, or None"""
+        positions = self._by_name.get(name)
+        return self.cameras[positions[0]] if positions else None
+
+    def positions(self, names):
+        """Catalog positions of all cameras matching any of `names`, in order"""
+        positions = []
+        for name in set(names):
+            positions.extend(self._by_name.get(name, ()))
+        positions.sort()
+        return positions
+
+    def lookup(self, names):
+        """All cameras matching any of `names`, in catalog order"""
+        return [self.cameras[p] for p in self.positions(names)]
+
+    def in_group(self, group):
+        return [self.cameras[p] for p in list(self._by_group.get(group, ()))]
+
+    def with_status(self, status):
+        return [self.cameras[p] for p in list(self._by_status.get(status, ()))]
+
+    def groups(self):
+        return list(self._by_group)
+
+    @property
+    def active_count(self):
+        return self._counts[0]
+
+    def status_count(self, status):
+        return self._counts[1].get(status, 0)
+
+    def counts(self):
+        """Active and per-status counts from the running counters, as one snapshot"""
+        active, statuses = self._counts
+        return active, dict(statuses)
+
+    def recount(self):
+        """Active and per-status counts from a full scan of the catalog"""
+        statuses = {}
+        for camera in self.cameras:
+            statuses[camera.get("status")] = statuses.get(camera.get("status"), 0) + 1
+        return sum(1 for c in self.cameras if c.get("active")), statuses
+
+    def set_activation(self, name, active):
+        """Activate or deactivate the first camera named `name`.
+
+        Returns the updated camera, or None if there is no such camera.
+        """
+        return self.set_activation_many([name], active)[0]
+
+    def set_activation_many(self, names, active):
+        """set_activation() for several cameras under one lock acquisition.
+
+        The counters are published once, after every change, so readers see
+        either none or all of the batch in them. Returns the updated camera
+        or None for each name, in order.
+        """
+        positions = [self._by_name.get(name, (None,))[0] for name in names]
+        results = []
+        changes = []
+        with self._lock:
+            for position in positions:
+                if position is None:
+                    results.append(None)
+                    continue
+                old = self.cameras[position]
+                camera = {**old, "active": active, "status": "online" if active else "offline", "working": active}
+                self.cameras[position] = camera
+                self._by_status.get(old.get("status"), {}).pop(position, None)
+                self._by_status.setdefault(camera["status"], {})[position] = None
+                changes.append((old, camera))
+                results.append(camera)
+            self._count(changes)
+        return results
@@ -0,0 +1,159 @@
+"""
+3D camera positions (x, y, z, angle, location) for the Three.js views.
+
+A camera's position is a pure function of its name. The name is matched
+against an ordered table of compiled patterns (first match wins), and any
+randomized coordinate in the matching rule is drawn from a local RNG seeded
+from the name (random.Random hashes str seeds with SHA-512), so positions
+are stable across runs and processes without touching the global `random`
+state that event generation uses. Results are memoized per name.
+
+Rule values:
+    number        - used as-is
+    (low, high)   - uniform draw
+    [a, b, ...]   - random choice
+Location strings may use {tail} (last two characters of the name) and
+{last} (last dash-separated part). Coordinates are drawn in x, y, z, angle
+order.
+"""
+
+import functools
+import math
+import random
+import re
+
+PI = math.pi
+
+
+def _all(*parts):
+    """Pattern matching names that contain every one of `parts`"""
+    return "".join(f"(?=.*{re.escape(part)})" for part in parts)
+
+
+def _table(rules):
+    return [(re.compile(pattern), values) for pattern, values in rules]
+
+
+def _is_random(value):
+    return isinstance(value, (tuple, list))
+
+
+def _rule(location, x, y, z, angle):
+    return (x, y, z, angle, location)
+
+
+HIGH_SCHOOL_RULES = _table([
+    (_all("ENTRANCE"), _rule("Main Entrance", (-5, 5), 3, (-40, -38), PI)),
+    (_all("HALLWAY-CENTRAL"), _rule("Central Hallway {tail}", 0, 3, (-20, 20), [0, PI])),
+    (_all("WEST-HALLWAY"), _rule("West Hallway {tail}", -20, 3, (-20, 20), PI / 2)),
+    (_all("EAST-HALLWAY"), _rule("East Hallway {tail}", 20, 3, (-20, 20), -PI / 2)),
+    (_all("CLASSROOM", "-A"), _rule("{last}", (-20, -10), 3, (-30, -10), (0, 2 * PI))),
+    (_all("CLASSROOM"), _rule("{last}", (10, 20), 3, (-30, -10), (0, 2 * PI))),
+    (_all("CAFETERIA"), _rule("Cafeteria", (-15, 15), 3, (25, 35), [0, PI / 2, -PI / 2])),
+    (_all("LIBRARY"), _rule("Library", (-30, -20), 3, (-10, 0), PI / 2)),
+    (_all("GYM"), _rule("Gymnasium", (20, 30), 3, (5, 20), -PI / 2)),
+    (_all("STAIR", "WEST"), _rule("Stairwell", -25, 3, -30, PI / 4)),
+    (_all("STAIR"), _rule("Stairwell", 25, 3, -30, -PI / 4)),
+    (_all("EXIT", "WEST"), _rule("Emergency Exit", -35, 3, 0, PI / 2)),
+    (_all("EXIT", "EAST"), _rule("Emergency Exit", 35, 3, 0, -PI / 2)),
+    (_all("EXIT"), _rule("Emergency Exit", 0, 3, 40, 0)),
+    (_all("PARKING"), _rule("Parking Lot", -40, 5, (-30, 30), PI / 4)),
+    (_all("PLAYGROUND"), _rule("Playground", 40, 5, 30, -PI / 4)),
+    (_all("OFFICE"), _rule("Office", (-10, -5), 3, -35, PI / 4)),
+    ("", _rule("Other", (-30, 30), 3, (-30, 30), (0, 2 * PI))),
+])
+
+MOSCOW_UNIVERSITY_RULES = _table([
+    (_all("MAIN-ENTRANCE", "-01"), _rule("Main Entrance", 0, 2, -45, PI)),
+    (_all("MAIN-ENTRANCE", "-02"), _rule("Main Entrance", -15, 2, -45, PI)),
+    (_all("MAIN-ENTRANCE"), _rule("Main Entrance", 15, 2, -45, PI)),
+    (_all("TOWER-BASE", "-01"), _rule("Tower Base", 0, 5, 0, 0)),
+    (_all("TOWER-BASE"), _rule("Tower Base", 0, 5, 10, PI)),
+    (_all("TOWER-MID", "-01"), _rule("Tower Mid-Level", -3, 30, 0, PI / 2)),
+    (_all("TOWER-MID"), _rule("Tower Mid-Level", 3, 30, 0, -PI / 2)),
+    (_all("TOWER-TOP", "-01"), _rule("Tower Top", 0, 60, -2, PI)),
+    (_all("TOWER-TOP"), _rule("Tower Top", 0, 60, 2, 0)),
+    (_all("WEST-WING", "ENTRANCE"), _rule("West Wing", -30, 2, -30, PI / 2)),
+    (_all("WEST-WING", "CORRIDOR-01"), _rule("West Wing", -40, 2, -20, PI / 2)),
+    (_all("WEST-WING", "CORRIDOR-02"), _rule("West Wing", -40, 2, 0, PI / 2)),
+    (_all("WEST-WING", "CORRIDOR-03"), _rule("West Wing", -40, 2, 20, PI / 2)),
+    (_all("WEST-WING", "ROOF"), _rule("West Wing", -35, 15, 0, PI / 2)),
+    (_all("WEST-WING"), _rule("West Wing", -35, 2, 0, PI / 2)),
+    (_all("EAST-WING", "ENTRANCE"), _rule("East Wing", 30, 2, -30, -PI / 2)),
+    (_all("EAST-WING", "CORRIDOR-01"), _rule("East Wing", 40, 2, -20, -PI / 2)),
+    (_all("EAST-WING", "CORRIDOR-02"), _rule("East Wing", 40, 2, 0, -PI / 2)),
+    (_all("EAST-WING", "CORRIDOR-03"), _rule("East Wing", 40, 2, 20, -PI / 2)),
+    (_all("EAST-WING", "ROOF"), _rule("East Wing", 35, 15, 0, -PI / 2)),
+    (_all("EAST-WING"), _rule("East Wing", 35, 2, 0, -PI / 2)),
+    (_all("LIBRARY"), _rule("Library", (-30, -25), 2, (-40, -35), PI / 4)),
+    (_all("AUDITORIUM", "MAIN"), _rule("Auditorium", (20, 30), 2, -35, -PI / 4)),
+    (_all("AUDITORIUM"), _rule("Auditorium", (20, 30), 8, -35, -PI / 4)),
+    (_all("CAFETERIA"), _rule("Cafeteria", (-25, -15), 2, (35, 40), PI / 2)),
+    (_all("STUDENT-CENTER"), _rule("Student Center", 20, 2, 35, -PI / 2)),
+    (_all("RECREATION"), _rule("Recreation Area", 25, 2, 40, -PI / 4)),
+    (_all("LAB", "-A"), _rule("Laboratory", -50, 2, -10, PI / 2)),
+    (_all("LAB", "-B"), _rule("Laboratory", -50, 2, 10, PI / 2)),
+    (_all("LAB"), _rule("Laboratory", -45, 2, 0, PI / 2)),
+    (_all("ADMIN"), _rule("Administration", (-15, -5), 2, (-42, -38), PI / 4)),
+    (_all("RECTOR"), _rule("Rector's Office", 0, 50, 0, 0)),
+    (_all("NORTH-GATE"), _rule("North Gate", 0, 2, -55, PI)),
+    (_all("SOUTH-GATE"), _rule("South Gate", 0, 2, 55, 0)),
+    (_all("WEST-GATE"), _rule("West Gate", -55, 2, 0, PI / 2)),
+    (_all("EAST-GATE"), _rule("East Gate", 55, 2, 0, -PI / 2)),
+    (_all("PARKING-NORTH", "-01"), _rule("North Parking", -35, 5, -60, PI / 4)),
+    (_all("PARKING-NORTH"), _rule("North Parking", 35, 5, -60, -PI / 4)),
+    (_all("PARKING-SOUTH", "-01"), _rule("South Parking", -35, 5, 60, PI * 0.75)),
+    (_all("PARKING-SOUTH"), _rule("South Parking", 35, 5, 60, -PI * 0.75)),
+    (_all("PLAZA"), _rule("Central Plaza", 0, 2, -50, PI)),
+    (_all("GARDEN", "WEST"), _rule("Garden", -30, 2, -20, PI / 2)),
+    (_all("GARDEN"), _rule("Garden", 30, 2, -20, -PI / 2)),
+    (_all("EMERGENCY-WEST", "-01"), _rule("West Emergency Exit", -48, 2, -30, PI / 2)),
+    (_all("EMERGENCY-WEST"), _rule("West Emergency Exit", -48, 2, 30, PI / 2)),
+    (_all("EMERGENCY-EAST", "-01"), _rule("East Emergency Exit", 48, 2, -30, -PI / 2)),
+    (_all("EMERGENCY-EAST"), _rule("East Emergency Exit", 48, 2, 30, -PI / 2)),
+    ("", _rule("Other", (-50, 50), 2, (-50, 50), (0, 2 * PI))),
+])
+
+
+def _draw(value, rng):
+    if isinstance(value, tuple):
+        return rng.uniform(*value)
+    if isinstance(value, list):
+        return rng.choice(value)
+    return value
+
+
+def resolve_position(rules, camera_name):
+    """Position dict for `camera_name` from the first matching rule"""
+    for pattern, (x, y, z, angle, location) in rules:
+        if pattern.match(camera_name):
+            coords = (x, y, z, angle)
+            # Seeding from a str hashes it, so only pay for it when needed
+            if any(_is_random(value) for value in coords):
+                rng = random.Random(camera_name)
+                x, y, z, angle = (_draw(value, rng) for value in coords)
+            location = location.format(tail=camera_name[-2:], last=camera_name.split("-")[-1])
+            return {"x": x, "y": y, "z": z, "angle": angle, "location": location}
+    raise ValueError(f"no position rule matches {camera_name!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def _cached(rules_name, camera_name):
+    position = resolve_position(RULE_TABLES[rules_name], camera_name)
+    return tuple(position.items())
+
+
+RULE_TABLES = {
+    "high_school": HIGH_SCHOOL_RULES,
+    "moscow_university": MOSCOW_UNIVERSITY_RULES,
+}
+
+
+def generate_high_school_position(camera_name):
+    """3D position for a high school camera, based on its location in the name"""
+    return dict(_cached("high_school", camera_name))
+
+
+def generate_moscow_university_position(camera_name):
+    """3D position for a Moscow State University camera"""
+    return dict(_cached("moscow_university", camera_name))
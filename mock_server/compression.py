@@ -0,0 +1,144 @@
+"""
+Content-Encoding negotiation for the mock server's responses.
+
+Catalog and event-search JSON is highly repetitive and compresses several
+times over, which matters to bandwidth-limited remote sites. Compressor
+compresses any response at least MIN_SIZE bytes long with the best coding
+the client's Accept-Encoding allows: br (when the brotli package is
+installed), then gzip, then deflate. It skips responses that are already
+encoded, error and bodiless responses, and Server-Sent Events, which must
+reach the client frame by frame.
+
+Streamed bodies (paged lists, event search) are compressed as they are
+produced, so they stay streamed. The first chunks are held back only
+until MIN_SIZE bytes have been seen: shorter bodies go out as they are.
+
+Catalog responses are compressed by CatalogCache instead (see
+response_cache.py), once per catalog version and coding at a higher level,
+so a client polling GetCameras does not pay for compression again.
+
+brotli (or brotlicffi) is optional: pip install -r requirements-optional.txt,
+or the "brotli" extra. MOCK_COMPRESS_MIN_BYTES sets MIN_SIZE; 0 turns
+compression off.
+"""
+
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+MIN_SIZE = int(os.environ.get("MOCK_COMPRESS_MIN_BYTES", 1024))
+CODINGS = (("br",) if brotli is not None else ()) + ("gzip", "deflate")  # in order of preference
+STREAM_LEVEL = {"br": 4, "gzip": 6, "deflate": 6}  # per request: fast
+CACHED_LEVEL = {"br": 9, "gzip": 9, "deflate": 9}  # paid once per catalog version
+SKIPPED_MIMETYPES = ("text/event-stream",)
+
+
+def negotiate():
+    """Best coding the current request accepts, or None for identity"""
+    if MIN_SIZE <= 0:
+        return None
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for coding in CODINGS:
+        quality = accepted[coding]
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class StreamCompressor:
+    """Incremental compressor for one coding"""
+
+    def __init__(self, coding, level):
+        if coding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+            self.process, self._finish = self._compressor.process, self._compressor.finish
+        else:
+            # wbits 31 writes a gzip wrapper; 15 the zlib wrapper HTTP's "deflate" means
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31 if coding == "gzip" else 15)
+            self.process, self._finish = self._compressor.compress, self._compressor.flush
+
+    def finish(self):
+        return self._finish()
+
+
+def compress(data, coding, level=None):
+    """`data` compressed with `coding` in one go"""
+    compressor = StreamCompressor(coding, CACHED_LEVEL[coding] if level is None else level)
+    return compressor.process(data) + compressor.finish()
+
+
+def add_vary(response):
+    vary = response.headers.get("Vary")
+    if not vary:
+        response.headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        response.headers["Vary"] = vary + ", Accept-Encoding"
+
+
+class Compressor:
+    """after_request hook that compresses responses for one Flask app"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        if (request.method == "HEAD" or response.status_code != 200
+                or "Content-Encoding" in response.headers or response.mimetype in SKIPPED_MIMETYPES):
+            return response
+        coding = negotiate()
+        if coding is None:
+            # Responses that could have been compressed vary with Accept-Encoding all the same
+            if MIN_SIZE > 0:
+                add_vary(response)
+            return response
+        add_vary(response)
+
+        if not response.is_streamed:
+            data = response.get_data()
+            if len(data) >= MIN_SIZE:
+                response.set_data(compress(data, coding, STREAM_LEVEL[coding]))
+                response.headers["Content-Encoding"] = coding
+            return response
+
+        # Hold back the first chunks until the body is known to be worth compressing
+        chunks = iter(response.response)
+        head, size = [], 0
+        for chunk in chunks:
+            chunk = chunk.encode() if isinstance(chunk, str) else chunk
+            head.append(chunk)
+            size += len(chunk)
+            if size >= MIN_SIZE:
+                break
+        else:
+            response.set_data(b"".join(head))
+            return response
+        response.response = self._stream(head, chunks, StreamCompressor(coding, STREAM_LEVEL[coding]))
+        response.headers["Content-Encoding"] = coding
+        response.headers.pop("Content-Length", None)
+        return response
+
+    @staticmethod
+    def _stream(head, chunks, compressor):
+        for chunk in head:
+            out = compressor.process(chunk)
+            if out:
+                yield out
+        for chunk in chunks:
+            out = compressor.process(chunk.encode() if isinstance(chunk, str) else chunk)
+            if out:
+                yield out
+        yield compressor.finish()
@@ -0,0 +1,265 @@
+"""
+Bulk synthetic event generator for the mock server.
+
+Events are produced as NumPy column chunks instead of one dict at a time.
+Timestamps come out already in ascending order (uniform order statistics
+drawn from exponential spacings), so neither a chunk nor the whole stream
+ever needs sorting, and arbitrarily long histories can be streamed in
+bounded memory.
+
+Run as a script to stream events as JSON lines for offline tools:
+
+    python mock_server/event_generator.py --count 10000000 > events.jsonl
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import json
+import sys
+
+import numpy as np
+
+EVENT_TYPES = ["MOTION", "INTRUSION", "FACE_DETECTION", "VEHICLE_DETECTION", "TAMPERING", "LOITERING", "LINE_CROSSING", "ENTER", "EXIT"]
+ZONES = ["Zone A", "Zone B", "Zone C", "Perimeter", None]
+OBJECT_CLASSES = ["person", "vehicle", "unknown"]
+RULE_NAMES = ["Motion Rule 1", "Intrusion Alert", "Perimeter Watch", None]
+
+DEFAULT_CHUNK_SIZE = 65536
+
+COLUMN_NAMES = ("timestamp", "camera", "event_type", "object_class", "zone", "rule_name",
+                "confidence", "record_code", "ids")
+# JSON event field -> the categorical column holding it
+CATEGORICAL_FIELDS = {"camera": "camera", "zone": "zone", "eventType": "event_type",
+                      "objectClass": "object_class", "ruleName": "rule_name"}
+EVENT_FIELDS = ("id", "recordCode", "camera", "zone", "eventType", "objectClass", "ruleName",
+                "timestamp", "confidence")
+
+
+class EventChunk:
+    """A batch of events stored column-wise.
+
+    Categorical columns hold small integer codes into the per-column lists
+    in `vocab`; timestamps are int64 epoch microseconds and ids are rows of
+    16 raw UUID bytes.
+    """
+
+    __slots__ = ("timestamp", "camera", "event_type", "object_class", "zone", "rule_name",
+                 "confidence", "record_code", "ids", "vocab")
+
+    def __init__(self, timestamp, camera, event_type, object_class, zone, rule_name,
+                 confidence, record_code, ids, vocab):
+        self.timestamp = timestamp
+        self.camera = camera
+        self.event_type = event_type
+        self.object_class = object_class
+        self.zone = zone
+        self.rule_name = rule_name
+        self.confidence = confidence
+        self.record_code = record_code
+        self.ids = ids
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def take(self, index):
+        """A chunk of the rows selected by `index` (slice, row numbers or mask)"""
+        return EventChunk(vocab=self.vocab, **{name: getattr(self, name)[index] for name in COLUMN_NAMES})
+
+    def iter_dicts(self, fields=None):
+        """Materialize the chunk as event dicts, in row order.
+
+        With `fields` (a subset of EVENT_FIELDS) the dicts hold only those,
+        and only their columns are decoded.
+        """
+        if fields is not None:
+            columns = [self.field_values(field) for field in fields]
+            for values in zip(*columns):
+                yield dict(zip(fields, values))
+            return
+        vocab = self.vocab
+        cameras, zones, event_types = vocab["camera"], vocab["zone"], vocab["event_type"]
+        object_classes, rule_names = vocab["object_class"], vocab["rule_name"]
+        columns = zip(
+            iter_uuids(self.ids),
+            self.record_code.tolist(),
+            self.camera.tolist(),
+            self.zone.tolist(),
+            self.event_type.tolist(),
+            self.object_class.tolist(),
+            self.rule_name.tolist(),
+            format_timestamps(self.timestamp),
+            self.confidence.tolist(),
+        )
+        for event_id, record_code, camera, zone, event_type, object_class, rule_name, timestamp, confidence in columns:
+            yield {
+                "id": event_id,
+                "recordCode": f"REC{record_code}",
+                "camera": cameras[camera],
+                "zone": zones[zone],
+                "eventType": event_types[event_type],
+                "objectClass": object_classes[object_class],
+                "ruleName": rule_names[rule_name],
+                "timestamp": timestamp,
+                "confidence": round(confidence, 2),
+            }
+
+    def field_values(self, field):
+        """JSON-ready values of one of EVENT_FIELDS, in row order"""
+        if field == "id":
+            return list(iter_uuids(self.ids))
+        if field == "recordCode":
+            return [f"REC{code}" for code in self.record_code.tolist()]
+        if field == "timestamp":
+            return format_timestamps(self.timestamp)
+        if field == "confidence":
+            return [round(confidence, 2) for confidence in self.confidence.tolist()]
+        column = CATEGORICAL_FIELDS[field]
+        values = self.vocab[column]
+        return [values[code] for code in getattr(self, column).tolist()]
+
+
+def iter_uuids(ids):
+    """Format rows of 16 random bytes as UUID strings"""
+    raw = ids.tobytes().hex()
+    for o in range(0, len(raw), 32):
+        yield f"{raw[o:o + 8]}-{raw[o + 8:o + 12]}-{raw[o + 12:o + 16]}-{raw[o + 16:o + 20]}-{raw[o + 20:o + 32]}"
+
+
+def format_timestamp(micros):
+    """Format epoch microseconds the way the API reports event timestamps"""
+    seconds, micro = divmod(micros, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micro).isoformat()
+
+
+def format_timestamps(micros):
+    """Vectorized format_timestamp over an int64 array, returned as a list.
+
+    Local time is applied as a single UTC offset when both ends of the array
+    share it; a range spanning a DST change falls back to per-row formatting.
+    """
+    if len(micros) == 0:
+        return []
+    first, last = int(micros[0]), int(micros[-1])
+    offset = _utc_offset_micros(first)
+    if offset != _utc_offset_micros(last):
+        return [format_timestamp(m) for m in micros.tolist()]
+    text = np.datetime_as_string((micros + offset).astype("datetime64[us]"), unit="us")
+    whole = np.flatnonzero(micros % 1_000_000 == 0)
+    if len(whole):
+        # isoformat() drops the fraction entirely when it is zero
+        text = text.astype(object)
+        text[whole] = [t[:-7] for t in text[whole]]
+    return text.tolist()
+
+
+def _utc_offset_micros(micros):
+    moment = datetime.fromtimestamp(micros // 1_000_000).astimezone()
+    return int(moment.utcoffset().total_seconds()) * 1_000_000
+
+
+def _random_ids(rng, n):
+    """Random version-4 UUIDs as an (n, 16) uint8 array"""
+    ids = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    ids[:, 6] = (ids[:, 6] & 0x0F) | 0x40
+    ids[:, 8] = (ids[:, 8] & 0x3F) | 0x80
+    return ids
+
+
+def _sorted_uniform(rng, n, lo, hi):
+    """n sorted uniform int64 samples in [lo, hi] without sorting.
+
+    Normalised cumulative sums of n + 1 exponential spacings are distributed
+    as the order statistics of n uniform samples.
+    """
+    spacings = np.cumsum(rng.standard_exponential(n + 1))
+    return lo + ((hi - lo) * (spacings[:-1] / spacings[-1])).astype(np.int64)
+
+
+def generate_event_chunks(count, cameras, start=None, end=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=None):
+    """Yield EventChunks with `count` events spread over [start, end].
+
+    cameras is the list of camera names events are attributed to. The time
+    range defaults to the last 24 hours, like generate_events. The range is
+    cut into equal slices, one per chunk, and each slice's share of events
+    is drawn binomially, so chunks arrive in time order and hold roughly
+    chunk_size events each.
+    """
+    if not cameras:
+        raise ValueError("at least one camera is required")
+    now = datetime.now()
+    start = start or now - timedelta(minutes=1440)
+    end = end or now - timedelta(minutes=1)
+    lo = int(start.timestamp() * 1_000_000)
+    hi = int(end.timestamp() * 1_000_000)
+
+    rng = np.random.default_rng(seed)
+    vocab = event_vocabulary(cameras)
+    n_chunks = max(1, -(-count // chunk_size))
+    edges = np.linspace(lo, hi, n_chunks + 1).astype(np.int64)
+    remaining = count
+
+    for i in range(n_chunks):
+        n = remaining if i == n_chunks - 1 else int(rng.binomial(remaining, 1.0 / (n_chunks - i)))
+        remaining -= n
+        if n == 0:
+            continue
+        yield random_chunk(rng, n, int(edges[i]), int(edges[i + 1]), vocab)
+
+
+def event_vocabulary(cameras):
+    """Per-column value lists for chunks attributed to `cameras`.
+
+    Reuse one vocabulary for every chunk of a stream: EventStore caches its
+    code mapping per vocabulary list.
+    """
+    return {
+        "camera": list(cameras),
+        "event_type": EVENT_TYPES,
+        "object_class": OBJECT_CLASSES,
+        "zone": ZONES,
+        "rule_name": RULE_NAMES,
+    }
+
+
+def random_chunk(rng, n, lo, hi, vocab):
+    """One EventChunk of n random events with timestamps sorted in [lo, hi] (epoch µs)"""
+    return EventChunk(
+        timestamp=_sorted_uniform(rng, n, lo, hi),
+        camera=rng.integers(0, len(vocab["camera"]), size=n, dtype=np.int32),
+        event_type=rng.integers(0, len(EVENT_TYPES), size=n, dtype=np.uint8),
+        object_class=rng.integers(0, len(OBJECT_CLASSES), size=n, dtype=np.uint8),
+        zone=rng.integers(0, len(ZONES), size=n, dtype=np.uint8),
+        rule_name=rng.integers(0, len(RULE_NAMES), size=n, dtype=np.uint8),
+        confidence=np.round(rng.uniform(0.7, 0.99, size=n), 2).astype(np.float32),
+        record_code=rng.integers(10000, 100000, size=n, dtype=np.int32),
+        ids=_random_ids(rng, n),
+        vocab=vocab,
+    )
+
+
+def iter_events(count, cameras, start=None, end=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=None):
+    """Stream `count` event dicts, oldest first, in bounded memory"""
+    for chunk in generate_event_chunks(count, cameras, start, end, chunk_size, seed):
+        yield from chunk.iter_dicts()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream synthetic analytics events as JSON lines")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--cameras", type=int, default=100, help="number of synthetic camera names")
+    parser.add_argument("--hours", type=float, default=24.0, help="history length ending now")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    cameras = [f"CAM-{i + 1:05d}" for i in range(args.cameras)]
+    end = datetime.now()
+    start = end - timedelta(hours=args.hours)
+    write = sys.stdout.write
+    for chunk in generate_event_chunks(args.count, cameras, start, end, args.chunk_size, args.seed):
+        write("".join(json.dumps(event) + "\n" for event in chunk.iter_dicts()))
+
+
+if __name__ == "__main__":
+    main()
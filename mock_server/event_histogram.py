@@ -0,0 +1,168 @@
+"""
+Pre-aggregated event counts for the Analytics Chart endpoint.
+
+EventHistogram listens to the event store and keeps, per minute, running
+(cumulative) event counts by eventType and by camera group. Appends only
+ever land at the newest minutes, because the store is time ordered, so an
+append touches the tail rows alone. The number of events in any window of
+whole minutes is then the difference of two cumulative rows, and a chart
+of B buckets costs O(B x (types + groups)) however many events it covers.
+
+Minutes older than the retention window (MOCK_CHART_RETENTION_HOURS, a
+week by default) are dropped as new ones arrive; a chart bucket reaching
+further back only counts its retained minutes.
+
+The writer grows or trims the arrays by publishing a new state object and
+otherwise fills tail rows in place, so a reader racing an append may see
+part of that append's counts but never a torn array.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+MINUTE = 60_000_000  # microseconds
+UNGROUPED = "Ungrouped"
+
+
+class HistogramState:
+    """Cumulative counts for minutes base..filled; replaced when reshaped"""
+    __slots__ = ("base", "filled", "types", "groups", "floor_types", "floor_groups")
+
+    def __init__(self, base, filled, types, groups, floor_types, floor_groups):
+        self.base = base            # epoch minute of row 0
+        self.filled = filled        # newest epoch minute with valid rows
+        self.types = types          # [minute, eventType code] cumulative counts
+        self.groups = groups        # [minute, group code] cumulative counts
+        self.floor_types = floor_types    # counts before `base` (dropped minutes)
+        self.floor_groups = floor_groups
+
+
+class EventHistogram:
+    """Rolling per-minute event counts by eventType and camera group"""
+
+    def __init__(self, store, group_of, retention_minutes=7 * 24 * 60):
+        self.store = store
+        self.retention = retention_minutes
+        self._group_of = group_of  # camera name -> group name (or None)
+        self.group_names = []
+        self._group_codes = {}
+        self._camera_groups = np.empty(0, dtype=np.int32)  # store camera code -> group code
+        self._state = None
+        store.add_listener(self._ingest)
+
+    def _group_code(self, camera):
+        name = self._group_of(camera) or UNGROUPED
+        code = self._group_codes.get(name)
+        if code is None:
+            code = self._group_codes[name] = len(self.group_names)
+            self.group_names.append(name)
+        return code
+
+    def _ingest(self, first, stop):
+        """Store listener: count rows [first, stop) (called under the store's write lock)"""
+        minutes = self.store.column("timestamp", first, stop) // MINUTE
+        types = self.store.column("event_type", first, stop)
+        cameras = self.store.column("camera", first, stop)
+        camera_names = self.store.vocabulary("camera")
+        if len(self._camera_groups) < len(camera_names):
+            new = [self._group_code(name) for name in camera_names[len(self._camera_groups):]]
+            self._camera_groups = np.concatenate((self._camera_groups, np.array(new, dtype=np.int32)))
+        groups = self._camera_groups[cameras]
+
+        m0, m1 = int(minutes[0]), int(minutes[-1])
+        state = self._reshape(m0, m1, len(self.store.vocabulary("event_type")), len(self.group_names))
+        # An append spanning more than the retention window (such as the
+        # first one, replaying a long history) starts before the new base:
+        # its older minutes only add to the floor
+        start = max(m0, state.base)
+        lo, hi = state.filled + 1 - state.base, m1 + 1 - state.base
+        for cumulative, codes, floor in ((state.types, types, state.floor_types),
+                                         (state.groups, groups, state.floor_groups)):
+            width = cumulative.shape[1]
+            counts = np.bincount((minutes - m0) * width + codes, minlength=(m1 - m0 + 1) * width).reshape(-1, width)
+            if start > m0:
+                floor += counts[:start - m0].sum(axis=0, dtype=floor.dtype)
+                counts = counts[start - m0:]
+            # Carry the running totals forward over the minutes with no events, then add
+            cumulative[lo:hi] = cumulative[lo - 1] if lo > 0 else floor
+            cumulative[start - state.base:hi] += np.cumsum(counts, axis=0, dtype=cumulative.dtype)
+        state.filled = m1
+
+    def _reshape(self, m0, m1, n_types, n_groups):
+        """The state, re-published with room for minute m1 and the given widths"""
+        state = self._state
+        if state is None:
+            state = HistogramState(m0, m0 - 1, np.zeros((0, 0), np.int32), np.zeros((0, 0), np.int32),
+                                   np.zeros(0, np.int32), np.zeros(0, np.int32))
+        rows = m1 + 1 - state.base
+        capacity, type_width = state.types.shape
+        group_width = state.groups.shape[1]
+        cut = max(m1 + 1 - self.retention - state.base, 0) if rows > self.retention + 24 * 60 else 0
+        if rows <= capacity and n_types <= type_width and n_groups <= group_width and not cut:
+            return state
+
+        filled_rows = state.filled + 1 - state.base
+        new_capacity = max(rows - cut, min(capacity - cut + capacity // 2, self.retention + 24 * 60), 64)
+        reshaped = []
+        for cumulative, floor, width in ((state.types, state.floor_types, max(n_types, type_width)),
+                                         (state.groups, state.floor_groups, max(n_groups, group_width))):
+            grown = np.zeros((new_capacity, width), dtype=np.int32)
+            grown_floor = np.zeros(width, dtype=np.int32)
+            grown_floor[:len(floor)] = floor
+            if cut and filled_rows > 0:
+                grown_floor[:cumulative.shape[1]] = cumulative[min(cut, filled_rows) - 1]
+            kept = cumulative[cut:filled_rows]
+            grown[:len(kept), :cumulative.shape[1]] = kept
+            reshaped += [grown, grown_floor]
+        types, floor_types, groups, floor_groups = reshaped
+        base = state.base + cut
+        self._state = HistogramState(base, max(state.filled, base - 1), types, groups, floor_types, floor_groups)
+        return self._state
+
+    def counts(self, edges):
+        """Event counts between consecutive epoch-minute `edges`.
+
+        Returns ([bucket, eventType code], [bucket, group code]) arrays.
+        """
+        state = self._state
+        edges = np.asarray(edges, dtype=np.int64)
+        if state is None:
+            return np.zeros((len(edges) - 1, 0), np.int64), np.zeros((len(edges) - 1, 0), np.int64)
+        # Cumulative count through minute edge - 1, clamped to the stored rows
+        index = np.minimum(edges - 1, state.filled) - state.base
+        results = []
+        for cumulative, floor in ((state.types, state.floor_types), (state.groups, state.floor_groups)):
+            width = min(cumulative.shape[1], len(floor))
+            totals = cumulative[np.maximum(index, 0), :width].astype(np.int64)
+            totals[index < 0] = floor[:width]
+            results.append(np.diff(totals, axis=0))
+        return tuple(results)
+
+    def chart(self, interval=60, buckets=24, now=None):
+        """Chart rows for the last `buckets` windows of `interval` minutes.
+
+        Windows are aligned in local time (hourly windows start on the
+        hour) and the newest one contains `now`.
+        """
+        now = now or datetime.now()
+        offset = int(now.astimezone().utcoffset().total_seconds()) // 60
+        last = (int(now.timestamp()) // 60 + offset) // interval
+        edges = np.arange(last - buckets + 1, last + 2, dtype=np.int64) * interval - offset
+        by_type, by_group = self.counts(edges)
+        type_names = self.store.vocabulary("event_type")
+        label = "%Y-%m-%d" if interval % (24 * 60) == 0 else "%H:00" if interval % 60 == 0 else "%H:%M"
+
+        rows = []
+        for i in range(buckets):
+            start = datetime.fromtimestamp(int(edges[i]) * 60)
+            types = {type_names[code]: int(n) for code, n in enumerate(by_type[i].tolist()) if n}
+            rows.append({
+                "time": start.strftime(label),
+                "start": start.isoformat(),
+                "events": sum(types.values()),
+                "motion": types.get("MOTION", 0),
+                "byType": types,
+                "byGroup": {self.group_names[code]: int(n) for code, n in enumerate(by_group[i].tolist()) if n},
+            })
+        return rows
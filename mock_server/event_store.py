@@ -0,0 +1,443 @@
+"""
+Indexed, columnar event store for the mock Analytics Search endpoint.
+
+Events are held column-wise: timestamps as int64 epoch microseconds,
+confidence as float32, ids as raw UUID bytes and every categorical field
+(camera, eventType, objectClass, zone, ruleName) dictionary-encoded into
+small integer codes. That is ~40 bytes per event instead of a 9-key dict;
+dicts are only materialized for the rows a response actually returns.
+
+Rows are appended in timestamp order, so date ranges resolve with a binary
+search over the timestamp column, and the camera and eventType columns
+carry posting lists of row numbers. A filtered search only touches posting
+list entries inside the requested range, so it costs O(log n + k) rather
+than a scan over the whole history. Per-eventType totals are kept as rows
+are appended, so counting events by type is O(number of types).
+
+One writer at a time appends (under a lock) while any number of readers
+search without locking. A writer fills rows past the published size,
+swaps in grown columns and posting segments as whole new objects, and
+publishes the new size last; readers read the size before anything else,
+so every structure they look at afterwards covers all rows they can see.
+Listeners registered with add_listener() (e.g. the chart histogram) are
+told about every append while the writer still holds the lock.
+
+save() writes the columns and posting lists as .npy files; load() maps
+them back read-only with mmap, so opening a large store costs almost
+nothing until the pages are touched.
+"""
+
+from datetime import datetime
+import json
+import math
+import os
+import threading
+import uuid
+
+import numpy as np
+
+from event_generator import EventChunk
+
+INITIAL_CAPACITY = 1024
+SNAPSHOT_VERSION = 1
+
+COLUMNS = {
+    "timestamp": (np.int64, ()),
+    "camera": (np.uint32, ()),
+    "event_type": (np.uint8, ()),
+    "object_class": (np.uint8, ()),
+    "zone": (np.uint8, ()),
+    "rule_name": (np.uint8, ()),
+    "confidence": (np.float32, ()),
+    "record_code": (np.int32, ()),
+    "ids": (np.uint8, (16,)),
+}
+
+# Categorical columns and the event dict keys they encode
+CATEGORICAL = {
+    "camera": "camera",
+    "event_type": "eventType",
+    "object_class": "objectClass",
+    "zone": "zone",
+    "rule_name": "ruleName",
+}
+
+
+def event_epoch(event):
+    """Return the epoch timestamp (seconds) of an event dict"""
+    return datetime.fromisoformat(event["timestamp"]).timestamp()
+
+
+class Vocabulary:
+    """Dictionary encoding of one categorical column"""
+
+    def __init__(self, dtype):
+        self.values = []
+        self.codes = {}
+        self.limit = np.iinfo(dtype).max + 1
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if code >= self.limit:
+                raise ValueError(f"too many distinct values for column ({self.limit})")
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, values):
+        """Codes of the values that are known; unknown values match nothing"""
+        return [self.codes[v] for v in set(values) if v in self.codes]
+
+
+class PostingIndex:
+    """Row-number posting lists for one categorical column.
+
+    Rows are grouped into segments that cover consecutive row ranges. Each
+    segment keeps its rows ordered by (code, row), so one key's posting list
+    inside a segment is a contiguous slice found with searchsorted. Adjacent
+    segments are merged while the older one is less than twice the size of
+    the newer one, which keeps the segment count logarithmic in the number
+    of rows even when events arrive one at a time.
+    """
+
+    def __init__(self):
+        # (first_row, codes sorted, uint32 rows in matching order); replaced, never mutated
+        self._segments = ()
+
+    def add(self, first_row, codes):
+        order = np.argsort(codes, kind="stable")
+        segments = list(self._segments)
+        segments.append((first_row, codes[order], (order + first_row).astype(np.uint32)))
+        while len(segments) > 1 and len(segments[-2][2]) < 2 * len(segments[-1][2]):
+            newer = segments.pop()
+            older = segments.pop()
+            codes = np.concatenate((older[1], newer[1]))
+            rows = np.concatenate((older[2], newer[2]))
+            # Stable, so rows stay ascending within each code
+            order = np.argsort(codes, kind="stable")
+            segments.append((older[0], codes[order], rows[order]))
+        self._segments = tuple(segments)
+
+    def slices(self, codes, lo, hi):
+        """Posting-list slices for `codes` restricted to rows in [lo, hi)"""
+        parts = []
+        # Search keys must match the array dtypes, or numpy upcasts (copies)
+        # the whole segment on every searchsorted call.
+        lo_row, hi_row = np.uint32(lo), np.uint32(hi)
+        for first_row, seg_codes, seg_rows in self._segments:
+            if first_row >= hi or first_row + len(seg_rows) <= lo:
+                continue
+            clipped = first_row < lo or first_row + len(seg_rows) > hi
+            for code in codes:
+                code = seg_codes.dtype.type(code)
+                rows = seg_rows[np.searchsorted(seg_codes, code, "left"):np.searchsorted(seg_codes, code, "right")]
+                if clipped and len(rows):
+                    rows = rows[np.searchsorted(rows, lo_row):np.searchsorted(rows, hi_row)]
+                if len(rows):
+                    parts.append(rows)
+        return parts
+
+
+class EventStore:
+    """Append-only, time-ordered columnar event storage"""
+
+    def __init__(self, events=()):
+        self._size = 0
+        self._columns = {
+            name: np.empty((INITIAL_CAPACITY,) + shape, dtype=dtype)
+            for name, (dtype, shape) in COLUMNS.items()
+        }
+        self._vocab = {name: Vocabulary(COLUMNS[name][0]) for name in CATEGORICAL}
+        self._postings = {"camera": PostingIndex(), "event_type": PostingIndex()}
+        self._recode_cache = {}  # column -> (chunk vocabulary list, code mapping)
+        self._type_counts = np.zeros(np.iinfo(COLUMNS["event_type"][0]).max + 1, dtype=np.int64)
+        self._write_lock = threading.Lock()
+        self._listeners = []
+        self.extend(events)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        """Iterate events newest first, matching the Search response order"""
+        size = self._size
+        for stop in range(size, 0, -INITIAL_CAPACITY):
+            rows = np.arange(stop - 1, max(stop - INITIAL_CAPACITY, 0) - 1, -1)
+            yield from self.materialize(rows)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column arrays and posting lists (capacity included)"""
+        total = sum(column.nbytes for column in self._columns.values())
+        for index in self._postings.values():
+            total += sum(codes.nbytes + rows.nbytes for _, codes, rows in index._segments)
+        return total
+
+    def save(self, path):
+        """Write the store to directory `path` (see load)"""
+        os.makedirs(path, exist_ok=True)
+        with self._write_lock:
+            size = self._size
+            for name in COLUMNS:
+                np.save(os.path.join(path, f"{name}.npy"), self._columns[name][:size])
+            segments = {}
+            for name, index in self._postings.items():
+                segments[name] = []
+                for i, (first_row, codes, rows) in enumerate(index._segments):
+                    np.save(os.path.join(path, f"{name}.postings.{i}.codes.npy"), codes)
+                    np.save(os.path.join(path, f"{name}.postings.{i}.rows.npy"), rows)
+                    segments[name].append(first_row)
+            meta = {
+                "version": SNAPSHOT_VERSION,
+                "size": size,
+                "vocab": {name: vocab.values for name, vocab in self._vocab.items()},
+                "segments": segments,
+                "type_counts": self._type_counts.tolist(),
+            }
+        with open(os.path.join(path, "store.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a store written by save().
+
+        With mmap the columns and posting lists stay in the files (read
+        only) and are paged in as searches touch them; the first append
+        copies the columns into memory, as growing past capacity would.
+        """
+        with open(os.path.join(path, "store.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported event store snapshot version {meta.get('version')}")
+        mode = "r" if mmap else None
+        store = cls()
+        store._columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in COLUMNS}
+        for name, values in meta["vocab"].items():
+            vocab = store._vocab[name]
+            vocab.values = values
+            vocab.codes = {value: code for code, value in enumerate(values)}
+        for name, first_rows in meta["segments"].items():
+            store._postings[name]._segments = tuple(
+                (first_row,
+                 np.load(os.path.join(path, f"{name}.postings.{i}.codes.npy"), mmap_mode=mode),
+                 np.load(os.path.join(path, f"{name}.postings.{i}.rows.npy"), mmap_mode=mode))
+                for i, first_row in enumerate(first_rows)
+            )
+        store._type_counts = np.array(meta["type_counts"], dtype=np.int64)
+        store._size = meta["size"]
+        return store
+
+    def _column(self, name):
+        size = self._size  # before the columns, see the module docstring
+        return self._columns[name][:size]
+
+    def column(self, name, lo=0, hi=None):
+        """Stored codes/values of one column for rows [lo, hi)"""
+        return self._column(name)[lo:hi]
+
+    def vocabulary(self, name):
+        """Values of a categorical column, indexed by code (only ever grows)"""
+        return self._vocab[name].values
+
+    def add_listener(self, listener):
+        """Call listener(first_row, stop_row) for the rows stored so far and
+        then after every append, always under the write lock"""
+        with self._write_lock:
+            if self._size:
+                listener(0, self._size)
+            self._listeners.append(listener)
+
+    @property
+    def latest_timestamp(self):
+        """Epoch microseconds of the newest stored event, or None"""
+        timestamps = self._column("timestamp")
+        return int(timestamps[-1]) if len(timestamps) else None
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._columns["timestamp"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity + capacity // 2)
+        grown = {}
+        for name, column in self._columns.items():
+            grown[name] = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[name][:self._size] = column[:self._size]
+        self._columns = grown
+
+    def extend_chunk(self, chunk):
+        """Append an EventChunk whose rows are already in timestamp order.
+
+        Returns the row number of the chunk's first event.
+        """
+        with self._write_lock:
+            return self._extend_chunk(chunk)
+
+    def _extend_chunk(self, chunk):
+        n = len(chunk)
+        if n == 0:
+            return self._size
+        timestamps = chunk.timestamp
+        if np.any(timestamps[1:] < timestamps[:-1]) or (self._size and timestamps[0] < self._column("timestamp")[-1]):
+            raise ValueError("events must be appended in timestamp order")
+
+        self._reserve(n)
+        first, stop = self._size, self._size + n
+        columns = self._columns
+        for name in COLUMNS:
+            values = getattr(chunk, name)
+            if name in CATEGORICAL:
+                values = self._recode(name, chunk.vocab[name])[values]
+            columns[name][first:stop] = values
+
+        for name, index in self._postings.items():
+            index.add(first, columns[name][first:stop])
+        self._type_counts = self._type_counts + np.bincount(columns["event_type"][first:stop], minlength=len(self._type_counts))
+        self._size = stop  # publish
+        for listener in self._listeners:
+            listener(first, stop)
+        return first
+
+    def _recode(self, name, values):
+        """Mapping from a chunk's codes to this store's codes for one column.
+
+        Chunks from one generator share their vocabulary lists, so the
+        mapping is cached per list and only rebuilt when a new one shows up.
+        """
+        cached = self._recode_cache.get(name)
+        if cached is not None and cached[0] is values and len(cached[1]) == len(values):
+            return cached[1]
+        vocab = self._vocab[name]
+        mapping = np.array([vocab.encode(v) for v in values], dtype=COLUMNS[name][0])
+        self._recode_cache[name] = (values, mapping)
+        return mapping
+
+    def extend(self, events):
+        """Append event dicts (or EventChunks), encoding dicts as they come.
+
+        Each dict batch is sorted here, but it must not start before the
+        newest stored event: the store is append-only so row numbers, and
+        with them the posting lists, are never rewritten.
+        """
+        batch = []
+        for item in events:
+            if isinstance(item, EventChunk):
+                self._flush(batch)
+                self.extend_chunk(item)
+            else:
+                batch.append(item)
+        self._flush(batch)
+
+    def append(self, event):
+        self.extend((event,))
+
+    def _flush(self, batch):
+        if batch:
+            batch.sort(key=lambda e: e["timestamp"])
+            self.extend_chunk(chunk_from_dicts(batch))
+            batch.clear()
+
+    def _time_range(self, start, end):
+        timestamps = self._column("timestamp")
+        lo = 0 if start is None else int(np.searchsorted(timestamps, np.int64(math.ceil(start * 1_000_000)), "left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, np.int64(math.floor(end * 1_000_000)), "right"))
+        return lo, hi
+
+    def search_rows(self, start=None, end=None, cameras=None, event_types=None, before=None, since=None,
+                    limit=None):
+        """Row numbers of matching events, newest first.
+
+        start/end are inclusive epoch bounds in seconds (None leaves that
+        side open); cameras/event_types are collections of names (None or
+        empty means no filter on that field). `before` keeps only rows older
+        than that row number, for keyset paging; `since` keeps only rows at
+        or after it, for delta polling. Row numbers double as the event
+        log's sequence numbers: they only ever grow. `limit` keeps only the
+        newest that many matches, so a small page of an unfiltered search
+        does not allocate a row number for every event in the range.
+        """
+        lo, hi = self._time_range(start, end)
+        if before is not None:
+            hi = min(hi, before)
+        if since is not None:
+            lo = max(lo, since)
+        if lo >= hi:
+            return np.empty(0, dtype=np.int64)
+        if not cameras and not event_types:
+            if limit is not None:
+                lo = max(lo, hi - limit)
+            return np.arange(hi - 1, lo - 1, -1)
+
+        # Walk only the smaller posting-list selection and check the other
+        # filter directly on those rows.
+        candidates = []
+        for name, wanted in (("camera", cameras), ("event_type", event_types)):
+            if wanted:
+                codes = self._vocab[name].lookup(wanted)
+                parts = self._postings[name].slices(codes, lo, hi)
+                candidates.append((sum(len(p) for p in parts), name, codes, parts))
+        candidates.sort(key=lambda c: c[0])
+
+        _, _, _, parts = candidates[0]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        rows = parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+        for _, name, codes, _ in candidates[1:]:
+            rows = rows[np.isin(self._columns[name][rows], codes)]
+        return rows[::-1] if limit is None else rows[::-1][:limit]
+
+    def search(self, start=None, end=None, cameras=None, event_types=None):
+        """Return matching event dicts, newest first (see search_rows)"""
+        return self.materialize(self.search_rows(start, end, cameras, event_types))
+
+    def count(self, event_types=None):
+        """Number of stored events, optionally only of the given types"""
+        if not event_types:
+            return self._size
+        codes = self._vocab["event_type"].lookup(event_types)
+        return int(self._type_counts[codes].sum())
+
+    def recount(self, event_types):
+        """count() computed by scanning the eventType column, for self-checks"""
+        codes = self._vocab["event_type"].lookup(event_types)
+        return int(np.isin(self._column("event_type"), codes).sum())
+
+    def materialize(self, rows, fields=None):
+        """Build the JSON-ready event dicts for the given row numbers, optionally only `fields`"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return list(self.chunk(rows).iter_dicts(fields))
+
+    def chunk(self, rows):
+        """Copy the given rows out as an EventChunk using this store's vocabulary"""
+        return EventChunk(
+            vocab={name: vocab.values for name, vocab in self._vocab.items()},
+            **{name: self._columns[name][rows] for name in COLUMNS},
+        )
+
+
+def chunk_from_dicts(events):
+    """Encode a list of event dicts (timestamp ordered) as an EventChunk"""
+    n = len(events)
+    vocab = {}
+    codes = {}
+    for name, key in CATEGORICAL.items():
+        values = {}
+        codes[name] = np.fromiter(
+            (values.setdefault(e[key], len(values)) for e in events),
+            dtype=np.uint32 if name == "camera" else np.uint8,
+            count=n,
+        )
+        vocab[name] = list(values)
+    return EventChunk(
+        timestamp=np.fromiter((round(event_epoch(e) * 1_000_000) for e in events), dtype=np.int64, count=n),
+        confidence=np.fromiter((e["confidence"] for e in events), dtype=np.float32, count=n),
+        record_code=np.fromiter((int(e["recordCode"][3:]) for e in events), dtype=np.int32, count=n),
+        ids=np.frombuffer(b"".join(uuid.UUID(e["id"]).bytes for e in events), dtype=np.uint8).reshape(n, 16),
+        vocab=vocab,
+        **codes,
+    )
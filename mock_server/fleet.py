@@ -0,0 +1,106 @@
+"""
+Parametric camera fleet generator for load-testing the mock server.
+
+Builds N sites x M buildings x K cameras with realistic names, models,
+groups and addresses, plus the matching group list. Everything is derived
+from a seeded local RNG, so the same spec always yields the same fleet
+(useful when several worker processes build it independently).
+
+Select a generated fleet at startup with MOCK_FLEET=SITESxBUILDINGSxCAMERAS
+or `python mock_server/app.py --fleet 10x10x1000`.
+"""
+
+import random
+
+SITE_NAMES = ["Central", "Riverside", "Northgate", "Harbor", "Hillcrest", "Lakeside", "Westfield", "Eastwood"]
+BUILDING_NAMES = ["MAIN", "ANNEX", "NORTH", "SOUTH", "EAST", "WEST", "TOWER", "DEPOT"]
+AREAS = [
+    "ENTRANCE", "LOBBY", "CORRIDOR", "STAIRWELL", "ELEVATOR", "OFFICE", "STORAGE",
+    "LOADING-DOCK", "PARKING", "ROOF", "EXIT", "SERVER-ROOM", "CAFETERIA", "PERIMETER",
+]
+MODELS = [
+    ("Hikvision DS-2CD2385", "IP Camera"),
+    ("Axis P3245-V", "IP Camera"),
+    ("Axis Q1615", "IP Camera"),
+    ("Dahua IPC-HFW5831E", "IP Camera"),
+    ("Samsung Wisenet PNM", "IP Camera"),
+    ("Axis Q6155-E", "PTZ Camera"),
+    ("Axis P3717-PLE", "Panoramic Camera"),
+]
+
+
+def parse_fleet_spec(spec):
+    """Parse "SITESxBUILDINGSxCAMERAS" (e.g. "10x10x1000") into three ints"""
+    try:
+        sites, buildings, cameras = (int(part) for part in spec.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"invalid fleet spec {spec!r}, expected SITESxBUILDINGSxCAMERAS")
+    if min(sites, buildings, cameras) < 1:
+        raise ValueError(f"invalid fleet spec {spec!r}, all sizes must be positive")
+    return sites, buildings, cameras
+
+
+def site_label(site):
+    base = SITE_NAMES[site % len(SITE_NAMES)]
+    return base if site < len(SITE_NAMES) else f"{base}{site // len(SITE_NAMES) + 1}"
+
+
+def building_label(building):
+    base = BUILDING_NAMES[building % len(BUILDING_NAMES)]
+    return base if building < len(BUILDING_NAMES) else f"{base}{building // len(BUILDING_NAMES) + 1}"
+
+
+def ip_address(index):
+    """Address of the index-th camera in 10.0.0.0/8, skipping .0 and .255 hosts"""
+    block, host = divmod(index, 254)
+    return f"10.{block // 256 % 256}.{block % 256}.{host + 1}"
+
+
+def generate_fleet(sites, buildings, cameras_per_building, seed=0):
+    """Return (cameras, groups) for a sites x buildings x cameras fleet.
+
+    Each site/building pair is one camera group. Camera dicts have the same
+    fields as the hand-written catalog in app.py.
+    """
+    rng = random.Random(seed)
+    cameras = []
+    append = cameras.append
+    index = 0
+    for site in range(sites):
+        site_name = site_label(site)
+        site_lat = rng.uniform(-60.0, 60.0)
+        site_lng = rng.uniform(-170.0, 170.0)
+        for building in range(buildings):
+            building_name = building_label(building)
+            group = f"{site_name}-{building_name}"
+            prefix = f"CAM-{site_name.upper()}-{building_name}"
+            lat = round(site_lat + rng.uniform(-0.01, 0.01), 4)
+            lng = round(site_lng + rng.uniform(-0.01, 0.01), 4)
+            for k in range(cameras_per_building):
+                area = AREAS[k % len(AREAS)]
+                model, device_type = MODELS[(index * 7 + k) % len(MODELS)]
+                append({
+                    "name": f"{prefix}-{area}-{k // len(AREAS) + 1:02d}",
+                    "active": True,
+                    "model": model,
+                    "deviceType": device_type,
+                    "connectionAddress": ip_address(index),
+                    "connectionPort": 80,
+                    "latitude": round(lat + (k % 10) * 0.0001, 4),
+                    "longitude": round(lng + (k // 10 % 10) * 0.0001, 4),
+                    "group": group,
+                    "status": "recording",
+                    "working": True,
+                    "recordingHours": 168,
+                })
+                index += 1
+    return cameras, groups_from_cameras(cameras)
+
+
+def groups_from_cameras(cameras):
+    """Build the GetGroups list from the cameras' group fields, in first-seen order"""
+    members = {}
+    for camera in cameras:
+        names = members.setdefault(camera["group"], {})
+        names[camera["name"]] = None
+    return [{"name": group, "cameras": list(names), "active": True} for group, names in members.items()]
@@ -0,0 +1,241 @@
+"""
+Live event feed for the mock server.
+
+LiveProducer is a background thread that keeps appending freshly generated
+events to the event store at a configurable rate (MOCK_LIVE_RATE events
+per second; off by default) and publishes every batch to an EventHub.
+Clients subscribe through the hub with optional camera and eventType
+filters and read their events as Server-Sent Events from
+/Interface/Analytics/Stream.
+
+Each subscriber has its own bounded queue, measured in events, so one slow
+client never holds up the producer or the other subscribers. When a queue
+is full the subscriber's policy decides what gives:
+
+    drop_oldest - discard the oldest queued events (default)
+    drop_newest - discard the incoming events
+    disconnect  - end the stream
+
+Dropped events are reported to the client as a `dropped` SSE event with
+the running total. Event ids are the events' row numbers in the store, so
+a client that reconnects can fetch what it missed with Analytics Search
+and Since=<last id + 1>.
+"""
+
+from collections import deque
+import os
+import threading
+import time
+
+import numpy as np
+
+from event_generator import event_vocabulary, random_chunk
+
+POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+DEFAULT_QUEUE_SIZE = 10000
+MAX_QUEUE_SIZE = 1_000_000
+KEEPALIVE_SECONDS = 15
+
+
+class Subscription:
+    """One subscriber's filters and bounded queue of (row numbers, EventChunk)"""
+
+    def __init__(self, cameras=None, event_types=None, queue_size=DEFAULT_QUEUE_SIZE, policy="drop_oldest", notify=None):
+        self.filters = {"camera": set(cameras or ()), "event_type": set(event_types or ())}
+        self.queue_size = queue_size
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self._notify = notify or (lambda: None)
+        self._queue = deque()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._codes = {}  # column -> (vocabulary list, wanted codes)
+
+    def _wanted(self, column, values):
+        cached = self._codes.get(column)
+        if cached is None or cached[0] is not values:
+            wanted = self.filters[column]
+            cached = (values, np.array([code for code, value in enumerate(values) if value in wanted]))
+            self._codes[column] = cached
+        return cached[1]
+
+    def offer(self, rows, chunk):
+        """Queue the events of a published chunk that pass the filters (producer thread)"""
+        mask = None
+        for column, wanted in self.filters.items():
+            if wanted:
+                match = np.isin(getattr(chunk, column), self._wanted(column, chunk.vocab[column]))
+                mask = match if mask is None else mask & match
+        if mask is not None:
+            index = np.flatnonzero(mask)
+            rows, chunk = rows[index], chunk.take(index)
+        if not len(rows):
+            return
+
+        with self._lock:
+            if self.closed:
+                return
+            overflow = self._pending + len(rows) - self.queue_size
+            if overflow > 0 and self.policy == "disconnect":
+                self.dropped += len(rows)
+                self.closed = True
+            elif overflow > 0 and self.policy == "drop_newest":
+                keep = max(len(rows) - overflow, 0)
+                self.dropped += len(rows) - keep
+                rows, chunk = rows[:keep], chunk.take(slice(0, keep))
+            elif overflow > 0:
+                self.dropped += overflow
+                while overflow and self._queue:
+                    queued_rows, queued = self._queue[0]
+                    if len(queued_rows) <= overflow:
+                        self._queue.popleft()
+                        self._pending -= len(queued_rows)
+                        overflow -= len(queued_rows)
+                    else:
+                        self._queue[0] = (queued_rows[overflow:], queued.take(slice(overflow, None)))
+                        self._pending -= overflow
+                        overflow = 0
+                if overflow:
+                    # An incoming batch bigger than the whole queue keeps its newest events
+                    rows, chunk = rows[overflow:], chunk.take(slice(overflow, None))
+            if len(rows) and not self.closed:
+                self._queue.append((rows, chunk))
+                self._pending += len(rows)
+        self._notify()
+
+    def drain(self):
+        """Take everything queued so far, as a list of (row numbers, EventChunk)"""
+        with self._lock:
+            items = list(self._queue)
+            self._queue.clear()
+            self._pending = 0
+        return items
+
+
+class EventHub:
+    """Fans published event chunks out to the current subscriptions"""
+
+    def __init__(self):
+        self._subscriptions = ()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def publish(self, first_row, chunk):
+        rows = np.arange(first_row, first_row + len(chunk), dtype=np.int64)
+        for subscription in self._subscriptions:
+            subscription.offer(rows, chunk)
+
+
+class LiveProducer:
+    """Background thread appending `rate` random events per second to a store"""
+
+    def __init__(self, store, cameras, hub, rate=0.0, interval=0.1, max_events=10_000_000):
+        self.store = store
+        self.hub = hub
+        self.rate = rate
+        self.interval = interval
+        self.max_events = max_events
+        self._vocab = event_vocabulary(cameras)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def ensure_running(self):
+        """Start the producer in this process if it is enabled and not running.
+
+        Threads do not survive fork(), so pre-forked workers call this on
+        their first request rather than relying on a thread started at import.
+        """
+        if self.rate <= 0 or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="live-events", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        rng = np.random.default_rng()
+        last = time.time()
+        floor = self.store.latest_timestamp or 0
+        while not self._stop.wait(self.interval):
+            if len(self.store) >= self.max_events:
+                print(f"[MOCK SERVER] Live feed stopped at {len(self.store)} stored events (MOCK_LIVE_MAX_EVENTS)")
+                return
+            now = time.time()
+            n = int(rng.poisson(self.rate * (now - last)))
+            lo, hi = max(int(last * 1_000_000), floor), int(now * 1_000_000)
+            last = now
+            if n == 0 or hi < lo:
+                continue
+            chunk = random_chunk(rng, n, lo, hi, self._vocab)
+            first_row = self.store.extend_chunk(chunk)
+            floor = int(chunk.timestamp[-1])
+            self.hub.publish(first_row, chunk)
+
+
+def parse_subscription(args):
+    """Subscription options from request args (Cameras, EventTypes, QueueSize, Policy); raises ValueError"""
+    cameras = [c for c in args.get("Cameras", "").split(",") if c]
+    event_types = [t for t in args.get("EventTypes", "").split(",") if t]
+    try:
+        queue_size = int(args.get("QueueSize") or DEFAULT_QUEUE_SIZE)
+    except ValueError:
+        raise ValueError("QueueSize must be an integer")
+    if not 1 <= queue_size <= MAX_QUEUE_SIZE:
+        raise ValueError(f"QueueSize must be between 1 and {MAX_QUEUE_SIZE}")
+    policy = (args.get("Policy") or "drop_oldest").lower()
+    if policy not in POLICIES:
+        raise ValueError(f"Policy must be one of {', '.join(POLICIES)}")
+    return {"cameras": cameras, "event_types": event_types, "queue_size": queue_size, "policy": policy}
+
+
+def sse_frames(subscription, items, dumps, reported):
+    """SSE text for drained items; returns (text, dropped count now reported)"""
+    parts = []
+    for rows, chunk in items:
+        parts.extend(f"id: {row}\ndata: {dumps(event)}\n\n" for row, event in zip(rows.tolist(), chunk.iter_dicts()))
+    if subscription.dropped != reported:
+        reported = subscription.dropped
+        parts.append(f"event: dropped\ndata: {dumps({'dropped': reported})}\n\n")
+    if subscription.closed:
+        parts.append(f"event: disconnect\ndata: {dumps({'reason': 'queue full'})}\n\n")
+    return "".join(parts), reported
+
+
+def iter_sse(hub, subscription_args, dumps):
+    """Blocking SSE stream for a threaded WSGI server"""
+    wakeup = threading.Event()
+    subscription = hub.subscribe(Subscription(notify=wakeup.set, **subscription_args))
+    reported = 0
+    try:
+        yield ": connected\n\n"
+        while True:
+            if not wakeup.wait(KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+                continue
+            wakeup.clear()
+            text, reported = sse_frames(subscription, subscription.drain(), dumps, reported)
+            if text:
+                yield text
+            if subscription.closed:
+                return
+    finally:
+        hub.unsubscribe(subscription)
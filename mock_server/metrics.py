@@ -0,0 +1,370 @@
+"""
+Request metrics and process load for the mock server.
+
+Metrics wraps the Flask app's WSGI callable and records, per route and
+method:
+
+    latency        request start to the last body byte (streamed bodies
+                   included)
+    handler        time inside the app (routing, the view, after-request
+                   hooks), less the JSON encoding done there
+    serialization  time in the app's JSON encoder (serialization.py),
+                   whether called by the view or while a body streams
+    size           response body bytes
+
+as fixed-bucket histograms, plus request counts by status. Streamed
+bodies also spend time producing records between encoder calls; that
+shows up in latency only.
+
+GET /Interface/System/Metrics serves them together with the process's
+CPU time and resident memory, as JSON or, with Format=Prometheus (or an
+Accept header asking for text/plain), in the Prometheus text format. Each
+worker process keeps its own numbers, so behind a multi-worker server a
+scrape sees the worker that answered it (the pid is included). The
+asyncio front end's native routes (the SSE stream and long polls) bypass
+the Flask app and are not counted.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+from flask import request
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)  # bytes
+ENVIRON_KEY = "mock_server.timing"
+UNMATCHED = "<unmatched>"
+
+PROCESS_STARTED = time.time()
+
+_current = threading.local()  # .timing: RequestTiming of the request being encoded on this thread
+
+
+def add_serialization(seconds):
+    """Encoder hook: charge `seconds` of JSON encoding to the current request"""
+    timing = getattr(_current, "timing", None)
+    if timing is not None:
+        timing.serialization += seconds
+
+
+# Process load ----------------------------------------------------------------
+
+def process_cpu_seconds():
+    """User + system CPU time of this process"""
+    times = os.times()
+    return times.user + times.system
+
+
+def process_rss_bytes():
+    """Current resident set size, or the peak where only that is known"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+def total_memory_bytes():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class CpuMeter:
+    """Process CPU use in percent of all cores, since the previous reading.
+
+    The first reading covers the time since the baseline, which reset()
+    takes again once startup work (loading datasets) is done, so it does
+    not report that work as load.
+    """
+
+    MIN_WINDOW = 1.0         # seconds; shorter gaps reuse the previous reading
+    MIN_FIRST_WINDOW = 0.1   # seconds after the baseline before the first reading
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Measure from now on"""
+        with self._lock:
+            self._restart()
+
+    def _restart(self):
+        self._pid = os.getpid()
+        self._sample = (time.monotonic(), process_cpu_seconds())
+        self._percent = None
+
+    def percent(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker's CPU times start over; so does its baseline
+                self._restart()
+            now, cpu = time.monotonic(), process_cpu_seconds()
+            wall = now - self._sample[0]
+            if wall >= self.MIN_WINDOW or (self._percent is None and wall >= self.MIN_FIRST_WINDOW):
+                self._percent = 100 * (cpu - self._sample[1]) / wall / (os.cpu_count() or 1)
+                self._sample = (now, cpu)
+            return 0.0 if self._percent is None else self._percent
+
+
+def process_stats(cpu_meter):
+    rss = process_rss_bytes()
+    total = total_memory_bytes()
+    return {
+        "pid": os.getpid(),
+        "cpuSeconds": round(process_cpu_seconds(), 3),
+        "cpuPercent": round(cpu_meter.percent(), 1),
+        "rssBytes": rss,
+        "memoryPercent": round(100 * rss / total, 1) if rss and total else None,
+        "threads": threading.active_count(),
+        "startTime": PROCESS_STARTED,
+        "uptimeSeconds": round(time.time() - PROCESS_STARTED, 1),
+    }
+
+
+# Request histograms ----------------------------------------------------------
+
+class Histogram:
+    """Counts per bucket (the last one is +Inf) and the sum of observations"""
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding quantile q; None if empty or past the last bound"""
+        total = sum(self.counts)
+        if not total:
+            return None
+        rank, seen = q * total, 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+
+class RouteStats:
+    __slots__ = ("statuses", "latency", "handler", "serialization", "size")
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.handler = Histogram(LATENCY_BUCKETS)
+        self.serialization = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+
+
+class RequestTiming:
+    __slots__ = ("started", "method", "route", "status", "handler", "serialization", "size")
+
+    def __init__(self, started, method):
+        self.started = started
+        self.method = method
+        self.route = UNMATCHED
+        self.status = "500"
+        self.handler = 0.0
+        self.serialization = 0.0
+        self.size = 0
+
+
+class TimedBody:
+    """WSGI body that charges encoding to its request and records the request when done"""
+
+    def __init__(self, body, timing, metrics):
+        self.body = body
+        self.timing = timing
+        self.metrics = metrics
+        self.done = False
+
+    def __iter__(self):
+        iterator = iter(self.body)
+        while True:
+            # Streamed bodies may be pulled from other threads (async_server.py)
+            _current.timing = self.timing
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                _current.timing = None
+            self.timing.size += len(chunk)
+            yield chunk
+        self._finish()
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self._finish()
+
+    def _finish(self):
+        if not self.done:
+            self.done = True
+            self.metrics.observe(self.timing)
+
+
+class Metrics:
+    """Per-route request histograms for one Flask app"""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._routes = {}  # (route, method) -> RouteStats
+        self.cpu = CpuMeter()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._match_route)
+        app.wsgi_app = self._middleware(app.wsgi_app)
+        if hasattr(app.json, "on_encode"):
+            app.json.on_encode = add_serialization
+
+    @staticmethod
+    def _match_route():
+        timing = request.environ.get(ENVIRON_KEY)
+        if timing is not None and request.url_rule is not None:
+            timing.route = request.url_rule.rule
+
+    def _middleware(self, wsgi_app):
+        def middleware(environ, start_response):
+            timing = environ[ENVIRON_KEY] = RequestTiming(time.perf_counter(), environ.get("REQUEST_METHOD", "GET"))
+
+            def record_status(status, headers, exc_info=None):
+                timing.status = status.split(" ", 1)[0]
+                return start_response(status, headers, exc_info)
+
+            _current.timing = timing
+            try:
+                body = wsgi_app(environ, record_status)
+            finally:
+                _current.timing = None
+            timing.handler = time.perf_counter() - timing.started - timing.serialization
+            return TimedBody(body, timing, self)
+
+        return middleware
+
+    def observe(self, timing):
+        latency = time.perf_counter() - timing.started
+        with self._lock:
+            stats = self._routes.get((timing.route, timing.method))
+            if stats is None:
+                stats = self._routes[(timing.route, timing.method)] = RouteStats()
+            stats.statuses[timing.status] = stats.statuses.get(timing.status, 0) + 1
+            stats.latency.observe(latency)
+            stats.handler.observe(timing.handler)
+            stats.serialization.observe(timing.serialization)
+            stats.size.observe(timing.size)
+
+    def _copy(self):
+        """A consistent copy of the per-route stats, sorted by route"""
+        with self._lock:
+            copies = []
+            for (route, method), stats in sorted(self._routes.items()):
+                copy = RouteStats()
+                copy.statuses = dict(stats.statuses)
+                for name in ("latency", "handler", "serialization", "size"):
+                    source, target = getattr(stats, name), getattr(copy, name)
+                    target.counts, target.sum = list(source.counts), source.sum
+                copies.append((route, method, copy))
+            return copies
+
+    def to_json(self):
+        def timing(histogram):
+            count = sum(histogram.counts)
+            ms = lambda seconds: None if seconds is None else seconds * 1000
+            return {
+                "meanMs": round(histogram.sum / count * 1000, 3) if count else None,
+                "p50Ms": ms(histogram.quantile(0.5)),
+                "p95Ms": ms(histogram.quantile(0.95)),
+                "p99Ms": ms(histogram.quantile(0.99)),
+                "buckets": histogram.counts,
+            }
+
+        routes = []
+        for route, method, stats in self._copy():
+            count = sum(stats.latency.counts)
+            routes.append({
+                "route": route,
+                "method": method,
+                "requests": count,
+                "statuses": stats.statuses,
+                "latency": timing(stats.latency),
+                "handler": timing(stats.handler),
+                "serialization": timing(stats.serialization),
+                "bytes": {"total": stats.size.sum, "mean": stats.size.sum // count if count else 0,
+                          "buckets": stats.size.counts},
+            })
+        return {
+            "process": process_stats(self.cpu),
+            "latencyBucketsMs": [bound * 1000 for bound in LATENCY_BUCKETS] + [None],
+            "sizeBuckets": list(SIZE_BUCKETS) + [None],
+            "routes": routes,
+        }
+
+    def to_prometheus(self):
+        lines = []
+
+        def histogram(name, help_text, unit_bounds, pick):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for route, method, stats in copies:
+                h = pick(stats)
+                labels = f'route="{escape(route)}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(list(unit_bounds) + ["+Inf"], h.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {h.sum}")
+                lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+        copies = self._copy()
+        lines.append("# HELP mock_http_requests_total Requests served, by route, method and status")
+        lines.append("# TYPE mock_http_requests_total counter")
+        for route, method, stats in copies:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'mock_http_requests_total{{route="{escape(route)}",method="{method}",status="{status}"}} {count}')
+        histogram("mock_http_request_duration_seconds", "Request start to the last body byte",
+                  LATENCY_BUCKETS, lambda s: s.latency)
+        histogram("mock_http_handler_duration_seconds", "Time in the app, less JSON encoding",
+                  LATENCY_BUCKETS, lambda s: s.handler)
+        histogram("mock_http_serialization_duration_seconds", "Time in the JSON encoder",
+                  LATENCY_BUCKETS, lambda s: s.serialization)
+        histogram("mock_http_response_size_bytes", "Response body size",
+                  SIZE_BUCKETS, lambda s: s.size)
+
+        process = process_stats(self.cpu)
+        for name, kind, help_text, value in (
+            ("process_cpu_seconds_total", "counter", "User and system CPU time", process["cpuSeconds"]),
+            ("process_resident_memory_bytes", "gauge", "Resident memory size", process["rssBytes"]),
+            ("process_start_time_seconds", "gauge", "Start time since the epoch", process["startTime"]),
+            ("process_threads", "gauge", "Live Python threads", process["threads"]),
+        ):
+            if value is not None:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def escape(value):
+    """Escape a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,173 @@
+"""
+Paging and streamed JSON responses for the mock server's list endpoints.
+
+List endpoints accept Digifort-style PascalCase arguments:
+
+    Offset  - number of records to skip (default 0)
+    Limit   - maximum number of records to return (default: all)
+    Cursor  - opaque token returned as NextCursor by the previous page;
+              takes precedence over Offset
+
+When any of them is given the response carries Offset, Limit and
+NextCursor (null on the last page, and on an empty Limit=0 page) next to
+the record list, otherwise the response shape is unchanged. Either way the
+body is produced by a generator, one batch of records at a time, so the
+full document is never held in memory.
+"""
+
+import base64
+import json
+
+from flask import Response, current_app
+
+STREAM_BATCH_SIZE = 500
+
+
+class PageRequest:
+    """Parsed Offset/Limit/Cursor arguments of one request"""
+
+    __slots__ = ("offset", "limit", "position", "paged")
+
+    def __init__(self, offset=0, limit=None, position=None, paged=False):
+        self.offset = offset
+        self.limit = limit
+        self.position = position  # decoded cursor payload, if any
+        self.paged = paged
+
+    def rows_needed(self):
+        """How many of the newest event-store rows page_rows() needs; None for all.
+
+        That is the page plus one row, which tells whether another page follows.
+        """
+        if self.limit is None:
+            return None
+        return (0 if self.position else self.offset) + self.limit + 1
+
+    def window(self, total, start=None):
+        """(start, stop) slice bounds into a collection of `total` records"""
+        start = min(self.offset if start is None else start, total)
+        stop = total if self.limit is None else min(total, start + self.limit)
+        return start, stop
+
+
+def parse_page(args, cursor_key="o"):
+    """Read Offset/Limit/Cursor from request args; raises ValueError.
+
+    cursor_key names the position a cursor for this endpoint must carry:
+    "o" (next offset) for plain lists, "r" (last row number) for the
+    keyset-paged event store.
+    """
+    offset = _non_negative(args.get("Offset"), "Offset") or 0
+    limit = _non_negative(args.get("Limit"), "Limit")
+    cursor = args.get("Cursor")
+    position = None
+    if cursor:
+        position = decode_cursor(cursor)
+        if cursor_key not in position:
+            raise ValueError("Cursor does not belong to this endpoint")
+    paged = any(args.get(name) is not None for name in ("Offset", "Limit", "Cursor"))
+    return PageRequest(offset, limit, position, paged)
+
+
+def _non_negative(value, name):
+    if value is None or value == "":
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if number < 0:
+        raise ValueError(f"{name} must not be negative")
+    return number
+
+
+def encode_cursor(position):
+    raw = json.dumps(position, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        position = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid Cursor")
+    if not isinstance(position, dict) or not all(isinstance(v, int) and v >= 0 for v in position.values()):
+        raise ValueError("Invalid Cursor")
+    return position
+
+
+def page_list(items, page):
+    """Slice an offset-addressed list; returns (records, extra response keys)"""
+    start, stop = page.window(len(items), page.position["o"] if page.position else None)
+    records = items[start:stop]
+    if not page.paged:
+        return records, {}
+    # An empty page (Limit=0) would point the next cursor back at itself
+    next_cursor = encode_cursor({"o": stop}) if start < stop < len(items) else None
+    return records, {"Offset": start, "Limit": page.limit, "NextCursor": next_cursor}
+
+
+def page_rows(rows, page, carry=None):
+    """Slice event-store row numbers (newest first) for keyset paging.
+
+    A cursor has already been applied by searching only rows older than
+    the one it names, so the page starts at 0 here; NextCursor names the
+    last row returned, which keeps pages stable while new events arrive.
+    `carry` holds extra positions (e.g. a watermark) for the next cursor.
+    """
+    start, stop = page.window(len(rows), 0 if page.position else None)
+    window = rows[start:stop]
+    if not page.paged:
+        return window, {}
+    more = stop < len(rows) and len(window)
+    next_cursor = encode_cursor({**(carry or {}), "r": int(window[-1])}) if more else None
+    return window, {"Offset": start, "Limit": page.limit, "NextCursor": next_cursor}
+
+
+def stream_records(key, batches, extra=None):
+    """Stream {key: [...records], **extra} as a JSON response.
+
+    `batches` yields lists of JSON-ready records, or strings of records
+    already encoded and comma-joined (see joined()). Output matches
+    jsonify: compact separators, sorted keys and a trailing newline.
+    """
+    dumps = current_app.json.dumps
+    encode_items = getattr(current_app.json, "encode_items", None) or (
+        lambda items: ",".join(dumps(record, separators=(",", ":")) for record in items))
+    extra = extra or {}
+    keys = sorted([key, *extra])
+
+    def generate():
+        yield "{"
+        for i, name in enumerate(keys):
+            if i:
+                yield ","
+            yield dumps(name) + ":"
+            if name != key:
+                yield dumps(extra[name], separators=(",", ":"))
+                continue
+            yield "["
+            first = True
+            for batch in batches:
+                if not batch:
+                    continue
+                body = batch if isinstance(batch, str) else encode_items(batch)
+                yield body if first else "," + body
+                first = False
+            yield "]"
+        yield "}\n"
+
+    return Response(generate(), mimetype=current_app.json.mimetype)
+
+
+def batched(items, size=STREAM_BATCH_SIZE):
+    """Split a sequence into lists of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield list(items[start:start + size])
+
+
+def joined(fragments, size=STREAM_BATCH_SIZE):
+    """Batches for stream_records() from a sequence of pre-encoded records"""
+    for start in range(0, len(fragments), size):
+        yield ",".join(fragments[start:start + size])
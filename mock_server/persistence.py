@@ -0,0 +1,157 @@
+"""
+On-disk persistence for the mock server's mutable state.
+
+With MOCK_DB (or --db) set, bookmarks, counters and camera activation
+survive restarts in an SQLite database in WAL mode. The first boot seeds
+it with the demo bookmarks and counters; later boots restore from it.
+
+Writes are batched behind the requests (write-behind). A mutating
+endpoint only marks the record it changed as dirty; a writer thread waits
+FLUSH_INTERVAL after the first mark so a burst of writes shares one
+transaction, then reads the current in-memory value of every dirty record
+and commits them together. Repeated writes to one record collapse into a
+single row update, the database always ends up with the latest state
+whatever order concurrent requests finished in, and fsync is not paid per
+request. The cost is that a crash can lose the last FLUSH_INTERVAL of
+writes; a clean exit flushes first.
+
+WAL mode with synchronous=NORMAL syncs at checkpoints rather than at
+every commit, and SQLite checkpoints automatically once the log reaches
+1000 pages, so the log replayed when the database is reopened stays small
+and recovery time is bounded.
+"""
+
+import atexit
+from contextlib import closing
+import json
+import os
+import sqlite3
+import threading
+import time
+
+FLUSH_INTERVAL = 0.05  # seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+"""
+
+
+class StateDB:
+    """Write-behind store of record dicts by (kind, id)"""
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lookups = {}  # kind -> lookup(ids) -> {id: current record}
+        self._dirty = {}    # kind -> set of ids changed since the last commit
+        self._writing = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+        atexit.register(self.flush, 5)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load(self):
+        """{kind: [(id, record), ...]} in insertion order, or None before seed()"""
+        with closing(self._connect()) as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'seeded'").fetchone() is None:
+                return None
+            saved = {}
+            for kind, record_id, record in conn.execute("SELECT kind, id, record FROM records ORDER BY rowid"):
+                saved.setdefault(kind, []).append((record_id, json.loads(record)))
+        return saved
+
+    def seed(self, records):
+        """Store the initial {kind: [(id, record), ...]} of a new database"""
+        with closing(self._connect()) as conn, conn:
+            for kind, items in records.items():
+                conn.executemany(
+                    "INSERT OR REPLACE INTO records (kind, id, record) VALUES (?, ?, ?)",
+                    ((kind, record_id, json.dumps(record)) for record_id, record in items),
+                )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seeded', ?)", (time.strftime("%Y-%m-%dT%H:%M:%S"),))
+
+    def track(self, kind, lookup):
+        """Persist records of `kind`.
+
+        lookup(ids) returns {id: record} for the ids that still exist; new
+        records are stored, and so loaded again, in the order it returns.
+        """
+        self._lookups[kind] = lookup
+
+    def mark(self, kind, record_id):
+        """Note that a record was added, changed or deleted; it is written on the next flush"""
+        self.mark_many(kind, (record_id,))
+
+    def mark_many(self, kind, record_ids):
+        self._ensure_running()
+        with self._cond:
+            self._dirty.setdefault(kind, set()).update(record_ids)
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until everything marked so far is committed; False on timeout"""
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                return not self._dirty
+            return self._cond.wait_for(lambda: not self._dirty and not self._writing, timeout)
+
+    def _ensure_running(self):
+        # Threads do not survive fork(); each worker process starts its own writer
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="state-db", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty)
+            # Let the rest of a burst of writes join this transaction
+            time.sleep(self.flush_interval)
+            with self._cond:
+                dirty, self._dirty = self._dirty, {}
+                self._writing = True
+            try:
+                self._write(conn, dirty)
+            except sqlite3.Error as e:
+                print(f"[MOCK SERVER] Persisting state failed, retrying: {e}")
+                with self._cond:
+                    for kind, ids in dirty.items():
+                        self._dirty.setdefault(kind, set()).update(ids)
+                time.sleep(1)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, conn, dirty):
+        with conn:  # one transaction per batch
+            for kind, ids in dirty.items():
+                current = self._lookups[kind](ids)
+                upserts = [(kind, record_id, json.dumps(record)) for record_id, record in current.items()]
+                deletes = [(kind, record_id) for record_id in ids if record_id not in current]
+                # Upsert rather than replace, so a record keeps its rowid (and its place in load order)
+                conn.executemany(
+                    "INSERT INTO records (kind, id, record) VALUES (?, ?, ?) "
+                    "ON CONFLICT (kind, id) DO UPDATE SET record = excluded.record",
+                    upserts,
+                )
+                conn.executemany("DELETE FROM records WHERE kind = ? AND id = ?", deletes)
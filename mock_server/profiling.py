@@ -0,0 +1,275 @@
+"""
+Opt-in request profiling for the mock server.
+
+Enabled only when MOCK_PROFILE_DIR (or --profile-dir) names a directory;
+otherwise nothing is installed and requests pay nothing. Once enabled:
+
+    X-Profile: cprofile   (or Profile=cProfile / Profile=TRUE in the query)
+        Profile this request with cProfile and write a .pstats file
+        (python -m pstats, snakeviz, gprof2dot, ...).
+    X-Profile: sample     (or Profile=Sample)
+        Sample this request's stack every MOCK_PROFILE_INTERVAL ms
+        (default 5) and write a .folded file of collapsed stacks, one
+        "frame;frame;... count" line per stack, as flamegraph.pl,
+        speedscope and inferno read them.
+
+The response carries X-Profile-File naming the file, which is written
+once the body has been sent. A worker process writes at most MAX_FILES
+profiles; past that, requests are no longer profiled and carry no
+X-Profile-File.
+
+MOCK_PROFILE_SLOWEST=N (or --profile-slowest N) additionally samples
+every request and keeps the stacks of those among the slowest N percent
+for their path, judged against that path's last PROFILE_WINDOW requests.
+Sampling is a background thread reading the stacks of the threads busy
+with requests, so the requests themselves run unmodified.
+
+Streamed bodies are profiled while they are produced too, including when
+async_server.py pulls them from another thread.
+"""
+
+import collections
+import cProfile
+import itertools
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs
+
+SAMPLE_INTERVAL = 0.005  # seconds
+PROFILE_WINDOW = 1000    # recent requests per path the slowest-N% threshold is taken from
+MIN_OBSERVATIONS = 20    # requests on a path before any count as its slowest
+MAX_FILES = 1000
+
+
+def collapse(frame):
+    """Root-first "module.function" names of a frame's stack, ;-joined"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples the stacks of registered threads from a background thread"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._targets = {}  # thread id -> {collapsed stack: samples}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def register(self, counts):
+        """Sample the calling thread into `counts` until unregister()"""
+        self._ensure_running()
+        with self._cond:
+            self._targets[threading.get_ident()] = counts
+            self._cond.notify()
+
+    def unregister(self):
+        with self._cond:
+            self._targets.pop(threading.get_ident(), None)
+
+    def _ensure_running(self):
+        # Threads do not survive fork(); each worker process starts its own sampler
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._targets = {}
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._targets)
+                targets = dict(self._targets)
+            frames = sys._current_frames()
+            for thread_id, counts in targets.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = collapse(frame)
+                    counts[stack] = counts.get(stack, 0) + 1
+            del frames
+            time.sleep(self.interval)
+
+
+class SlowThreshold:
+    """Latency above which a request is among the slowest `percent` for its path"""
+
+    def __init__(self, percent):
+        self.percent = percent
+        self._lock = threading.Lock()
+        self._recent = {}      # path -> deque of its last PROFILE_WINDOW latencies
+        self._counts = {}      # path -> requests seen
+        self._thresholds = {}  # path -> latency threshold
+
+    def is_slow(self, path, latency):
+        with self._lock:
+            recent = self._recent.get(path)
+            if recent is None:
+                recent = self._recent[path] = collections.deque(maxlen=PROFILE_WINDOW)
+            recent.append(latency)
+            count = self._counts[path] = self._counts.get(path, 0) + 1
+            # Re-rank often while the window fills, then every 50 requests
+            if count < 200 or count % 50 == 0:
+                ordered = sorted(recent)
+                self._thresholds[path] = ordered[min(len(ordered) - 1, int(len(ordered) * (1 - self.percent / 100)))]
+            return count >= MIN_OBSERVATIONS and latency >= self._thresholds[path]
+
+
+class ProfiledRequest:
+    """One request's profile: a cProfile.Profile, or stack samples"""
+
+    def __init__(self, mode, sampler):
+        self.mode = mode
+        self.sampler = sampler
+        self.profile = cProfile.Profile() if mode == "cprofile" else None
+        self.stacks = {}
+
+    def start(self):
+        if self.profile is not None:
+            try:
+                self.profile.enable()
+                return
+            except ValueError:
+                # Another profiler owns this interpreter (Python 3.12+ allows one); sample instead
+                self.profile, self.mode = None, "sample"
+        self.sampler.register(self.stacks)
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        else:
+            self.sampler.unregister()
+
+
+class ProfiledBody:
+    """WSGI body wrapper that keeps profiling while the body is produced"""
+
+    def __init__(self, body, request, finish):
+        self.body = body
+        self.request = request
+        self.finish = finish
+        self.done = False
+
+    def __iter__(self):
+        iterator = iter(self.body)
+        while True:
+            self.request.start()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                self.request.stop()
+            yield chunk
+        self._finish()
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self._finish()
+
+    def _finish(self):
+        if not self.done:
+            self.done = True
+            self.finish()
+
+
+class RequestProfiler:
+    """WSGI middleware writing per-request profiles to `directory`"""
+
+    def __init__(self, app, directory, slowest=None, interval=SAMPLE_INTERVAL):
+        self.directory = directory
+        self.sampler = StackSampler(interval)
+        self.slow = SlowThreshold(slowest) if slowest else None
+        self._written = 0
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        app.wsgi_app = self._middleware(app.wsgi_app)
+
+    def requested_mode(self, environ):
+        """Mode the X-Profile header or Profile argument asks for: "cprofile", "sample" or None"""
+        value = environ.get("HTTP_X_PROFILE")
+        query = environ.get("QUERY_STRING", "")
+        if value is None and "Profile=" in query:
+            value = (parse_qs(query).get("Profile") or [None])[0]
+        if not value:
+            return None
+        value = value.strip().lower()
+        if value in ("sample", "sampling"):
+            return "sample"
+        if value in ("cprofile", "true", "1"):
+            return "cprofile"
+        return None
+
+    def _middleware(self, wsgi_app):
+        def middleware(environ, start_response):
+            mode = self.requested_mode(environ)
+            # Claim the file before announcing it: headers go out before it is written
+            if mode is not None and not self._reserve():
+                mode = None
+            if mode is None and self.slow is None:
+                return wsgi_app(environ, start_response)
+
+            started = time.perf_counter()
+            request = ProfiledRequest(mode or "sample", self.sampler)
+            request.start()
+            # After start(), which may have fallen back from cProfile to sampling
+            name = self._file_name(environ, request.mode) if mode else None
+
+            def announce(status, headers, exc_info=None):
+                return start_response(status, list(headers) + [("X-Profile-File", name)], exc_info)
+
+            try:
+                body = wsgi_app(environ, announce if mode else start_response)
+            finally:
+                request.stop()
+
+            def finish():
+                latency = time.perf_counter() - started
+                path = environ.get("PATH_INFO", "")
+                if mode is not None:
+                    self._write(name, request, environ, latency)
+                elif self.slow.is_slow(path, latency) and request.stacks and self._reserve():
+                    self._write(self._file_name(environ, "sample"), request, environ, latency)
+
+            return ProfiledBody(body, request, finish)
+
+        return middleware
+
+    def _file_name(self, environ, mode):
+        path = environ.get("PATH_INFO", "").strip("/").replace("/", "_") or "root"
+        extension = "pstats" if mode == "cprofile" else "folded"
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._sequence)}-{environ.get('REQUEST_METHOD', 'GET')}-{path}.{extension}"
+
+    def _reserve(self):
+        """Claim one of the MAX_FILES profiles; False once they are used up"""
+        with self._lock:
+            if self._written >= MAX_FILES:
+                return False
+            self._written += 1
+            if self._written == MAX_FILES:
+                print(f"[MOCK SERVER] Profiling the last of {MAX_FILES} requests to {self.directory}; not profiling more")
+            return True
+
+    def _write(self, name, request, environ, latency):
+        target = os.path.join(self.directory, name)
+        if request.profile is not None:
+            request.profile.dump_stats(target)
+        else:
+            with open(target, "w") as f:
+                for stack, count in sorted(request.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+        print(f"[MOCK SERVER] Profiled {environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')} "
+              f"({latency * 1000:.1f} ms) -> {target}")
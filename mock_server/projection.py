@@ -0,0 +1,53 @@
+"""
+Field projection (the Digifort `Fields` argument) for the mock server.
+
+Catalog and search endpoints accept Fields, a comma-separated list of the
+record fields to return, e.g. GetCameras?Fields=Name,Status. Names are
+matched to the records' camelCase keys case-insensitively, so the spec's
+PascalCase spelling works; unknown names are a 400. Without Fields every
+field is sent, as before.
+
+No projected copies of the records are made. Catalog-style lists keep
+each field as a column of encoded members and join a record's requested
+members into its JSON (CatalogCache.fragments in response_cache.py), once
+per catalog version and field set; the event store decodes only the
+requested columns (EventChunk.iter_dicts).
+
+The field set is sorted, which is also the order jsonify writes keys in,
+so "Fields=Status,Name" and "Fields=name,status" share one cache entry.
+"""
+
+# Spec fields, the 3D positioning fields and the mock's own status fields
+CAMERA_FIELDS = ("name", "description", "active", "model", "deviceType", "connectionAddress",
+                 "connectionPort", "latitude", "longitude", "memo", "mediaProfiles", "group",
+                 "x", "y", "z", "angle", "location", "status", "working", "recordingHours")
+GROUP_FIELDS = ("name", "cameras", "active")
+ANALYTICS_FIELDS = ("name", "active", "camera", "events", "working", "status", "statusMessage")
+COUNTER_FIELDS = ("id", "name", "configuration", "value", "lastReset")
+AUDIT_FIELDS = ("id", "timestamp", "category", "action", "user", "details", "ipAddress")
+
+
+def parse_fields(args, known):
+    """The `known` fields Fields asks for, sorted; None for all. Raises ValueError."""
+    value = args.get("Fields")
+    if not value:
+        return None
+    by_name = {field.lower(): field for field in known}
+    wanted = set()
+    for name in value.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        field = by_name.get(name.lower())
+        if field is None:
+            raise ValueError(f"Unknown field in Fields: {name}")
+        wanted.add(field)
+    if not wanted:
+        return None
+    return tuple(sorted(wanted))
+
+
+def cache_key(name, fields):
+    """CatalogCache key for a response projected to `fields`"""
+    return name if fields is None else f"{name}:{','.join(fields)}"
+
@@ -0,0 +1,174 @@
+"""
+Pre-serialized response cache for the mock server's catalog endpoints.
+
+Catalog responses (cameras, groups, analytics configurations, counters)
+are serialized once per catalog version and served as cached bytes with a
+content-derived ETag. Clients that send If-None-Match with the current
+ETag get a 304 without any serialization work. Mutating endpoints call
+bump() on the catalog they change, which invalidates its cached bodies
+and notifies change listeners (e.g. long-polling clients).
+
+Bodies are also kept compressed, per content coding the clients asked
+for (see compression.py), so a poll costs neither serialization nor
+compression while the catalog is unchanged; each coding gets its own ETag.
+
+Paged requests can't use a whole cached body; fragments() keeps each
+record of a catalog list encoded on its own instead, so a page is a join
+of cached strings.
+
+Field projection (see projection.py) works on encoded text too: each
+field of a list is kept as a column of encoded "key":value members, and a
+record with just the requested fields is a join of its members, so no
+projected dicts are built. Every field combination a client asks for is a
+cache entry of its own; each table keeps at most MAX_ENTRIES, dropping
+the least recently stored.
+"""
+
+import hashlib
+import threading
+
+from flask import current_app, request
+
+from compression import MIN_SIZE, add_vary, compress, negotiate
+from projection import cache_key
+
+MAX_ENTRIES = 256  # per table: bodies, fragment lists
+
+
+class CachedBody:
+    __slots__ = ("version", "body", "etag", "compressed")
+
+    def __init__(self, version, body, etag):
+        self.version = version
+        self.body = body
+        self.etag = etag
+        self.compressed = {}  # content coding -> body compressed with it
+
+    def encoded(self, coding):
+        """The body compressed with `coding`, compressing it on first use"""
+        body = self.compressed.get(coding)
+        if body is None:
+            body = self.compressed[coding] = compress(self.body, coding)
+        return body
+
+
+def encode(obj):
+    """Bytes jsonify would produce for obj, without the trailing newline"""
+    json = current_app.json
+    if hasattr(json, "encode"):
+        return json.encode(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def list_document(key, fragments):
+    """Bytes of {key: [...]} from the records' encoded fragments, as jsonify writes it"""
+    return b"{" + encode(key) + b":[" + ",".join(fragments).encode() + b"]}"
+
+
+class CatalogCache:
+    """Versioned byte cache keyed by response name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}  # catalog -> version number
+        self._entries = {}   # response key -> (version, CachedBody)
+        self._fragments = {}  # fragments key -> (version, [encoded record, ...])
+        self._columns = {}   # (list name, field) -> (version, ['"field":value' or None, ...])
+        self._listeners = []
+
+    def version(self, catalog):
+        return self._versions.get(catalog, 0)
+
+    def bump(self, catalog):
+        """Mark a catalog as changed so its cached responses are rebuilt"""
+        with self._lock:
+            version = self._versions[catalog] = self._versions.get(catalog, 0) + 1
+        for listener in self._listeners:
+            listener(catalog, version)
+
+    def add_listener(self, listener):
+        """Call listener(catalog, version) after every bump, on the bumping thread"""
+        self._listeners.append(listener)
+
+    def _put(self, table, key, version, value):
+        """Store (version, value) unless a slow builder lost to a newer version"""
+        with self._lock:
+            current = table.get(key)
+            if current is not None and current[0] > version:
+                return
+            table.pop(key, None)  # re-inserted as the most recently stored
+            table[key] = (version, value)
+            while len(table) > MAX_ENTRIES:
+                del table[next(iter(table))]
+
+    def get(self, key, catalog, build):
+        """Cached body for `key`, re-serializing build() if `catalog` moved on.
+
+        build() returns the response object, or its JSON bytes.
+        """
+        version = self.version(catalog)
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        body = build()
+        body = (body if isinstance(body, bytes) else encode(body)) + b"\n"
+        entry = CachedBody(version, body, hashlib.blake2b(body, digest_size=8).hexdigest())
+        self._put(self._entries, key, version, entry)
+        return entry
+
+    def fragments(self, name, catalog, build, fields=None):
+        """Each record of the list build() returns, JSON-encoded, cached per `catalog` version.
+
+        With `fields` (sorted, see projection.parse_fields) each record is
+        encoded with only those of its keys.
+        """
+        version = self.version(catalog)
+        key = cache_key(name, fields)
+        cached = self._fragments.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        if fields is None:
+            fragments = [encode(record).decode() for record in build()]
+        else:
+            columns = [self._column(name, version, build, field) for field in fields]
+            fragments = ["{" + ",".join([member for member in members if member is not None]) + "}"
+                         for members in zip(*columns)]
+        self._put(self._fragments, key, version, fragments)
+        return fragments
+
+    def _column(self, name, version, build, field):
+        """Encoded '"field":value' members of every record of a list (None where it has no such key)"""
+        cached = self._columns.get((name, field))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        prefix = encode(field).decode() + ":"
+        # Values are encoded inside a list so the encoder's checks see them in a value position
+        column = [prefix + encode([record[field]])[1:-1].decode() if field in record else None
+                  for record in build()]
+        self._put(self._columns, (name, field), version, column)
+        return column
+
+    def respond_list(self, name, list_key, catalog, build, fields=None):
+        """respond() with {list_key: build()}, its records cut down to `fields` if given"""
+        if fields is None:
+            return self.respond(name, catalog, lambda: {list_key: build()})
+        return self.respond(cache_key(name, fields), catalog,
+                            lambda: list_document(list_key, self.fragments(name, catalog, build, fields)))
+
+    def respond(self, key, catalog, build):
+        """Serve the cached body, or 304 when If-None-Match matches"""
+        entry = self.get(key, catalog, build)
+        coding = negotiate() if len(entry.body) >= MIN_SIZE else None
+        etag = entry.etag if coding is None else f"{entry.etag}-{coding}"
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        elif coding is None:
+            response = current_app.response_class(entry.body, mimetype=current_app.json.mimetype)
+        else:
+            response = current_app.response_class(entry.encoded(coding), mimetype=current_app.json.mimetype)
+            response.headers["Content-Encoding"] = coding
+        if len(entry.body) >= MIN_SIZE > 0:
+            add_vary(response)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
@@ -0,0 +1,119 @@
+"""
+JSON encoding for the mock server's responses.
+
+The Node proxy in server/routes.ts passes response bodies through, and
+cached bodies carry content-derived ETags, so every encoder here must
+produce exactly the bytes Flask's jsonify does with default settings:
+compact separators, sorted keys, ASCII only (\\uXXXX escapes) and the
+stdlib's float formatting. That holds for every value JSON can represent;
+NaN and Infinity are the exception (see below).
+
+orjson is optional (pip install -r requirements-optional.txt, or the
+"fast-json" extra); without it everything is encoded by the stdlib.
+
+FastJSONProvider is installed as the app's JSON provider, so jsonify,
+app.json.dumps and the streaming helpers all go through it. When orjson
+is installed it encodes first, and its output is used only if it cannot
+differ from the stdlib's. Anything else is encoded again with the stdlib:
+non-ASCII text (orjson writes raw UTF-8) and DEL (0x7f, which orjson
+writes raw and the stdlib as \\u007f), floats orjson formats
+differently (exponent form, or below 1e-4) and values orjson refuses,
+such as non-string keys or integers over 64 bits. The check is
+conservative: a string that merely looks like such a float only costs the
+slow path.
+
+The one exception is NaN and Infinity, which orjson writes as null. The
+stdlib writes them as bare NaN/Infinity tokens, which are not JSON and
+which the proxy's JSON.parse rejects, so no working client depends on
+those bytes; spotting them would mean walking every response.
+
+MOCK_JSON=stdlib turns orjson off.
+"""
+
+import functools
+import os
+import re
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COMPACT = (",", ":")
+
+# Floats orjson and the stdlib format differently, in a value position:
+# exponent form ("1e16", "1.5e-7") and below 1e-4 ("0.00001")
+STDLIB_ONLY = re.compile(rb"[:,\[]-?(?:\d+(?:\.\d+)?e|0\.0000)")
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def timed(method):
+    """Report the time an encoding method takes to the provider's on_encode hook"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.on_encode is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.on_encode(time.perf_counter() - started)
+    return wrapper
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider with an orjson fast path for compact output.
+
+    Not byte-identical for NaN and Infinity: the fast path writes null.
+    """
+
+    fast = orjson is not None and os.environ.get("MOCK_JSON", "").lower() != "stdlib"
+    on_encode = None  # called with the seconds each encode took (see metrics.py)
+
+    def _fast_bytes(self, obj):
+        """orjson's encoding of obj, or None where the stdlib must decide"""
+        if not (self.fast and self.sort_keys and self.ensure_ascii):
+            return None
+        try:
+            data = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+        except TypeError:  # orjson.JSONEncodeError included
+            return None
+        if not data.isascii() or b"\x7f" in data or STDLIB_ONLY.search(data):
+            return None
+        return data
+
+    @timed
+    def encode(self, obj):
+        """Compact JSON bytes, as jsonify writes them (without the newline)"""
+        data = self._fast_bytes(obj)
+        if data is None:
+            data = super().dumps(obj, separators=COMPACT).encode()
+        return data
+
+    @timed
+    def encode_items(self, items):
+        """Compact JSON of each item, comma-joined, to splice into an array"""
+        items = items if isinstance(items, list) else list(items)
+        data = self._fast_bytes(items)
+        if data is None:
+            return super().dumps(items, separators=COMPACT)[1:-1]
+        return data[1:-1].decode("ascii")
+
+    @timed
+    def dumps(self, obj, **kwargs):
+        if kwargs == {"separators": COMPACT}:
+            data = self._fast_bytes(obj)
+            if data is not None:
+                return data.decode("ascii")
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,162 @@
+"""
+Production entry point for the mock server.
+
+`python app.py` runs Flask's single-threaded development server. This
+module serves the same app with a real WSGI server instead:
+
+    gunicorn   - if installed (Linux/macOS): pre-forked workers, each with a
+                 thread pool (gthread) and HTTP keep-alive
+    waitress   - if installed: one process, a thread pool
+    werkzeug   - fallback: the threaded development server
+    asyncio    - only when asked for: the event-loop front end in
+                 async_server.py, for many idle/long-polling clients
+
+Usage:
+    python serve.py --workers 4 --threads 8 --keep-alive 5
+    python main.py ...          (from the repo root, same arguments)
+
+Every option can also be set from the environment: PORT, HOST,
+WEB_CONCURRENCY (workers), MOCK_THREADS, MOCK_KEEP_ALIVE, MOCK_SERVER
+(force gunicorn/waitress/werkzeug/asyncio), MOCK_FLEET, MOCK_SNAPSHOT, MOCK_DB,
+MOCK_LIVE_RATE, MOCK_PROFILE_DIR and MOCK_PROFILE_SLOWEST. A snapshot built with snapshot.py makes large datasets
+start in well under a second.
+
+State across workers: the mock data lives in process memory. With
+gunicorn the app is loaded once in the master before forking (preload),
+so every worker starts from the same cameras and event history and shares
+those pages copy-on-write. After that each worker's state is its own:
+Activation, ResetCounter and bookmark changes are only visible to
+requests served by the worker that handled them (with --db they are also
+saved, and every worker picks them up on the next restart), and with a
+live feed enabled every worker runs its own producer. Use --workers 1
+(and more threads) when a client needs to read back its own writes.
+"""
+
+import argparse
+import os
+import sys
+
+SERVERS = ("gunicorn", "waitress", "werkzeug")  # in order of preference
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Digifort mock API with a production WSGI server")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8089)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)),
+                        help="worker processes (gunicorn only)")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("MOCK_THREADS", 8)),
+                        help="request threads per worker")
+    parser.add_argument("--keep-alive", type=int, default=int(os.environ.get("MOCK_KEEP_ALIVE", 5)),
+                        help="seconds to hold idle keep-alive connections open")
+    parser.add_argument("--server", choices=SERVERS + ("asyncio",), default=os.environ.get("MOCK_SERVER"),
+                        help="WSGI server to use (default: first one installed)")
+    parser.add_argument("--fleet", default=os.environ.get("MOCK_FLEET"),
+                        help="generate SITESxBUILDINGSxCAMERAS cameras instead of the demo catalog")
+    parser.add_argument("--snapshot", default=os.environ.get("MOCK_SNAPSHOT"),
+                        help="load cameras and events from a snapshot directory (see snapshot.py)")
+    parser.add_argument("--db", default=os.environ.get("MOCK_DB"),
+                        help="keep bookmarks, counters and camera activation in this SQLite file")
+    parser.add_argument("--live-rate", default=os.environ.get("MOCK_LIVE_RATE"),
+                        help="append this many live events per second (default: off)")
+    parser.add_argument("--profile-dir", default=os.environ.get("MOCK_PROFILE_DIR"),
+                        help="allow per-request profiling, writing profiles here (see profiling.py)")
+    parser.add_argument("--profile-slowest", default=os.environ.get("MOCK_PROFILE_SLOWEST"),
+                        help="also profile the slowest PERCENT of requests per path")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.threads < 1 or args.keep_alive < 0:
+        parser.error("--workers and --threads must be at least 1, --keep-alive must not be negative")
+    return args
+
+
+def pick_server(requested=None):
+    """Name of the WSGI server to use: `requested`, else the first one installed"""
+    for name in ((requested,) if requested else SERVERS):
+        if name in ("werkzeug", "asyncio"):
+            return name
+        if name == "gunicorn" and sys.platform == "win32":
+            continue
+        try:
+            __import__(name)
+        except ImportError:
+            continue
+        return name
+    raise SystemExit(f"[MOCK SERVER] {requested} is not installed")
+
+
+def load_app():
+    # app.py reads its startup options from the environment when imported
+    from app import app
+    return app
+
+
+def run_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class MockServerApplication(BaseApplication):
+        def load_config(self):
+            settings = {
+                "bind": f"{args.host}:{args.port}",
+                "workers": args.workers,
+                "threads": args.threads,
+                "worker_class": "gthread",
+                "keepalive": args.keep_alive,
+                "preload_app": True,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app()
+
+    MockServerApplication().run()
+
+
+def run_waitress(args):
+    from waitress import serve
+
+    serve(load_app(), host=args.host, port=args.port, threads=args.threads,
+          channel_timeout=max(args.keep_alive, 1))
+
+
+def run_werkzeug(args):
+    from werkzeug.serving import WSGIRequestHandler, run_simple
+
+    # HTTP/1.1 keeps connections alive between requests
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    run_simple(args.host, args.port, load_app(), threaded=True)
+
+
+def run_asyncio(args):
+    from async_server import main as serve_async
+
+    serve_async(["--host", args.host, "--port", str(args.port), "--threads", str(args.threads),
+                 "--keep-alive", str(args.keep_alive)])
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.fleet:
+        os.environ["MOCK_FLEET"] = args.fleet
+    if args.snapshot:
+        os.environ["MOCK_SNAPSHOT"] = args.snapshot
+    if args.db:
+        os.environ["MOCK_DB"] = args.db
+    if args.live_rate:
+        os.environ["MOCK_LIVE_RATE"] = args.live_rate
+    if args.profile_dir:
+        os.environ["MOCK_PROFILE_DIR"] = args.profile_dir
+    if args.profile_slowest:
+        os.environ["MOCK_PROFILE_SLOWEST"] = args.profile_slowest
+    server = pick_server(args.server)
+    if args.workers > 1 and server != "gunicorn":
+        print(f"[MOCK SERVER] {server} runs a single process; ignoring --workers {args.workers}")
+    if server == "werkzeug" and not args.server:
+        print("[MOCK SERVER] gunicorn/waitress not installed; using the threaded development server")
+    print(f"[MOCK SERVER] Serving on {args.host}:{args.port} with {server}")
+    runners = {"gunicorn": run_gunicorn, "waitress": run_waitress, "werkzeug": run_werkzeug, "asyncio": run_asyncio}
+    runners[server](args)
+
+
+if __name__ == "__main__":
+    main()
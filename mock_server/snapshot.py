@@ -0,0 +1,70 @@
+"""
+Binary dataset snapshots for fast mock server startup.
+
+Generating a large dataset (--fleet, MOCK_EVENTS) at every boot costs
+seconds. A snapshot is a directory holding the camera catalog (pickle) and
+the event store's columns and posting lists (.npy files, see
+EventStore.save). When MOCK_SNAPSHOT names one, app.py loads it instead of
+generating anything: the events are memory-mapped, so a 1M-event,
+100k-camera snapshot opens in a fraction of a second.
+
+Build one with the same options the server takes:
+
+    python snapshot.py data/big --fleet 100x10x100 --events 1000000
+    MOCK_SNAPSHOT=data/big python serve.py
+
+Event timestamps are stored as generated, so a snapshot serves the 24
+hours before it was built. Snapshots are trusted local files: the camera
+catalog is unpickled, so never load one from an untrusted source.
+"""
+
+import argparse
+import gc
+import os
+import pickle
+
+from event_store import EventStore
+
+CAMERAS_FILE = "cameras.pickle"
+
+
+def save_snapshot(path, cameras, groups, events):
+    """Write cameras, groups and an EventStore to directory `path`"""
+    events.save(path)
+    with open(os.path.join(path, CAMERAS_FILE), "wb") as f:
+        pickle.dump((cameras, groups), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_snapshot(path):
+    """Return (cameras, groups, EventStore) from a snapshot directory"""
+    with open(os.path.join(path, CAMERAS_FILE), "rb") as f:
+        # Unpickling many small dicts triggers pointless GC passes
+        gc.disable()
+        try:
+            cameras, groups = pickle.load(f)
+        finally:
+            gc.enable()
+    return cameras, groups, EventStore.load(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a mock server dataset snapshot")
+    parser.add_argument("path", help="directory to write the snapshot to")
+    parser.add_argument("--fleet", help="generate SITESxBUILDINGSxCAMERAS cameras instead of the demo catalog")
+    parser.add_argument("--events", type=int, help="number of events to generate (default: MOCK_EVENTS or 50)")
+    args = parser.parse_args(argv)
+
+    # app.py builds its dataset from the environment when imported
+    os.environ.pop("MOCK_SNAPSHOT", None)
+    if args.fleet:
+        os.environ["MOCK_FLEET"] = args.fleet
+    if args.events is not None:
+        os.environ["MOCK_EVENTS"] = str(args.events)
+    import app
+
+    save_snapshot(args.path, app.mock_cameras, app.mock_groups, app.mock_events)
+    print(f"[MOCK SERVER] Wrote snapshot of {len(app.mock_cameras)} cameras and {len(app.mock_events)} events to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Thread-safe mutable state for the mock server.
+
+Mutable collections (bookmarks, counters) are copy-on-write: the current
+contents are an immutable tuple that readers grab with snapshot() without
+taking any lock, and writers build a new tuple under a lock and swap it in
+with a single attribute assignment. Readers therefore never block and
+never see a half-applied change; writers serialize only with each other,
+so concurrent adds and deletes cannot lose each other's updates.
+
+Records are never mutated in place either: an update replaces the record
+dict with a changed copy, so a response that is serializing the old one
+stays consistent.
+
+Lazy holds state that is expensive to build and not needed by every
+request (indexes, generated logs), so startup does not pay for it.
+"""
+
+import threading
+
+
+class SnapshotList:
+    """Copy-on-write list of record dicts keyed by `key`"""
+
+    def __init__(self, items=(), key="id"):
+        self._items = tuple(items)
+        self._key = key
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def snapshot(self):
+        """The current records as an immutable tuple (lock-free)"""
+        return self._items
+
+    def get(self, record_id):
+        for item in self._items:
+            if item[self._key] == record_id:
+                return item
+        return None
+
+    def get_many(self, record_ids):
+        """{id: record} for the given ids that exist, in one pass"""
+        wanted = set(record_ids)
+        return {item[self._key]: item for item in self._items if item[self._key] in wanted}
+
+    def prepend(self, item):
+        with self._lock:
+            self._items = (item,) + self._items
+        return item
+
+    def prepend_many(self, items):
+        """Prepend records in one swap, newest (last given) first, as repeated prepend() would"""
+        items = tuple(items)
+        with self._lock:
+            self._items = items[::-1] + self._items
+        return items
+
+    def remove(self, record_id):
+        """Remove the record with this id; returns it, or None if absent"""
+        with self._lock:
+            items = self._items
+            for position, item in enumerate(items):
+                if item[self._key] == record_id:
+                    self._items = items[:position] + items[position + 1:]
+                    return item
+        return None
+
+    def update(self, record_id, changes):
+        """Replace the record with this id by a copy with `changes` applied.
+
+        Returns the new record, or None if there is no such record.
+        """
+        with self._lock:
+            items = self._items
+            for position, item in enumerate(items):
+                if item[self._key] == record_id:
+                    updated = {**item, **changes}
+                    self._items = items[:position] + (updated,) + items[position + 1:]
+                    return updated
+        return None
+
+    def update_many(self, record_ids, changes):
+        """update() for several ids in one swap; the new record or None for each id"""
+        with self._lock:
+            items = list(self._items)
+            positions = {item[self._key]: position for position, item in enumerate(items)}
+            results = []
+            for record_id in record_ids:
+                position = positions.get(record_id)
+                if position is None:
+                    results.append(None)
+                    continue
+                items[position] = {**items[position], **changes}
+                results.append(items[position])
+            self._items = tuple(items)
+        return results
+
+
+class Lazy:
+    """A value built by `factory` on first use; call the Lazy to get it.
+
+    The factory runs once even when several threads ask at the same time.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._value = self._factory()
+                    self._built = True
+        return self._value
+
+    @property
+    def built(self):
+        return self._built
@@ -0,0 +1,149 @@
+"""
+Inverted text index for the mock server's keyword searches.
+
+Audit Search and Bookmarks Search used to lowercase every record's text
+fields on every request and substring-match the keyword. TextIndex instead
+tokenizes each record once, when it is added, into lowercase words and
+keeps word -> {document: occurrences} postings plus a sorted vocabulary.
+
+A query is split into words the same way. Each query word matches every
+indexed word it is a prefix of ("log" finds "login" and "logs"), and a
+document must match all query words. Scores add up, per matched word,
+occurrences x idf, so rare words weigh more than common ones; search()
+returns {document: score} and callers either keep their usual order or
+sort by score for relevance ordering.
+
+Documents are whatever hashable keys the caller uses (list positions,
+record ids). One lock covers writes and searches: both are short, and it
+keeps a search from seeing postings mid-update.
+"""
+
+import bisect
+import math
+import re
+import threading
+
+WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """Lowercase words of `text` (letters and digits; punctuation and _ split words).
+
+    Numbers are indexed as their digits; other non-string values (null,
+    lists, objects sent as a title) have no words.
+    """
+    if isinstance(text, (int, float)):
+        text = str(text)
+    return WORD.findall(text.lower()) if isinstance(text, str) else []
+
+
+class TextIndex:
+    """Word postings over the `fields` of a set of record dicts"""
+
+    def __init__(self, fields, records=()):
+        self.fields = fields
+        self._postings = {}   # word -> {document: occurrences}
+        self._documents = {}  # document -> its words, for remove()
+        self._vocabulary = []  # sorted words, for prefix lookup
+        self._new_words = []   # words not yet merged into _vocabulary
+        self._known = set()    # every word ever indexed
+        self._lock = threading.Lock()
+        with self._lock:
+            for document, record in records:
+                self._add(document, record)
+            self._merge_new_words()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, document, record):
+        with self._lock:
+            self._add(document, record)
+
+    def add_many(self, items):
+        """add() for (document, record) pairs under one lock acquisition"""
+        with self._lock:
+            for document, record in items:
+                self._add(document, record)
+
+    def remove(self, document):
+        with self._lock:
+            self._remove(document)
+
+    def _add(self, document, record):
+        if document in self._documents:
+            self._remove(document)
+        words = {}
+        for field in self.fields:
+            for word in tokenize(record.get(field)):
+                words[word] = words.get(word, 0) + 1
+        for word, count in words.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                if word not in self._known:
+                    self._known.add(word)
+                    self._new_words.append(word)
+            postings[document] = count
+        self._documents[document] = tuple(words)
+
+    def _remove(self, document):
+        for word in self._documents.pop(document, ()):
+            postings = self._postings[word]
+            postings.pop(document, None)
+            if not postings:
+                # The word stays in the vocabulary; lookups just find no postings
+                del self._postings[word]
+
+    def _merge_new_words(self):
+        if self._new_words:
+            # Timsort merges the sorted run and the new words in about linear time
+            self._vocabulary.extend(self._new_words)
+            self._vocabulary.sort()
+            self._new_words = []
+
+    def _words_with_prefix(self, prefix):
+        self._merge_new_words()
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        stop = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff", start)
+        return self._vocabulary[start:stop]
+
+    def search(self, query):
+        """{document: score} of documents matching every word of `query`.
+
+        Returns None when the query has no words at all, meaning "no
+        keyword filter", so callers can tell it apart from no matches.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return None
+        with self._lock:
+            total = len(self._documents) or 1
+            term_postings = []
+            for term in terms:
+                postings = [p for p in map(self._postings.get, self._words_with_prefix(term)) if p]
+                weighted = [(p, math.log(1 + total / len(p))) for p in postings]
+                term_postings.append((sum(map(len, postings)), weighted))
+            # Intersect starting from the term with the fewest postings; once
+            # the candidates are few, probe them instead of walking postings
+            term_postings.sort(key=lambda item: item[0])
+            scores = None
+            for size, weighted in term_postings:
+                matches = {}
+                if scores is None or size <= len(scores) * len(weighted):
+                    for postings, idf in weighted:
+                        for document, count in postings.items():
+                            if scores is None or document in scores:
+                                matches[document] = matches.get(document, 0) + count * idf
+                else:
+                    for document in scores:
+                        for postings, idf in weighted:
+                            count = postings.get(document)
+                            if count:
+                                matches[document] = matches.get(document, 0) + count * idf
+                if scores is not None:
+                    matches = {document: scores[document] + score for document, score in matches.items()}
+                scores = matches
+                if not scores:
+                    break
+            return scores
@@ -0,0 +1,120 @@
+"""
+Concurrency stress test for the mock server's mutable state.
+
+Hammers the app in-process from many threads with a mix of bookmark adds
+and deletes, camera activations, counter resets and the matching reads,
+then checks that no update was lost and no reader saw a torn record:
+
+    python stress_mock_server.py [--threads 16] [--requests 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server"))
+
+import app as mock  # noqa: E402
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--threads", type=int, default=16)
+parser.add_argument("--requests", type=int, default=20000, help="total requests across all threads")
+args = parser.parse_args()
+
+cameras = sorted({c["name"] for c in mock.mock_cameras})
+counter_ids = [c["id"] for c in mock.mock_counters.snapshot()]
+initial_bookmarks = {b["id"] for b in mock.mock_bookmarks.snapshot()}
+
+added = [set() for _ in range(args.threads)]
+deleted = [set() for _ in range(args.threads)]
+last_action = [{} for _ in range(args.threads)]  # camera -> activate?
+errors = []
+start_gate = threading.Barrier(args.threads)
+
+
+def check_camera(camera):
+    # Untouched cameras are still "recording"; a toggled one must be all-new or all-old
+    statuses = ("online", "recording") if camera["active"] else ("offline",)
+    if camera["status"] not in statuses or camera["working"] != camera["active"]:
+        errors.append(f"torn camera record: {camera}")
+
+
+def worker(n):
+    rng = random.Random(n)
+    client = mock.app.test_client()
+    # Each thread owns a disjoint slice of the cameras, so the final state
+    # of every camera is known even though threads run interleaved
+    own_cameras = cameras[n::args.threads]
+    start_gate.wait()
+    for i in range(args.requests // args.threads):
+        op = rng.random()
+        if op < 0.25:
+            r = client.post("/Interface/Cameras/Bookmarks/Add", json={"title": f"stress {n}-{i}", "color": "red", "remarks": "stress"})
+            added[n].add(r.get_json()["bookmark"]["id"])
+        elif op < 0.40 and added[n] - deleted[n]:
+            bookmark_id = rng.choice(sorted(added[n] - deleted[n]))
+            r = client.post("/Interface/Cameras/Bookmarks/Delete", json={"id": bookmark_id})
+            if r.status_code != 200:
+                errors.append(f"delete of {bookmark_id} lost: {r.status_code}")
+            deleted[n].add(bookmark_id)
+        elif op < 0.55 and own_cameras:
+            camera = rng.choice(own_cameras)
+            activate = rng.random() < 0.5
+            client.post("/Interface/Cameras/Activation", json={"camera": camera, "action": "activate" if activate else "deactivate"})
+            last_action[n][camera] = activate
+        elif op < 0.60:
+            client.post("/Interface/Analytics/ResetCounter", json={"counterId": rng.choice(counter_ids)})
+        elif op < 0.75:
+            client.get("/Interface/Cameras/Bookmarks/Search?Keyword=stress&Limit=50").get_json()
+        elif op < 0.90:
+            for camera in client.get("/Interface/Cameras/GetCameras").get_json()["Cameras"]:
+                check_camera(camera)
+        else:
+            client.get("/Interface/Dashboard/Stats").get_json()
+
+
+print("Stress testing mock server state...")
+print("=" * 60)
+
+threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+started = time.perf_counter()
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+elapsed = time.perf_counter() - started
+total = args.requests // args.threads * args.threads
+print(f"✓ {total} requests from {args.threads} threads in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+
+# Every add and delete must be visible, from the store and through the API
+expected_ids = initial_bookmarks | set().union(*added) - set().union(*deleted)
+stored_ids = {b["id"] for b in mock.mock_bookmarks.snapshot()}
+client = mock.app.test_client()
+served_ids = {b["id"] for b in client.get("/Interface/Cameras/Bookmarks/Search").get_json()["Bookmarks"]}
+if stored_ids != expected_ids or served_ids != expected_ids:
+    errors.append(f"bookmarks: expected {len(expected_ids)}, stored {len(stored_ids)}, served {len(served_ids)}")
+
+# Each camera must end in the state of the last request that touched it
+served = {}
+for camera in client.get("/Interface/Cameras/GetCameras").get_json()["Cameras"]:
+    served.setdefault(camera["name"], camera)
+for actions in last_action:
+    for name, active in actions.items():
+        if served[name]["active"] != active or mock.camera_index().get(name)["active"] != active:
+            errors.append(f"camera {name}: expected active={active}, got {served[name]['active']}")
+
+# Running counters must agree with a full recount
+stats = client.get("/Interface/Dashboard/Stats?SelfCheck=TRUE").get_json()
+if not stats["selfCheck"]["consistent"]:
+    errors.append(f"dashboard counters drifted: {stats['selfCheck']['mismatches']}")
+
+if errors:
+    print(f"✗ {len(errors)} problem(s):")
+    for error in errors[:20]:
+        print(f"  - {error}")
+else:
+    print(f"✓ No lost updates: {len(expected_ids)} bookmarks, {sum(map(len, last_action))} cameras toggled, counters consistent")
+print("=" * 60)
+sys.exit(1 if errors else 0)
@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Enough events and audit entries for paging to span several pages
+os.environ.setdefault("MOCK_EVENTS", "3000")
+os.environ.setdefault("MOCK_AUDIT_LOGS", "300")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The mock server's modules import each other by plain name, as when run from mock_server/;
+# the benchmark script lives at the top level
+sys.path.insert(0, os.path.join(ROOT, "mock_server"))
+sys.path.insert(1, ROOT)
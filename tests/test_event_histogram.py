@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from event_generator import generate_event_chunks
+from event_histogram import MINUTE, EventHistogram
+from event_store import EventStore
+
+RETENTION = 24 * 60
+
+
+def group_of(camera):
+    return f"G-{camera}"
+
+
+def store_over(days, count, seed=1):
+    now = datetime.now()
+    store = EventStore()
+    for chunk in generate_event_chunks(count, ["a", "b", "c"], start=now - timedelta(days=days), end=now, seed=seed):
+        store.extend_chunk(chunk)
+    return store
+
+
+def assert_counts_match(histogram, store, windows=200):
+    """Random windows of retained minutes count what a scan of the store counts"""
+    minutes = store.column("timestamp") // MINUTE
+    types = store.column("event_type")
+    state = histogram._state
+    rng = np.random.default_rng(0)
+    for _ in range(windows):
+        start, stop = sorted(rng.integers(state.base, state.filled + 2, 2))
+        by_type, _ = histogram.counts([start, stop])
+        expected = np.bincount(types[(minutes >= start) & (minutes < stop)], minlength=by_type.shape[1])
+        assert by_type[0].tolist() == expected.tolist()
+
+
+def test_counts_match_a_scan():
+    store = store_over(days=1, count=5000)
+    assert_counts_match(EventHistogram(store, group_of), store)
+
+
+@pytest.mark.parametrize("days", [3, 10])
+def test_replaying_more_history_than_retained(days):
+    store = store_over(days=days, count=20000)
+    histogram = EventHistogram(store, group_of, retention_minutes=RETENTION)
+    state = histogram._state
+    minutes = store.column("timestamp") // MINUTE
+    assert state.base > int(minutes[0])
+    # Dropped minutes end up in the floor, not in the wrong rows
+    assert int(state.floor_types.sum()) == int((minutes < state.base).sum())
+    assert_counts_match(histogram, store)
+
+
+def test_append_spanning_more_than_retained():
+    now = datetime.now()
+    store = EventStore()
+    store.extend_chunk(next(generate_event_chunks(100, ["a"], start=now - timedelta(days=10),
+                                                  end=now - timedelta(days=9), seed=1)))
+    histogram = EventHistogram(store, group_of, retention_minutes=RETENTION)
+    # One append covering five days, then ordinary ones
+    chunks = list(generate_event_chunks(8000, ["a", "b", "d"], start=now - timedelta(days=8), end=now,
+                                        seed=2, chunk_size=5000))
+    for chunk in chunks:
+        store.extend_chunk(chunk)
+    assert_counts_match(histogram, store)
+
+    replayed = EventHistogram(store, group_of, retention_minutes=RETENTION)
+    edges = np.arange(replayed._state.base, replayed._state.filled + 2)
+    for incremental, fresh in zip(histogram.counts(edges), replayed.counts(edges)):
+        assert incremental.tolist() == fresh.tolist()
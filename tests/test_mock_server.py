@@ -0,0 +1,1113 @@
+"""
+Behaviour tests for the mock server's routes, through Flask's test client.
+
+The app module is imported once and its state is shared, so tests that
+change it (activation, bookmarks, counters) pick records no other test
+relies on, or assert relative to what they read first.
+"""
+
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+import gzip
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+
+from flask import Flask
+import numpy as np
+import pytest
+
+import app as server
+import async_server
+import benchmark_mock_server as benchmark
+from camera_positions import RULE_TABLES, generate_high_school_position, resolve_position
+import compression
+from event_generator import event_vocabulary, generate_event_chunks, random_chunk
+from event_store import EventStore
+from fleet import generate_fleet, parse_fleet_spec
+import metrics
+from persistence import StateDB
+import profiling
+from projection import CAMERA_FIELDS
+import response_cache
+import serve
+from serialization import FastJSONProvider
+from snapshot import load_snapshot, save_snapshot
+from state import Lazy
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+def get_json(client, url, status=200, **kwargs):
+    response = client.get(url, **kwargs)
+    assert response.status_code == status, response.get_data()
+    return response.get_json()
+
+
+# Analytics Search ------------------------------------------------------------
+
+def all_events(client):
+    return get_json(client, "/Interface/Analytics/Search")["Events"]
+
+
+def test_search_returns_every_event_newest_first(client):
+    events = all_events(client)
+    assert len(events) == len(server.mock_events)
+    timestamps = [e["timestamp"] for e in events]
+    assert timestamps == sorted(timestamps, reverse=True)
+
+
+def test_search_filters_by_date_camera_and_event_type(client):
+    events = all_events(client)
+    day = events[-1]["timestamp"][:10]
+    body = get_json(client, f"/Interface/Analytics/Search?StartDate={day.replace('-', '.')}&EndDate={day}")
+    assert body["Events"] == [e for e in events if e["timestamp"][:10] == day]
+
+    cameras = sorted({e["camera"] for e in events})[:2]
+    body = get_json(client, f"/Interface/Analytics/Search?Cameras={','.join(cameras)}")
+    assert body["Events"] == [e for e in events if e["camera"] in cameras]
+
+    body = get_json(client, "/Interface/Analytics/Search?EventTypes=MOTION,INTRUSION")
+    assert body["Events"] == [e for e in events if e["eventType"] in ("MOTION", "INTRUSION")]
+
+
+def test_search_rejects_invalid_dates(client):
+    body = get_json(client, "/Interface/Analytics/Search?StartDate=yesterday", status=400)
+    assert body == {"success": False, "error": "Invalid StartDate/EndDate"}
+
+
+# Synthetic event generator ---------------------------------------------------------
+
+def test_generated_chunks_hold_count_events_in_time_order():
+    chunks = list(generate_event_chunks(2500, ["a", "b"], chunk_size=1000, seed=3))
+    assert sum(len(chunk) for chunk in chunks) == 2500
+    timestamps = np.concatenate([chunk.timestamp for chunk in chunks])
+    assert (np.diff(timestamps) >= 0).all()
+    assert {e["camera"] for chunk in chunks for e in chunk.iter_dicts(("camera",))} == {"a", "b"}
+
+
+def test_generator_seed_repeats_the_events():
+    start, end = datetime(2024, 12, 1), datetime(2024, 12, 2)
+    first = [e for c in generate_event_chunks(300, ["a"], start, end, seed=9) for e in c.iter_dicts()]
+    again = [e for c in generate_event_chunks(300, ["a"], start, end, seed=9) for e in c.iter_dicts()]
+    assert first == again
+    assert len({e["id"] for e in first}) == 300
+
+
+def test_generator_needs_cameras():
+    with pytest.raises(ValueError):
+        next(generate_event_chunks(10, []))
+
+
+# Columnar event store ----------------------------------------------------------
+
+def test_event_store_round_trips_event_dicts():
+    events = server.mock_events.materialize(range(200))
+    store = EventStore(events)
+    assert len(store) == 200
+    assert list(store) == events[::-1]
+    assert store.count(["MOTION"]) == store.recount(["MOTION"]) == sum(e["eventType"] == "MOTION" for e in events)
+
+
+def test_event_store_materializes_only_requested_fields():
+    rows = server.mock_events.search_rows(limit=5)
+    full = server.mock_events.materialize(rows)
+    projected = server.mock_events.materialize(rows, ("camera", "eventType"))
+    assert projected == [{"camera": e["camera"], "eventType": e["eventType"]} for e in full]
+
+
+# Offset/Limit/Cursor paging ----------------------------------------------------
+
+def walk_pages(client, url, key, limit):
+    records, cursor = [], None
+    while True:
+        query = f"Limit={limit}" + (f"&Cursor={cursor}" if cursor else "")
+        body = get_json(client, f"{url}{'&' if '?' in url else '?'}{query}")
+        assert body["Limit"] == limit
+        assert len(body[key]) <= limit
+        records += body[key]
+        cursor = body["NextCursor"]
+        if cursor is None:
+            return records
+
+
+@pytest.mark.parametrize("url, key", [
+    ("/Interface/Cameras/GetCameras", "Cameras"),
+    ("/Interface/Analytics/Search", "Events"),
+    ("/Interface/Analytics/Search?EventTypes=MOTION", "Events"),
+    ("/Interface/Audit/Search", "AuditLogs"),
+])
+def test_cursor_walk_returns_the_unpaged_list(client, url, key):
+    full = get_json(client, url)[key]
+    assert "NextCursor" not in get_json(client, url)
+    assert len(full) > 3
+    assert walk_pages(client, url, key, len(full) // 3) == full
+
+
+def test_offset_and_limit_slice_the_list(client):
+    full = get_json(client, "/Interface/Audit/Search")["AuditLogs"]
+    body = get_json(client, "/Interface/Audit/Search?Offset=10&Limit=5")
+    assert body["AuditLogs"] == full[10:15]
+    assert body["Offset"] == 10
+    assert body["NextCursor"] is not None
+    body = get_json(client, f"/Interface/Audit/Search?Offset={len(full) - 2}&Limit=5")
+    assert body["AuditLogs"] == full[-2:]
+    assert body["NextCursor"] is None
+
+
+@pytest.mark.parametrize("query, error", [
+    ("Offset=x", "Offset must be an integer"),
+    ("Limit=-1", "Limit must not be negative"),
+    ("Cursor=not-a-cursor", "Invalid Cursor"),
+])
+def test_invalid_paging_arguments_are_rejected(client, query, error):
+    for url in ("/Interface/Cameras/GetCameras", "/Interface/Analytics/Search"):
+        body = get_json(client, f"{url}?{query}", status=400)
+        assert body == {"success": False, "error": error}
+
+
+@pytest.mark.parametrize("url, key", [
+    ("/Interface/Cameras/GetCameras", "Cameras"),
+    ("/Interface/Analytics/Search", "Events"),
+    ("/Interface/Audit/Search", "AuditLogs"),
+    ("/Interface/Cameras/Bookmarks/Search", "Bookmarks"),
+])
+def test_empty_page_has_no_next_cursor(client, url, key):
+    body = get_json(client, f"{url}?Offset=1&Limit=0")
+    assert body[key] == []
+    assert body["NextCursor"] is None
+
+
+def test_cursor_from_another_endpoint_is_rejected(client):
+    cursor = get_json(client, "/Interface/Cameras/GetCameras?Limit=1")["NextCursor"]
+    body = get_json(client, f"/Interface/Analytics/Search?Cursor={cursor}", status=400)
+    assert body == {"success": False, "error": "Cursor does not belong to this endpoint"}
+
+
+# ETag revalidation ---------------------------------------------------------------
+
+def unique_camera(client):
+    cameras = get_json(client, "/Interface/Cameras/GetCameras")["Cameras"]
+    names = [c["name"] for c in cameras]
+    return next(c for c in cameras if names.count(c["name"]) == 1)
+
+
+def set_activation(client, name, active):
+    response = client.post("/Interface/Cameras/Activation",
+                           json={"camera": name, "action": "activate" if active else "deactivate"})
+    assert response.status_code == 200, response.get_data()
+    return response.get_json()["camera"]
+
+
+@pytest.mark.parametrize("url", [
+    "/Interface/Cameras/GetCameras",
+    "/Interface/Cameras/GetGroups",
+    "/Interface/Analytics/GetAnalyticsConfigurations",
+    "/Interface/Analytics/GetCounters",
+])
+def test_catalog_etag_revalidates_with_304(client, url):
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "no-cache"
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b""
+    assert revalidated.headers["ETag"] == etag
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_activation_changes_the_cameras_etag(client):
+    camera = unique_camera(client)
+    etag = client.get("/Interface/Cameras/GetCameras").headers["ETag"]
+    try:
+        assert set_activation(client, camera["name"], not camera["active"])["active"] is not camera["active"]
+        response = client.get("/Interface/Cameras/GetCameras", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        changed = next(c for c in response.get_json()["Cameras"] if c["name"] == camera["name"])
+        assert changed["active"] is not camera["active"]
+    finally:
+        set_activation(client, camera["name"], camera["active"])
+
+
+# Camera index ------------------------------------------------------------------
+
+def test_get_status_looks_cameras_up_by_name(client):
+    cameras = get_json(client, "/Interface/Cameras/GetCameras")["Cameras"]
+    wanted = {cameras[0]["name"], cameras[-1]["name"]}
+    body = get_json(client, f"/Interface/Cameras/GetStatus?Cameras={','.join(wanted)},NO-SUCH-CAMERA")
+    assert body["Cameras"] == [c for c in cameras if c["name"] in wanted]
+    assert get_json(client, "/Interface/Cameras/GetStatus")["Cameras"] == cameras
+
+
+def test_activation_of_unknown_camera_is_404(client):
+    response = client.post("/Interface/Cameras/Activation", json={"camera": "NO-SUCH-CAMERA", "action": "activate"})
+    assert response.status_code == 404
+    assert response.get_json() == {"success": False, "error": "Camera not found"}
+
+
+
+# Dashboard Stats -----------------------------------------------------------------
+
+def test_dashboard_stats_follow_activation(client):
+    camera = unique_camera(client)
+    before = get_json(client, "/Interface/Dashboard/Stats?SelfCheck=TRUE")
+    assert before["selfCheck"] == {"consistent": True, "mismatches": {}}
+    assert before["totalEvents"] == len(server.mock_events)
+    step = -1 if camera["active"] else 1
+    try:
+        set_activation(client, camera["name"], not camera["active"])
+        after = get_json(client, "/Interface/Dashboard/Stats?SelfCheck=TRUE")
+        assert after["selfCheck"]["consistent"]
+        assert after["activeCameras"] == before["activeCameras"] + step
+        assert after["offlineCameras"] == before["offlineCameras"] - step
+    finally:
+        set_activation(client, camera["name"], camera["active"])
+    assert "selfCheck" not in get_json(client, "/Interface/Dashboard/Stats")
+
+
+# Asyncio front end -------------------------------------------------------------
+
+@pytest.fixture
+def async_server_env(monkeypatch):
+    monkeypatch.setattr(async_server, "MAX_BODY_BYTES", 1000)
+    # The server's change feed listens on the shared catalog cache; drop it with the test's event loop
+    monkeypatch.setattr(server.catalog_cache, "_listeners", list(server.catalog_cache._listeners))
+
+
+def run_async_server(client_side):
+    """Run client_side(port) against an AsyncServer on a free port; returns its result"""
+    async def main():
+        instance = await async_server.AsyncServer(host="127.0.0.1", port=0, threads=2).start()
+        try:
+            return await client_side(instance.port)
+        finally:
+            instance.server.close()
+            await instance.server.wait_closed()
+            instance.executor.shutdown()
+    return asyncio.run(main())
+
+
+async def exchange(port, data, body=None):
+    """Send raw request bytes and read until the server closes the connection.
+
+    With `body`, wait for the interim response first and send it after.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(data)
+        await writer.drain()
+        interim = b""
+        if body is not None:
+            interim = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            writer.write(body)
+            await writer.drain()
+        return interim + await asyncio.wait_for(reader.read(), 5)
+    finally:
+        writer.close()
+
+
+def status_and_body(response):
+    head, _, body = response.rpartition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), body
+
+
+@pytest.mark.parametrize("data, status, error", [
+    (b"POST /Interface/Cameras/Bookmarks/Add HTTP/1.1\r\nContent-Length: 5000\r\n\r\n", 413, "request body over 1000 bytes"),
+    (b"POST /Interface/Cameras/Bookmarks/Add HTTP/1.1\r\nContent-Length: -4\r\n\r\n", 400, "invalid Content-Length"),
+    (b"POST /Interface/Cameras/Bookmarks/Add HTTP/1.1\r\nContent-Length: abc\r\n\r\n", 400, "invalid Content-Length"),
+    (b"POST /Interface/Cameras/Bookmarks/Add HTTP/1.1\r\nContent-Length: 50\r\n\r\n{\"ti", 400, "incomplete request body"),
+    (b"GET / HTTP/1.1\r\nnocolon\r\n\r\n", 400, "malformed header line"),
+    (b"GET / HTTP/2.0\r\n\r\n", 400, "unsupported HTTP version"),
+    (b"POST / HTTP/1.1\r\nExpect: fancy\r\nContent-Length: 3\r\n\r\n", 417, "only Expect: 100-continue is supported"),
+])
+def test_async_server_rejects_malformed_requests(async_server_env, data, status, error):
+    async def client_side(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(data)
+        writer.write_eof()
+        try:
+            return await asyncio.wait_for(reader.read(), 5)
+        finally:
+            writer.close()
+
+    code, body = status_and_body(run_async_server(client_side))
+    assert code == status
+    assert json.loads(body) == {"success": False, "error": error}
+
+
+def test_async_server_answers_expect_100_continue(async_server_env):
+    body = json.dumps({"title": "Continued upload"}).encode()
+    head = (b"POST /Interface/Cameras/Bookmarks/Add HTTP/1.1\r\nContent-Type: application/json\r\n"
+            b"Connection: close\r\nExpect: 100-continue\r\nContent-Length: %d\r\n\r\n" % len(body))
+    response = run_async_server(lambda port: exchange(port, head, body))
+    assert response.startswith(b"HTTP/1.1 100 Continue\r\n\r\nHTTP/1.1 200 ")
+    assert json.loads(status_and_body(response)[1])["bookmark"]["title"] == "Continued upload"
+
+
+def test_wait_for_change_times_out_and_wakes_on_bump(async_server_env):
+    def wait(port, query):
+        return exchange(port, f"GET /Interface/Catalog/WaitForChange?{query} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+
+    async def client_side(port):
+        version = server.catalog_cache.version("groups")
+        timed_out = await wait(port, "Catalog=groups&Timeout=0.05")
+        waiting = asyncio.ensure_future(wait(port, f"Catalog=groups&Version={version}&Timeout=5"))
+        await asyncio.sleep(0.1)
+        server.catalog_cache.bump("groups")
+        woken = await waiting
+        invalid = await wait(port, "Catalog=bogus")
+        return version, timed_out, woken, invalid
+
+    version, timed_out, woken, invalid = run_async_server(client_side)
+    assert json.loads(status_and_body(timed_out)[1]) == {"Catalog": "groups", "Version": version, "Changed": False}
+    assert json.loads(status_and_body(woken)[1]) == {"Catalog": "groups", "Version": version + 1, "Changed": True}
+    assert status_and_body(invalid)[0] == 400
+
+
+# Live event stream ---------------------------------------------------------------
+
+def live_chunk(n, seed=0):
+    """n random events for the current cameras, as the live producer makes them"""
+    now = int(time.time() * 1_000_000)
+    lo = max(now - 1_000_000, server.mock_events.latest_timestamp)  # appendable to the shared store
+    vocab = event_vocabulary([c["name"] for c in server.mock_cameras])
+    return random_chunk(np.random.default_rng(seed), n, lo, max(lo, now), vocab)
+
+
+def open_stream(client, query=""):
+    response = client.get(f"/Interface/Analytics/Stream?{query}", buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    frames = response.iter_encoded()
+    assert next(frames) == b": connected\n\n"  # subscribed from here on
+    return response, frames
+
+
+def parse_frames(text):
+    frames = []
+    for block in text.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        frames.append((fields.get("event"), fields.get("id"), json.loads(fields["data"])))
+    return frames
+
+
+def test_stream_sends_published_events_that_pass_the_filters(client):
+    response, frames = open_stream(client, "EventTypes=MOTION,EXIT")
+    try:
+        chunk = live_chunk(40)
+        first_row = len(server.mock_events)
+        server.event_hub.publish(first_row, chunk)
+        expected = [(None, str(first_row + i), event) for i, event in enumerate(chunk.iter_dicts())
+                    if event["eventType"] in ("MOTION", "EXIT")]
+        assert expected
+        assert parse_frames(next(frames)) == expected
+    finally:
+        response.close()
+    assert len(server.event_hub) == 0
+
+
+def test_stream_disconnects_a_full_queue_with_the_disconnect_policy(client):
+    response, frames = open_stream(client, "QueueSize=5&Policy=disconnect")
+    try:
+        server.event_hub.publish(len(server.mock_events), live_chunk(8))
+        assert parse_frames(next(frames)) == [("dropped", None, {"dropped": 8}),
+                                              ("disconnect", None, {"reason": "queue full"})]
+        assert next(frames, None) is None
+    finally:
+        response.close()
+
+
+@pytest.mark.parametrize("query, error", [
+    ("QueueSize=many", "QueueSize must be an integer"),
+    ("QueueSize=0", "QueueSize must be between 1 and 1000000"),
+    ("Policy=block", "Policy must be one of drop_oldest, drop_newest, disconnect"),
+])
+def test_stream_rejects_invalid_options(client, query, error):
+    body = get_json(client, f"/Interface/Analytics/Stream?{query}", status=400)
+    assert body == {"success": False, "error": error}
+
+
+# Since watermark -----------------------------------------------------------------
+
+def test_since_sequence_returns_events_logged_from_there(client):
+    events = all_events(client)
+    body = get_json(client, f"/Interface/Analytics/Search?Since={len(events) - 10}")
+    assert body["Events"] == events[:10]
+    assert body["Watermark"] == len(events)
+    assert "Watermark" not in get_json(client, "/Interface/Analytics/Search?Limit=1")
+
+
+def test_since_watermark_picks_up_appended_events(client):
+    watermark = get_json(client, f"/Interface/Analytics/Search?Since={len(server.mock_events)}")["Watermark"]
+    first_row = server.mock_events.extend_chunk(live_chunk(25, seed=1))
+    assert first_row == watermark
+    body = get_json(client, f"/Interface/Analytics/Search?Since={watermark}")
+    assert body["Watermark"] == watermark + 25
+    assert body["Events"] == server.mock_events.materialize(range(watermark + 24, watermark - 1, -1))
+
+    # Paged deltas keep the first page's watermark
+    paged = walk_pages(client, f"/Interface/Analytics/Search?Since={watermark}", "Events", 10)
+    assert paged == body["Events"]
+
+
+def test_since_date_returns_events_after_that_moment(client):
+    events = all_events(client)
+    moment = events[len(events) // 2]["timestamp"]
+    body = get_json(client, f"/Interface/Analytics/Search?Since={moment}")
+    assert body["Events"] == [e for e in events if e["timestamp"] > moment]
+
+
+def test_invalid_since_is_rejected(client):
+    body = get_json(client, "/Interface/Analytics/Search?Since=-3", status=400)
+    assert body == {"success": False, "error": "Since must be a sequence number or a date/time"}
+
+
+# Keyword search ----------------------------------------------------------------
+
+def add_bookmark(client, **fields):
+    response = client.post("/Interface/Cameras/Bookmarks/Add", json=fields)
+    assert response.status_code == 200, response.get_data()
+    return response.get_json()["bookmark"]
+
+
+def search_bookmarks(client, query):
+    return [b["id"] for b in get_json(client, f"/Interface/Cameras/Bookmarks/Search?{query}")["Bookmarks"]]
+
+
+def test_bookmark_keyword_search_matches_word_prefixes(client):
+    bookmark = add_bookmark(client, title="Forklift near dock", remarks="Zebracrossing blocked")
+    try:
+        assert search_bookmarks(client, "Keyword=zebra") == [bookmark["id"]]
+        assert search_bookmarks(client, "Keyword=FORK%20zebra") == [bookmark["id"]]
+        assert search_bookmarks(client, "Keyword=zebra%20parking") == []
+    finally:
+        assert client.post("/Interface/Cameras/Bookmarks/Delete", json={"id": bookmark["id"]}).status_code == 200
+    assert search_bookmarks(client, "Keyword=zebra") == []
+
+
+def test_bookmark_relevance_sort_puts_best_matches_first(client):
+    twice = add_bookmark(client, title="Quokka by the quokka enclosure")
+    once = add_bookmark(client, title="Quokka sighting")
+    try:
+        # Without Sort the list keeps its newest-first order
+        assert search_bookmarks(client, "Keyword=quokka") == [once["id"], twice["id"]]
+        assert search_bookmarks(client, "Keyword=quokka&Sort=Relevance") == [twice["id"], once["id"]]
+        assert search_bookmarks(client, "Keyword=quokka&Sort=relevance") == [twice["id"], once["id"]]
+    finally:
+        for bookmark in (once, twice):
+            client.post("/Interface/Cameras/Bookmarks/Delete", json={"id": bookmark["id"]})
+
+
+def test_bookmarks_with_non_string_titles_are_added_and_searchable(client):
+    numbered = add_bookmark(client, title=20241208)
+    listed = add_bookmark(client, title=["not", "a", "title"], remarks=None)
+    try:
+        assert search_bookmarks(client, "Keyword=20241208") == [numbered["id"]]
+        assert listed["id"] in search_bookmarks(client, "")
+    finally:
+        for bookmark in (numbered, listed):
+            client.post("/Interface/Cameras/Bookmarks/Delete", json={"id": bookmark["id"]})
+
+
+def test_audit_keyword_search_requires_every_word(client):
+    logs = get_json(client, "/Interface/Audit/Search")["AuditLogs"]
+    expected = [log for log in logs if "password" in log["action"].lower()]
+    assert expected
+    assert get_json(client, "/Interface/Audit/Search?Keyword=PASSW")["AuditLogs"] == expected
+    assert get_json(client, "/Interface/Audit/Search?Keyword=user%20passw")["AuditLogs"] == expected
+    assert get_json(client, "/Interface/Audit/Search?Keyword=passw%20xyzzy")["AuditLogs"] == []
+
+
+@pytest.mark.parametrize("url", ["/Interface/Audit/Search", "/Interface/Cameras/Bookmarks/Search"])
+def test_unknown_sort_is_rejected(client, url):
+    body = get_json(client, f"{url}?Keyword=a&Sort=Newest", status=400)
+    assert body == {"success": False, "error": "Sort must be Relevance"}
+
+
+# Analytics Chart -----------------------------------------------------------------
+
+def test_chart_counts_the_stored_events(client):
+    rows = get_json(client, "/Interface/Analytics/Chart?Interval=1440&Buckets=3")
+    assert len(rows) == 3
+    events = all_events(client)
+    assert sum(row["events"] for row in rows) == sum(e["timestamp"] >= rows[0]["start"] for e in events)
+    for row in rows:
+        assert row["events"] == sum(row["byType"].values()) == sum(row["byGroup"].values())
+        assert row["motion"] == row["byType"].get("MOTION", 0)
+    assert len(get_json(client, "/Interface/Analytics/Chart")) == 24
+
+
+@pytest.mark.parametrize("query, error", [
+    ("Interval=hourly", "Interval and Buckets must be integers"),
+    ("Interval=0", "Interval must be 1-10080 minutes and Buckets 1-10000"),
+    ("Buckets=10001", "Interval must be 1-10080 minutes and Buckets 1-10000"),
+])
+def test_chart_rejects_invalid_windows(client, query, error):
+    body = get_json(client, f"/Interface/Analytics/Chart?{query}", status=400)
+    assert body == {"success": False, "error": error}
+
+
+# Snapshots -------------------------------------------------------------------------
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_snapshot_round_trip_serves_the_same_search(tmp_path, mmap):
+    save_snapshot(tmp_path, server.mock_cameras, server.mock_groups, server.mock_events)
+    cameras, groups, events = load_snapshot(tmp_path)
+    if not mmap:
+        events = EventStore.load(tmp_path, mmap=False)
+    assert (cameras, groups) == (server.mock_cameras, server.mock_groups)
+    assert len(events) == len(server.mock_events)
+    rows = server.mock_events.search_rows(event_types=["MOTION"], limit=50)
+    assert list(events.search_rows(event_types=["MOTION"], limit=50)) == list(rows)
+    assert events.materialize(rows) == server.mock_events.materialize(rows)
+
+    # Appending copies the mapped columns instead of writing to the files
+    first_row = events.extend_chunk(live_chunk(5, seed=2))
+    assert first_row == len(server.mock_events)
+    assert len(EventStore.load(tmp_path)) == len(server.mock_events)
+
+
+def test_lazy_builds_once():
+    calls = []
+    value = Lazy(lambda: calls.append(1) or "built")
+    assert not value.built
+    assert value() == value() == "built"
+    assert value.built and calls == [1]
+
+
+# Write-behind persistence ------------------------------------------------------------
+
+@pytest.fixture
+def state_db(tmp_path, monkeypatch):
+    """A fresh database seeded and tracked as app.py does with MOCK_DB"""
+    db = StateDB(str(tmp_path / "state.db"), flush_interval=0.01)
+    db.seed({
+        "bookmarks": [(b["id"], b) for b in reversed(server.mock_bookmarks.snapshot())],
+        "counters": [(c["id"], c) for c in server.mock_counters.snapshot()],
+    })
+    db.track("bookmarks", lambda ids: dict(reversed(server.mock_bookmarks.get_many(ids).items())))
+    db.track("counters", server.mock_counters.get_many)
+    db.track("cameras", server.camera_activations)
+    monkeypatch.setattr(server, "state_db", db)
+    return db
+
+
+def test_mutations_are_written_behind(client, state_db):
+    bookmark = add_bookmark(client, title="Persisted bookmark")
+    counter = get_json(client, "/Interface/Analytics/GetCounters")["Counters"][0]
+    assert client.post("/Interface/Analytics/ResetCounter", json={"counterId": counter["id"]}).status_code == 200
+    camera = unique_camera(client)
+    set_activation(client, camera["name"], not camera["active"])
+    set_activation(client, camera["name"], camera["active"])
+    assert state_db.flush(5)
+
+    saved = state_db.load()
+    assert saved["bookmarks"][-1] == (bookmark["id"], bookmark)
+    assert dict(saved["counters"])[counter["id"]]["value"] == 0
+    assert saved["cameras"] == [(camera["name"], {"active": camera["active"]})]
+
+    assert client.post("/Interface/Cameras/Bookmarks/Delete", json={"id": bookmark["id"]}).status_code == 200
+    assert state_db.flush(5)
+    assert bookmark["id"] not in dict(state_db.load()["bookmarks"])
+
+
+def test_unseeded_database_loads_as_none(tmp_path):
+    assert StateDB(str(tmp_path / "empty.db")).load() is None
+
+
+# Batch endpoints -------------------------------------------------------------------
+
+def post_json(client, url, body, status=200):
+    response = client.post(url, json=body)
+    assert response.status_code == status, response.get_data()
+    return response.get_json()
+
+
+def test_add_batch_reports_each_item(client):
+    body = post_json(client, "/Interface/Cameras/Bookmarks/AddBatch",
+                     {"bookmarks": [{"title": "Batch first"}, "not an object", {"title": 42}]})
+    assert (body["success"], body["succeeded"], body["failed"]) == (False, 2, 1)
+    first, invalid, numbered = body["results"]
+    assert invalid == {"success": False, "error": "Bookmark must be an object"}
+    try:
+        # Newest first, as if added one at a time
+        listed = search_bookmarks(client, "Limit=2")
+        assert listed == [numbered["bookmark"]["id"], first["bookmark"]["id"]]
+        assert search_bookmarks(client, "Keyword=42") == [numbered["bookmark"]["id"]]
+    finally:
+        for result in (first, numbered):
+            client.post("/Interface/Cameras/Bookmarks/Delete", json={"id": result["bookmark"]["id"]})
+
+
+def test_activation_batch_skips_non_string_names(client):
+    camera = unique_camera(client)
+    action = "deactivate" if camera["active"] else "activate"
+    try:
+        body = post_json(client, "/Interface/Cameras/ActivationBatch",
+                         {"cameras": [7, camera["name"], "NO-SUCH-CAMERA", None], "action": action})
+        assert (body["succeeded"], body["failed"]) == (1, 3)
+        assert [r["success"] for r in body["results"]] == [False, True, False, False]
+        assert body["results"][0] == {"success": False, "error": "Camera name must be a string"}
+        assert body["results"][1]["camera"]["active"] is not camera["active"]
+        assert body["results"][2] == {"success": False, "camera": {"name": "NO-SUCH-CAMERA"}, "error": "Camera not found"}
+    finally:
+        set_activation(client, camera["name"], camera["active"])
+
+
+def test_activation_batch_by_group(client):
+    cameras = get_json(client, "/Interface/Cameras/GetCameras")["Cameras"]
+    names = [c["name"] for c in cameras]
+    # Activation addresses the first camera of a name, so use a group without repeated names
+    group = next(g["name"] for g in get_json(client, "/Interface/Cameras/GetGroups")["Groups"]
+                 if all(names.count(c["name"]) == 1 for c in cameras if c.get("group") == g["name"]))
+    members = [c for c in cameras if c.get("group") == group]
+    try:
+        body = post_json(client, "/Interface/Cameras/ActivationBatch", {"group": group, "action": "deactivate"})
+        assert body["succeeded"] == len(members) > 0
+        cameras = get_json(client, "/Interface/Cameras/GetCameras")["Cameras"]
+        assert all(not c["active"] for c in cameras if c.get("group") == group)
+    finally:
+        for camera in members:
+            set_activation(client, camera["name"], camera["active"])
+
+
+def test_reset_counter_batch_skips_non_string_ids(client):
+    counter = get_json(client, "/Interface/Analytics/GetCounters")["Counters"][0]
+    body = post_json(client, "/Interface/Analytics/ResetCounterBatch", {"counterIds": [None, counter["id"], "missing", {"id": 1}]})
+    assert [r["success"] for r in body["results"]] == [False, True, False, False]
+    assert body["results"][0] == {"success": False, "error": "Counter id must be a string"}
+    assert body["results"][1]["counter"]["value"] == 0
+    assert body["results"][2] == {"success": False, "counterId": "missing", "error": "Counter not found"}
+
+
+@pytest.mark.parametrize("url, body, error", [
+    ("/Interface/Cameras/Bookmarks/AddBatch", ["not", "an", "object"], "Body must be a JSON object with a 'bookmarks' array"),
+    ("/Interface/Analytics/ResetCounterBatch", {"counterIds": "c1"}, "Body must be a JSON object with a 'counterIds' array"),
+    ("/Interface/Cameras/ActivationBatch", {"cameras": [], "action": "toggle"}, "Body must give an action of activate or deactivate"),
+    ("/Interface/Cameras/ActivationBatch", {"cameras": "CAM-1", "action": "activate"}, "Body must be a JSON object with a 'cameras' array"),
+    ("/Interface/Cameras/ActivationBatch", {"group": 3, "action": "activate"}, "Group must be a string"),
+    ("/Interface/Cameras/Activation", {"camera": ["CAM-1"], "action": "activate"}, "Camera name must be a string"),
+])
+def test_malformed_batch_bodies_are_rejected(client, url, body, error):
+    assert post_json(client, url, body, status=400) == {"success": False, "error": error}
+
+
+# JSON encoding ---------------------------------------------------------------------
+
+TRICKY_VALUES = [
+    {"camera": "Câmera 1 – Entrada", "emoji": "\U0001F4F7"},
+    {"title": "a\x7fb", "control": "tab\tnul\x00"},
+    {"floats": [0.1, 1.5, 1e16, 1.5e-7, 0.00001, 0.0001, -2.5e300, 123456789.125]},
+    {"big": 2 ** 70, "negative": -(2 ** 64), "small": 7},
+    {3: "int keys", 1: "sorted numerically"},
+    {"when": datetime(2024, 12, 8, 14, 30), "day": date(2024, 12, 8), "id": uuid.UUID(int=5)},
+    {"amount": Decimal("1.10"), "looks": ":1e5,0.00002", "nested": {"b": [None, True], "a": []}},
+]
+
+
+def stdlib_jsonify(obj):
+    plain = Flask("stdlib")
+    with plain.app_context():
+        return plain.json.response(obj).get_data()
+
+
+@pytest.mark.parametrize("fast", [True, False])
+@pytest.mark.parametrize("obj", TRICKY_VALUES)
+def test_json_encoding_matches_jsonify_bytes(monkeypatch, fast, obj):
+    monkeypatch.setattr(FastJSONProvider, "fast", fast and FastJSONProvider.fast)
+    expected = stdlib_jsonify(obj)
+    with server.app.app_context():
+        assert server.app.json.response(obj).get_data() == expected
+        assert server.app.json.encode(obj) + b"\n" == expected
+        assert server.app.json.dumps(obj, separators=(",", ":")).encode() + b"\n" == expected
+        items = list(obj.values())
+        assert server.app.json.encode_items(items) == stdlib_jsonify(items)[1:-2].decode()
+
+
+# Request metrics -------------------------------------------------------------------
+
+def route_metrics(client, route):
+    routes = get_json(client, "/Interface/System/Metrics")["routes"]
+    return next((r for r in routes if r["route"] == route and r["method"] == "GET"),
+                {"requests": 0, "statuses": {}, "bytes": {"total": 0}})
+
+
+def test_metrics_count_requests_by_route_and_status(client):
+    route = "/Interface/Analytics/Chart"
+    before = route_metrics(client, route)
+    # Requests are recorded when their body is closed
+    ok = client.get(f"{route}?Buckets=2")
+    ok.close()
+    client.get(f"{route}?Buckets=0").close()
+    after = route_metrics(client, route)
+    assert after["requests"] == before["requests"] + 2
+    assert after["statuses"]["200"] == before["statuses"].get("200", 0) + 1
+    assert after["statuses"]["400"] == before["statuses"].get("400", 0) + 1
+    assert after["bytes"]["total"] >= before["bytes"]["total"] + len(ok.get_data())
+    assert sum(after["latency"]["buckets"]) == after["requests"]
+
+
+def test_metrics_report_the_process(client):
+    client.get("/Interface/Dashboard/Stats").close()
+    body = get_json(client, "/Interface/System/Metrics")
+    assert body["process"]["pid"] == os.getpid()
+    assert body["process"]["cpuSeconds"] > 0
+    assert len(body["latencyBucketsMs"]) == len(body["routes"][0]["latency"]["buckets"])
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"query_string": "Format=Prometheus"},
+    {"headers": {"Accept": "text/plain;version=0.0.4"}},
+])
+def test_metrics_prometheus_format(client, kwargs):
+    client.get("/Interface/Dashboard/Stats").close()
+    response = client.get("/Interface/System/Metrics", **kwargs)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+    text = response.get_data(as_text=True)
+    assert "# TYPE mock_http_request_duration_seconds histogram" in text
+    assert 'mock_http_requests_total{route="/Interface/Dashboard/Stats",method="GET",status="200"}' in text
+    assert "\nprocess_cpu_seconds_total " in text
+
+
+def test_metrics_reject_unknown_format(client):
+    body = get_json(client, "/Interface/System/Metrics?Format=xml", status=400)
+    assert body == {"success": False, "error": "Format must be JSON or Prometheus"}
+
+
+def test_cpu_meter_measures_from_its_baseline(monkeypatch):
+    clock = {"wall": 1000.0, "cpu": 500.0}  # a busy startup already spent 500 CPU seconds
+    monkeypatch.setattr(metrics.time, "monotonic", lambda: clock["wall"])
+    monkeypatch.setattr(metrics, "process_cpu_seconds", lambda: clock["cpu"])
+    monkeypatch.setattr(metrics.os, "cpu_count", lambda: 1)
+    meter = metrics.CpuMeter()
+    assert meter.percent() == 0.0  # no window to measure yet
+    clock["wall"] += 2
+    clock["cpu"] += 0.5
+    assert meter.percent() == 25.0
+    clock["wall"] += 0.5  # within MIN_WINDOW: the previous reading
+    clock["cpu"] += 0.5
+    assert meter.percent() == 25.0
+
+
+# Request profiling -------------------------------------------------------------------
+
+@pytest.fixture
+def profiled(tmp_path, monkeypatch):
+    """A small app behind a RequestProfiler allowed two profile files"""
+    monkeypatch.setattr(profiling, "MAX_FILES", 2)
+    profiled_app = Flask("profiled")
+    profiled_app.add_url_rule("/work", "work", lambda: {"total": sum(range(10000))})
+    profiling.RequestProfiler(profiled_app, str(tmp_path))
+    return profiled_app.test_client(), tmp_path
+
+
+def test_profile_file_is_announced_and_written(profiled):
+    client, directory = profiled
+    unprofiled = client.get("/work")
+    unprofiled.close()
+    assert "X-Profile-File" not in unprofiled.headers
+
+    response = client.get("/work", headers={"X-Profile": "cProfile"})
+    response.close()  # the profile is written once the body is done
+    name = response.headers["X-Profile-File"]
+    assert name.endswith("-GET-work.pstats")
+    assert pstats.Stats(str(directory / name)).total_calls > 0
+
+    response = client.get("/work?Profile=Sample")
+    response.close()
+    assert response.headers["X-Profile-File"].endswith(".folded")
+    assert (directory / response.headers["X-Profile-File"]).exists()
+
+
+def test_no_profile_file_is_announced_past_max_files(profiled):
+    client, directory = profiled
+    for _ in range(2):
+        client.get("/work", headers={"X-Profile": "cprofile"}).close()
+    response = client.get("/work", headers={"X-Profile": "cprofile"})
+    response.close()
+    assert response.status_code == 200
+    assert "X-Profile-File" not in response.headers
+    assert len(list(directory.iterdir())) == 2
+
+
+# Response compression --------------------------------------------------------------
+
+DECOMPRESS = {"gzip": gzip.decompress, "deflate": zlib.decompress}
+
+
+@pytest.mark.parametrize("coding", ["gzip", "deflate"])
+@pytest.mark.parametrize("url", ["/Interface/Cameras/GetCameras", "/Interface/Analytics/Search?Limit=500"])
+def test_responses_are_compressed_as_accepted(client, url, coding):
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    response = client.get(url, headers={"Accept-Encoding": f"{coding}, identity;q=0.5"})
+    assert response.headers["Content-Encoding"] == coding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    compressed = response.get_data()
+    assert len(compressed) < len(plain.get_data())
+    assert DECOMPRESS[coding](compressed) == plain.get_data()
+
+
+def test_gzip_is_preferred_over_deflate_and_qualities_count(client):
+    url = "/Interface/Cameras/GetCameras"
+    assert client.get(url, headers={"Accept-Encoding": "deflate, gzip"}).headers["Content-Encoding"] == "gzip"
+    assert client.get(url, headers={"Accept-Encoding": "gzip;q=0.2, deflate"}).headers["Content-Encoding"] == "deflate"
+    assert "Content-Encoding" not in client.get(url, headers={"Accept-Encoding": "gzip;q=0"}).headers
+    if "br" not in compression.CODINGS:
+        assert "Content-Encoding" not in client.get(url, headers={"Accept-Encoding": "br"}).headers
+
+
+def test_each_coding_has_its_own_etag(client):
+    url = "/Interface/Cameras/GetCameras"
+    plain = client.get(url).headers["ETag"]
+    gzipped = client.get(url, headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    assert gzipped != plain
+    assert client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped}).status_code == 304
+    assert client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": plain}).status_code == 200
+
+
+@pytest.mark.parametrize("url, status", [
+    ("/Interface/Dashboard/Stats", 200),  # under MIN_SIZE
+    ("/Interface/Analytics/Search?Limit=x", 400),
+])
+def test_small_and_error_responses_are_not_compressed(client, url, status):
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == status
+    assert "Content-Encoding" not in response.headers
+
+
+def test_event_stream_is_not_compressed(client):
+    response = client.get("/Interface/Analytics/Stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    try:
+        assert "Content-Encoding" not in response.headers
+        assert next(response.iter_encoded()) == b": connected\n\n"
+    finally:
+        response.close()
+
+
+# Field projection ------------------------------------------------------------------
+
+def project(records, fields):
+    return [{field: record[field] for field in fields if field in record} for record in records]
+
+
+@pytest.mark.parametrize("url, key, fields", [
+    ("/Interface/Cameras/GetCameras", "Cameras", ("name", "status")),
+    ("/Interface/Cameras/GetGroups", "Groups", ("cameras", "name")),
+    ("/Interface/Analytics/GetAnalyticsConfigurations", "AnalyticsConfigurations", ("active", "camera")),
+    ("/Interface/Analytics/GetStatus", "AnalyticsConfigurations", ("status", "statusMessage")),
+    ("/Interface/Analytics/GetCounters", "Counters", ("id", "value")),
+])
+def test_fields_project_catalog_records_to_jsonify_bytes(client, url, key, fields):
+    records = get_json(client, url)[key]
+    query = ",".join(field[0].upper() + field[1:] for field in reversed(fields))
+    response = client.get(f"{url}?Fields={query}")
+    assert response.status_code == 200
+    assert response.get_data() == stdlib_jsonify({key: project(records, fields)})
+    # Any spelling and order of the same fields is the same response
+    same = client.get(f"{url}?Fields={','.join(fields).lower()}")
+    assert same.headers["ETag"] == response.headers["ETag"]
+
+
+def test_fields_apply_to_pages_status_and_searches(client):
+    cameras = get_json(client, "/Interface/Cameras/GetCameras")["Cameras"]
+    body = get_json(client, "/Interface/Cameras/GetCameras?Fields=Name,Group&Offset=2&Limit=3")
+    assert body["Cameras"] == project(cameras[2:5], ("name", "group"))
+
+    wanted = {cameras[0]["name"], cameras[-1]["name"]}
+    body = get_json(client, f"/Interface/Cameras/GetStatus?Cameras={','.join(wanted)}&Fields=Name,Working")
+    assert body["Cameras"] == project([c for c in cameras if c["name"] in wanted], ("name", "working"))
+
+    logs = get_json(client, "/Interface/Audit/Search?Keyword=passw")["AuditLogs"]
+    body = get_json(client, "/Interface/Audit/Search?Keyword=passw&Fields=User,Timestamp")
+    assert body["AuditLogs"] == project(logs, ("timestamp", "user"))
+
+    events = get_json(client, "/Interface/Analytics/Search?Limit=20")["Events"]
+    body = get_json(client, "/Interface/Analytics/Search?Limit=20&Fields=EventType,Camera")
+    assert body["Events"] == project(events, ("camera", "eventType"))
+
+
+@pytest.mark.parametrize("url", [
+    "/Interface/Cameras/GetCameras",
+    "/Interface/Cameras/GetStatus",
+    "/Interface/Audit/Search",
+    "/Interface/Analytics/Search",
+])
+def test_unknown_fields_are_rejected(client, url):
+    body = get_json(client, f"{url}?Fields=Bogus", status=400)
+    assert body == {"success": False, "error": "Unknown field in Fields: Bogus"}
+
+
+def test_empty_fields_send_every_field(client):
+    url = "/Interface/Cameras/GetCameras"
+    assert client.get(f"{url}?Fields=,").get_data() == client.get(url).get_data()
+
+
+def test_projected_responses_are_capped_per_table(client, monkeypatch):
+    monkeypatch.setattr(response_cache, "MAX_ENTRIES", 3)
+    fields = ["Name", "Status", "Group", "Model", "Location"]
+    for field in fields:
+        get_json(client, f"/Interface/Cameras/GetCameras?Fields={field}")
+    cache = server.catalog_cache
+    assert len(cache._entries) <= 3 and len(cache._columns) <= 3
+    assert "GetCameras:location" in cache._entries
+    assert "GetCameras:name" not in cache._entries
+
+
+# Camera fleet generator ------------------------------------------------------------
+
+def test_fleet_spec_parsing():
+    assert parse_fleet_spec("10X4x250") == (10, 4, 250)
+    for spec in ("10x4", "ten x 4 x 2", "3x0x5"):
+        with pytest.raises(ValueError):
+            parse_fleet_spec(spec)
+
+
+def test_generated_fleet_has_one_group_per_building():
+    cameras, groups = generate_fleet(3, 4, 25)
+    assert len(cameras) == 300
+    assert len({c["name"] for c in cameras}) == 300
+    assert len({c["connectionAddress"] for c in cameras}) == 300
+    assert len(groups) == 12
+    assert sum(len(g["cameras"]) for g in groups) == 300
+    assert generate_fleet(3, 4, 25) == (cameras, groups)
+    assert {field for c in cameras for field in c} <= set(CAMERA_FIELDS)
+
+
+# Concurrent mutations --------------------------------------------------------------
+
+def run_threads(target, count=8):
+    """Run target(i) on `count` threads at once; re-raises the first failure"""
+    errors = []
+
+    def run(i):
+        try:
+            target(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def test_concurrent_bookmark_adds_are_all_kept(client):
+    before = len(server.mock_bookmarks)
+    added = []
+
+    def add(i):
+        thread_client = server.app.test_client()
+        for k in range(25):
+            added.append(add_bookmark(thread_client, title=f"Concurrent wombat {i}-{k}")["id"])
+
+    run_threads(add)
+    try:
+        assert len(server.mock_bookmarks) == before + 200
+        assert sorted(search_bookmarks(client, "Keyword=wombat")) == sorted(added)
+    finally:
+        for bookmark_id in added:
+            client.post("/Interface/Cameras/Bookmarks/Delete", json={"id": bookmark_id})
+    assert len(server.mock_bookmarks) == before
+
+
+def test_concurrent_activations_keep_the_counters_consistent(client):
+    cameras = get_json(client, "/Interface/Cameras/GetCameras")["Cameras"]
+    names = [c["name"] for c in cameras]
+    unique = [c for c in cameras if names.count(c["name"]) == 1][:16]
+
+    def toggle(i):
+        thread_client = server.app.test_client()
+        for camera in unique[i::8]:
+            for active in (False, True, not camera["active"]):
+                set_activation(thread_client, camera["name"], active)
+
+    try:
+        run_threads(toggle)
+        stats = get_json(client, "/Interface/Dashboard/Stats?SelfCheck=TRUE")
+        assert stats["selfCheck"] == {"consistent": True, "mismatches": {}}
+    finally:
+        for camera in unique:
+            set_activation(client, camera["name"], camera["active"])
+
+
+# 3D camera positions ---------------------------------------------------------------
+
+def test_positions_are_stable_and_leave_the_global_rng_alone():
+    random.seed(11)
+    expected_draw = random.random()
+    random.seed(11)
+    position = generate_high_school_position("CAM-HALLWAY-CENTRAL-07")
+    assert random.random() == expected_draw
+    assert position["location"] == "Central Hallway 07"
+    assert -20 <= position["z"] <= 20 and position["x"] == 0
+    assert resolve_position(RULE_TABLES["high_school"], "CAM-HALLWAY-CENTRAL-07") == position
+
+    # Callers get their own copy of the memoized position
+    position["x"] = 99
+    assert generate_high_school_position("CAM-HALLWAY-CENTRAL-07")["x"] == 0
+
+
+# Serving entry point ---------------------------------------------------------------
+
+def test_serve_options_are_validated():
+    args = serve.parse_args(["--workers", "4", "--threads", "2", "--server", "werkzeug"])
+    assert (args.workers, args.threads, args.server) == (4, 2, "werkzeug")
+    for argv in (["--workers", "0"], ["--keep-alive", "-1"], ["--server", "tornado"]):
+        with pytest.raises(SystemExit):
+            serve.parse_args(argv)
+
+
+def test_pick_server_falls_back_to_what_is_installed(monkeypatch):
+    assert serve.pick_server("asyncio") == "asyncio"
+    monkeypatch.setitem(sys.modules, "gunicorn", None)  # as if not installed
+    monkeypatch.setitem(sys.modules, "waitress", None)
+    assert serve.pick_server() == "werkzeug"
+    with pytest.raises(SystemExit):
+        serve.pick_server("waitress")
+
+
+# Benchmark -------------------------------------------------------------------------
+
+def test_benchmark_read_scenarios_run_without_errors():
+    make_client = lambda: benchmark.InProcessClient(server.app)
+    info = benchmark.dataset_info(make_client())
+    assert info["events"] == len(server.mock_events)
+    # Mutating scenarios would change the state the other tests share
+    read_only = [(name, factory) for name, factory, setup in benchmark.scenarios(info)
+                 if setup is None and factory(0)[0] == "GET"]
+    assert len(read_only) > 15
+    for name, factory in read_only:
+        result = benchmark.run_scenario(make_client, factory, 2, 5, 4)
+        assert (result["requests"], result["errors"]) == (4, 0), name
+        assert result["latencyMs"]["p50"] <= result["latencyMs"]["max"]
+
+
+def test_benchmark_compare_flags_regressions_beyond_tolerance():
+    def report(p95, rps):
+        result = {"scenario": "GetCameras", "concurrency": 8, "latencyMs": {"p95": p95}, "rps": rps}
+        return {"datasets": [{"label": "50 events", "results": [result]}]}
+
+    assert benchmark.compare(report(10.5, 950), report(10, 1000), 0.1) == []
+    assert benchmark.compare(report(12, 800), report(10, 1000), 0.1) == [
+        "50 events / GetCameras x8: p95 10.00 -> 12.00 ms",
+        "50 events / GetCameras x8: 1000.0 -> 800.0 req/s",
+    ]
+    assert benchmark.percentile([1, 2, 3, 4], 50) == 2
+    assert benchmark.percentile([], 99) is None